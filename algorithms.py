@@ -4,18 +4,269 @@ from collections import deque
 import random
 from abc import ABC, abstractmethod
 
+from kernel import block_mask, decode, encode, get_kernel
+from visited_sets import make_visited_set
+
+DEFAULT_BLOCKS = [
+    [[1, 1, 1]],    # Horizontal block of 3
+    [[1], [1], [1]], # Vertical block of 3
+    [[1, 1], [1, 1]]  # Square block of 2x2
+]
+
+# Named piece sets. Any polyomino can be used as a block: it is given as a
+# rectangular list of lists where 1 marks a filled cell and 0 an empty one.
+PIECE_SETS = {
+    "classic": DEFAULT_BLOCKS,
+    "woodblock": [
+        [[1]],                              # Single cell
+        [[1, 1]], [[1], [1]],               # Dominoes
+        [[1, 1, 1]], [[1], [1], [1]],       # Lines of 3
+        [[1, 1, 1, 1]], [[1], [1], [1], [1]],  # Lines of 4
+        [[1, 1, 1, 1, 1]], [[1], [1], [1], [1], [1]],  # Lines of 5
+        [[1, 1], [1, 1]],                   # Square 2x2
+        [[1, 1, 1], [1, 1, 1], [1, 1, 1]],  # Square 3x3
+        [[1, 0], [1, 1]], [[0, 1], [1, 1]],  # Small L, four rotations
+        [[1, 1], [1, 0]], [[1, 1], [0, 1]],
+        [[1, 0, 0], [1, 0, 0], [1, 1, 1]],  # Big L, four rotations
+        [[0, 0, 1], [0, 0, 1], [1, 1, 1]],
+        [[1, 1, 1], [1, 0, 0], [1, 0, 0]],
+        [[1, 1, 1], [0, 0, 1], [0, 0, 1]],
+    ],
+}
+
+
+def generate_board(grid_size=5, max_blocks=8, max_diamonds=5, cluster_patterns=None, rng=None):
+        """
+        Genera un tablero (board) y un arreglo de diamantes (diamonds) para el juego,
+        favoreciendo la creación de pequeñas formaciones (clusters) juntas.
+        
+        Parámetros:
+        grid_size: tamaño del tablero (por defecto 5)
+        max_blocks: número máximo de celdas con bloques (por defecto 5)
+        max_diamonds: número máximo de diamantes (por defecto 3)
+        cluster_patterns: lista de formaciones, cada una como lista de celdas (dx, dy)
+                          (por defecto, pequeñas líneas y cuadrados)
+        rng: instancia de random.Random; con la misma semilla se obtiene el mismo tablero
+             (por defecto, el módulo random global)
+        
+        Devuelve:
+        board, diamonds: dos listas de listas (grid_size x grid_size) con valores 0 o 1.
+        """
+        if rng is None:
+            rng = random
+        board = [[0] * grid_size for _ in range(grid_size)]
+        diamonds = [[0] * grid_size for _ in range(grid_size)]
+
+        if cluster_patterns is None:
+            cluster_patterns = [
+                [(0, 0)],                               
+                [(0, 0), (0, 1), (1, 0), (1, 1)],         
+                [(0, 0), (0, 1)],                       
+                [(0, 0), (1, 0)],                        
+                [(0, 0), (0, 1), (0, 2)],                  
+                [(0, 0), (1, 0), (2, 0)]                  
+            ]
+        
+        blocks_placed = 0
+        attempts = 0
+        while blocks_placed < max_blocks and attempts < 20:
+            attempts += 1
+            pattern = rng.choice(cluster_patterns)
+            if len(pattern) > max_blocks - blocks_placed:
+                continue
+            max_x = grid_size - max(p[0] for p in pattern)
+            max_y = grid_size - max(p[1] for p in pattern)
+            if max_x <= 0 or max_y <= 0:
+                continue
+            x = rng.randint(0, max_x - 1)
+            y = rng.randint(0, max_y - 1)
+            can_place = True
+            for dx, dy in pattern:
+                if board[x + dx][y + dy] == 1:
+                    can_place = False
+                    break
+            if can_place:
+                
+                for dx, dy in pattern:
+                    board[x + dx][y + dy] = 1
+                    blocks_placed += 1
+                    if blocks_placed >= max_blocks:
+                        break
+
+        
+        diamond_count = 0
+        
+        block_positions = [(i, j) for i in range(grid_size) for j in range(grid_size) if board[i][j] == 1]
+        rng.shuffle(block_positions)
+        for pos in block_positions:
+            if diamond_count < max_diamonds:
+                
+                if rng.random() < 0.5:
+                    i, j = pos
+                    diamonds[i][j] = 1
+                    diamond_count += 1
+            else:
+                break
+
+        return board, diamonds
+
+
+def pattern_from_block(block):
+    """Convert a block (list of lists) into a cluster pattern of (dx, dy) cells."""
+    return [(i, j) for i in range(len(block)) for j in range(len(block[0])) if block[i][j] == 1]
+
+
+def _transforms():
+    """The 8 symmetries of the square, as functions on a list-of-lists grid."""
+    def rotate(grid):
+        return [list(row) for row in zip(*grid[::-1])]
+
+    def transpose(grid):
+        return [list(row) for row in zip(*grid)]
+
+    def compose(*steps):
+        def apply(grid):
+            for step in steps:
+                grid = step(grid)
+            return grid
+        return apply
+
+    identity = compose()
+    return [
+        identity,
+        rotate,
+        compose(rotate, rotate),
+        compose(rotate, rotate, rotate),
+        transpose,
+        compose(transpose, rotate),
+        compose(transpose, rotate, rotate),
+        compose(transpose, rotate, rotate, rotate),
+    ]
+
+
+SYMMETRIES = _transforms()
+
+
+def piece_set_symmetries(blocks):
+    """The symmetries of the square that map the piece set onto itself."""
+    pieces = {tuple(tuple(row) for row in block) for block in blocks}
+    valid = []
+    for transform in SYMMETRIES:
+        mapped = {tuple(tuple(row) for row in transform(block)) for block in blocks}
+        if mapped == pieces:
+            valid.append(transform)
+    return valid
+
+
+def canonical_state(board, diamonds, blocks=None):
+    """
+    Canonical form of a state: the smallest (board, diamonds) tuple over the board
+    symmetries that keep the piece set unchanged. Boards equal up to such a symmetry
+    are the same puzzle and get the same key.
+    """
+    if hasattr(board, "tolist"):
+        board = board.tolist()
+    if hasattr(diamonds, "tolist"):
+        diamonds = diamonds.tolist()
+    transforms = piece_set_symmetries(blocks if blocks is not None else DEFAULT_BLOCKS)
+    return min(
+        (tuple(tuple(row) for row in transform(board)), tuple(tuple(row) for row in transform(diamonds)))
+        for transform in transforms
+    )
+
+
+class PieceDealer:
+    """
+    Deals hands of pieces like the real game: 'hand_size' pieces per round, drawn
+    (with replacement) from 'blocks' using the optional 'weights' and a seeded RNG.
+    """
+    def __init__(self, blocks=None, hand_size=3, weights=None, seed=None):
+        self.blocks = copy.deepcopy(blocks) if blocks is not None else copy.deepcopy(DEFAULT_BLOCKS)
+        self.hand_size = hand_size
+        self.weights = weights
+        self.rng = random.Random(seed)
+
+    def deal(self, rng=None):
+        """Return a new hand (a list of blocks). Pass 'rng' to sample without consuming the dealer's stream."""
+        rng = rng if rng is not None else self.rng
+        return [copy.deepcopy(block) for block in rng.choices(self.blocks, weights=self.weights, k=self.hand_size)]
+
+
 class SearchAlgorithm(ABC):
-    def __init__(self, name, board, diamonds, description=""):
+    def __init__(self, name, board, diamonds, description="", blocks=None):
         self.name = name
         self.description = description
-        self.grid_size = 5
+        self.grid_size = len(board)
         self.board = board
         self.diamonds = diamonds
-        self.blocks = [
-            [[1, 1, 1]],    # Horizontal block of 3
-            [[1], [1], [1]], # Vertical block of 3
-            [[1, 1], [1, 1]]  # Square block of 2x2
-        ]
+        self.blocks = copy.deepcopy(blocks) if blocks is not None else copy.deepcopy(DEFAULT_BLOCKS)
+        self.hand = None
+        self.visited_backend = "set"
+        self.visited_options = {}
+        self.visited = None
+        self.model = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clear the per-search counters: nodes expanded and peak frontier / closed-set sizes."""
+        self.nodes_expanded = 0
+        self.peak_frontier = 0
+        self.peak_closed = 0
+
+    def track_sizes(self, frontier, closed):
+        """Record the frontier and closed-set sizes; the benchmarks report their peaks."""
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+        if closed > self.peak_closed:
+            self.peak_closed = closed
+
+    def set_visited_backend(self, kind, **options):
+        """
+        Backend of the explored / closed sets of the next searches: "set" (the default),
+        "packed" or "bloom", with their options (see visited_sets.py).
+        """
+        make_visited_set(kind, self.grid_size, **options)  # fail early on a bad name or option
+        self.visited_backend = kind
+        self.visited_options = options
+
+    def visited_set(self):
+        """A new, empty explored / closed set of the configured backend; kept as self.visited."""
+        self.visited = make_visited_set(self.visited_backend, self.grid_size, **self.visited_options)
+        return self.visited
+
+    def visited_memory(self):
+        """(bytes, states) of the last search's explored / closed set, or (0, 0)."""
+        if self.visited is None:
+            return 0, 0
+        return self.visited.nbytes(), len(self.visited)
+
+    def set_model(self, model):
+        """
+        Guide the search with a learned heuristic (a learned_heuristic.HeuristicModel or the
+        path of its .npz file) instead of the hand-written one; None goes back to it.
+        GreedySearch, WeightedAStarSearch and BeamSearch use it.
+        """
+        if isinstance(model, str):
+            from learned_heuristic import load_model  # NumPy is only needed with a model
+            model = load_model(model)
+        self.model = model
+
+    def set_hand(self, hand):
+        """
+        Restrict the search to the pieces of the current hand (dealt-piece mode).
+        Pass None to go back to every piece in self.blocks being always available.
+        """
+        self.hand = [copy.deepcopy(block) for block in hand] if hand is not None else None
+
+    def available_blocks(self):
+        """Pieces the searcher may place: the distinct pieces of the hand, or every block."""
+        if self.hand is None:
+            return self.blocks
+        unique = []
+        for block in self.hand:
+            if block not in unique:
+                unique.append(block)
+        return unique
 
     @abstractmethod
     def evaluate_move(self, move):
@@ -31,68 +282,87 @@ class SearchAlgorithm(ABC):
         """
         pass
 
+    def kernel_for(self, blocks=None):
+        """The search kernel for the current grid size and 'blocks' (default: the available pieces)."""
+        return get_kernel(self.grid_size, blocks if blocks is not None else self.available_blocks())
+
+    def successors(self, board, diamonds, kernel, blocks):
+        """
+        Lazily yield ((block, x, y), (child board, child diamonds), diamonds removed) for the
+        kernel state (board, diamonds), one placement of 'blocks' at a time, so a search can
+        stop at the first goal child without building the rest. Dead children are skipped.
+        """
+        for (piece, x, y, _), child_board, child_diamonds, removed in kernel.iter_children(board, diamonds):
+            if kernel.is_dead(child_board, child_diamonds):
+                continue
+            yield (blocks[piece], x, y), (child_board, child_diamonds), removed
+
     def possible_moves(self, block):
         """Return all positions where a block can be placed."""
-        block_h, block_w = len(block), len(block[0])
-        moves = []
-        for i in range(self.grid_size - block_h + 1):
-            for j in range(self.grid_size - block_w + 1):
-                if self.can_place_block(block, i, j):
-                    moves.append((i, j))
-        return moves
+        board = encode(self.board)
+        return [(x, y) for _, x, y, mask in get_kernel(len(self.board), [block]).placements if not board & mask]
 
     def can_place_block(self, block, x, y):
         """Check if the block can be placed on self.board at position (x, y)."""
-        block_h, block_w = len(block), len(block[0])
-        for i in range(block_h):
-            for j in range(block_w):
-                if self.board[x + i][y + j] == 1:
-                    return False
-        return True
+        return not encode(self.board) & block_mask(block, x, y, len(self.board))
     
     def is_goal(self, diamonds):
         """Goal is reached when there are no diamonds remaining."""
         return sum(sum(row) for row in diamonds) == 0
 
+    def completed_diamond_lines(self, board, diamonds, move, block):
+        """
+        Number of rows and columns holding a diamond that placing 'block' at 'move'
+        would fill (and therefore clear). Only lines the block touches can be filled.
+        """
+        kernel = get_kernel(len(board), [block])
+        index = next(i for i, placement in enumerate(kernel.placements) if placement[1:3] == tuple(move))
+        return kernel.completed_lines(encode(board), encode(diamonds), index)
+
+    def ordered_moves(self, board, diamonds):
+        """
+        All (score, block, move) placements on 'board', most diamond lines completed first.
+        Ties keep the piece order of available_blocks().
+        """
+        self.board = board
+        blocks = self.available_blocks()
+        kernel = get_kernel(len(board), blocks)
+        return [(score, blocks[piece], (x, y))
+                for score, (piece, x, y, _), _, _, _ in kernel.ordered_children(encode(board), encode(diamonds))]
+
+    def lower_bound(self, board, diamonds):
+        """
+        Admissible estimate of the moves still needed to clear every diamond
+        (see Kernel.lower_bound), for the pieces of available_blocks().
+        """
+        return get_kernel(len(board), self.available_blocks()).lower_bound(encode(board), encode(diamonds))
+
+    def diamonds_after(self, board, diamonds, move, block):
+        """Diamonds left after placing 'block' at 'move': the current count minus those the move clears."""
+        size = len(board)
+        _, _, removed = get_kernel(size, [block]).play(encode(board), encode(diamonds),
+                                                       block_mask(block, move[0], move[1], size))
+        return sum(sum(row) for row in diamonds) - removed
+
     def apply_move(self, board, diamonds, move, block):
         """
         Apply the move by placing the block on the board at the specified position.
         Returns a new board and diamond configuration. This simplified version also clears
         a row or column if it becomes completely filled.
         """
-        new_board = copy.deepcopy(board)
-        new_diamonds = copy.deepcopy(diamonds)
-        x0, y0 = move
-        block_h, block_w = len(block), len(block[0])
-        
-        # Place the block.
-        for i in range(block_h):
-            for j in range(block_w):
-                if block[i][j] == 1:
-                    new_board[x0 + i][y0 + j] = 1
-        
-        # Dummy clearance: clear any completely filled row.
-        for i in range(self.grid_size):
-            if all(new_board[i][j] == 1 for j in range(self.grid_size)):
-                new_board[i] = [0] * self.grid_size
-                new_diamonds[i] = [0] * self.grid_size
-        
-        # Dummy clearance: clear any completely filled column.
-        for j in range(self.grid_size):
-            if all(new_board[i][j] == 1 for i in range(self.grid_size)):
-                for i in range(self.grid_size):
-                    new_board[i][j] = 0
-                    new_diamonds[i][j] = 0
-        
-        return new_board, new_diamonds
+        size = len(board)
+        new_board, new_diamonds = get_kernel(size, [block]).apply(
+            encode(board), encode(diamonds), block_mask(block, move[0], move[1], size))
+        return decode(new_board, size), decode(new_diamonds, size)
 
-    def hash_state(self, board, diamonds):
-        # Convert to lists if board or diamonds are numpy arrays.
-        if hasattr(board, "tolist"):
-            board = board.tolist()
-        if hasattr(diamonds, "tolist"):
-            diamonds = diamonds.tolist()
-        board_tuple = tuple(tuple(row) for row in board)
-        diamonds_tuple = tuple(tuple(row) for row in diamonds)
-        return (board_tuple, diamonds_tuple)
+    def is_unsolvable(self, board, diamonds):
+        """
+        True if the board can never be cleared with the pieces of self.blocks (see
+        Kernel.clearable_cells). Every piece is used, not just the hand, since later
+        hands may hold the others.
+        """
+        return get_kernel(len(board), self.blocks).is_dead(encode(board), encode(diamonds))
 
+    def hash_state(self, board, diamonds):
+        """Hashable key of a state given as grids (lists or arrays): the kernel's (board, diamonds) ints."""
+        return encode(board), encode(diamonds)
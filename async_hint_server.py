@@ -0,0 +1,240 @@
+"""
+Asyncio front end for the hint service, for bursty load: every request has a deadline and
+gets an answer by then, and the number of pending requests is bounded.
+
+    python async_hint_server.py --port 8766 --workers 4 --deadline-ms 500
+
+    POST /hint  same payload as hint_server.py, plus an optional "deadline_ms"
+    ->          {"move": [block, x, y], "complete": true, "cached": false, "time": 0.02}
+    GET  /stats request counters
+
+Searches run in a ProcessPoolExecutor through run_in_executor and are wrapped around
+the SearchAlgorithm.get_best_move contract:
+
+- before searching, the worker picks a fallback move (the placement completing the most
+  diamond lines), so there is always an answer;
+- the search is interrupted at the deadline by a timer signal (SIGALRM) in the worker and
+  the best answer so far is returned: the anytime searchers' incumbent plan (ARA*, whose
+  time budget, like MCTS's, is also cut to the deadline) or else the fallback move;
+- a request whose client disconnects is cancelled: if its search has not started it is
+  dropped from the pool queue, otherwise the worker stops at the deadline anyway;
+- once 'max_pending' requests are waiting, new ones are refused with 503 instead of
+  queueing without bound.
+
+On platforms without SIGALRM (Windows) searches run to completion in the worker and
+the front end answers with a null move when the deadline passes.
+"""
+import argparse
+import asyncio
+import json
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from hint_server import LRUCache, as_tuple, canonicalize, parse_request, unmap_move
+from solver import ALGORITHMS, make_algorithm
+
+# Algorithms with their own time budget: it is cut to the request deadline.
+TIME_BUDGET_OPTION = {"MCTS": "time_limit", "ARA*": "time_limit"}
+
+# Extra time the front end waits for a worker past the deadline (pickling, scheduling).
+GRACE = 0.25
+
+
+class SearchDeadline(Exception):
+    pass
+
+
+def _raise_deadline(signum, frame):
+    raise SearchDeadline()
+
+
+def search_with_deadline(name, board, diamonds, blocks, hand, deadline):
+    """
+    Run in a pool worker: get_best_move for the state, interrupted at 'deadline'
+    (a time.time() timestamp). Returns {"move", "complete", "nodes"}.
+    """
+    remaining = deadline - time.time()
+    options = {}
+    if name in TIME_BUDGET_OPTION:
+        options[TIME_BUDGET_OPTION[name]] = max(0.01, 0.8 * remaining)
+    search_algo = make_algorithm(name, board, diamonds, blocks=blocks, **options)
+    search_algo.set_hand(hand)
+
+    ordered = search_algo.ordered_moves(board, diamonds)
+    fallback = (ordered[0][1], ordered[0][2][0], ordered[0][2][1]) if ordered else None
+    remaining = deadline - time.time()
+    if remaining <= 0 or fallback is None:
+        return {"move": fallback, "complete": fallback is None, "nodes": 0}
+
+    use_alarm = hasattr(signal, "setitimer")
+    move, complete = None, False
+    try:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, _raise_deadline)
+            signal.setitimer(signal.ITIMER_REAL, remaining)
+        try:
+            move = search_algo.get_best_move(None, board, diamonds)
+            complete = True
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except SearchDeadline:
+        pass
+    if not complete:
+        incumbent = getattr(search_algo, "solution_path", None)
+        move = incumbent[0] if incumbent else None
+    if move is None and (not complete or hand is not None):
+        move = fallback
+    return {"move": list(move) if move is not None else None, "complete": complete,
+            "nodes": search_algo.nodes_expanded}
+
+
+class AsyncHintServer:
+    def __init__(self, workers=None, cache_size=10000, deadline=1.0, max_deadline=10.0, max_pending=64):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        # Start the workers now: forked after connections are accepted, they would inherit
+        # the client sockets and keep them open after the response is sent.
+        self.executor.submit(int).result()
+        self.cache = LRUCache(cache_size)
+        self.deadline = deadline
+        self.max_deadline = max_deadline
+        self.max_pending = max_pending
+        self.pending = 0
+        self.stats = {"requests": 0, "hits": 0, "complete": 0, "deadline": 0, "cancelled": 0,
+                      "rejected": 0, "errors": 0}
+
+    async def hint(self, payload, disconnected):
+        """Answer one /hint payload; returns (HTTP status, body)."""
+        name, board, diamonds, blocks, hand, _ = parse_request(payload)
+        if name not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm {name!r}")
+        budget = min(self.max_deadline, float(payload.get("deadline_ms", self.deadline * 1000)) / 1000)
+        start = time.perf_counter()
+        self.stats["requests"] += 1
+
+        state, canonical_hand, inverse = canonicalize(board, diamonds, blocks, hand)
+        key = (name, state, as_tuple(as_tuple(block) for block in blocks),
+               None if canonical_hand is None else tuple(canonical_hand))
+        cached = self.cache.get(key)
+        result = cached
+        if cached is not None:
+            self.stats["hits"] += 1
+        else:
+            if self.pending >= self.max_pending:
+                self.stats["rejected"] += 1
+                return 503, {"error": "too many pending requests"}
+            self.pending += 1
+            try:
+                result = await self.search(name, state, canonical_hand, blocks, budget, disconnected)
+            finally:
+                self.pending -= 1
+            if result is None:
+                return 499, {"error": "client disconnected"}
+            # Answers cut short by the deadline, or by a budget fitted to it, are not reused.
+            if result["complete"] and name not in TIME_BUDGET_OPTION:
+                self.cache.put(key, result)
+        self.stats["complete" if result["complete"] else "deadline"] += 1
+
+        return 200, {
+            "move": unmap_move(result["move"], inverse, len(board)) if result["move"] is not None else None,
+            "complete": result["complete"],
+            "cached": cached is not None,
+            "time": time.perf_counter() - start,
+        }
+
+    async def search(self, name, state, canonical_hand, blocks, budget, disconnected):
+        """Run the search in the pool; None if the client went away first."""
+        loop = asyncio.get_running_loop()
+        board = [list(row) for row in state[0]]
+        diamonds = [list(row) for row in state[1]]
+        hand = None if canonical_hand is None else [[list(row) for row in block] for block in canonical_hand]
+        search = loop.run_in_executor(self.executor, search_with_deadline, name, board, diamonds, blocks, hand,
+                                      time.time() + budget)
+        done, _ = await asyncio.wait({search, disconnected}, timeout=budget + GRACE,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        if search in done:
+            return search.result()
+        # Dropped from the queue if not started yet; a running search stops at its deadline.
+        search.cancel()
+        if disconnected in done:
+            self.stats["cancelled"] += 1
+            return None
+        return {"move": None, "complete": False, "nodes": 0}
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            method, path, _ = request_line.decode().split(" ", 2)
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode().strip()
+                if not line:
+                    break
+                field, _, value = line.partition(":")
+                headers[field.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+
+        disconnected = asyncio.ensure_future(reader.read(1))
+        try:
+            if method == "GET" and path == "/stats":
+                status, response = 200, dict(self.stats, pending=self.pending)
+            elif method == "POST" and path == "/hint":
+                try:
+                    status, response = await self.hint(json.loads(body), disconnected)
+                except (ValueError, TypeError, AttributeError) as e:
+                    status, response = 400, {"error": str(e)}
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    status, response = 500, {"error": str(e)}
+            else:
+                status, response = 404, {"error": "not found"}
+            if status != 499:
+                data = json.dumps(response).encode()
+                writer.write(f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                             "Connection: close\r\n\r\n".encode() + data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            disconnected.cancel()
+            writer.close()
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+async def serve(host, port, server):
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"Serving hints on http://{host}:{listener.sockets[0].getsockname()[1]}/hint")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Asyncio hint server with per-request deadlines.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    parser.add_argument("--deadline-ms", type=float, default=1000, help="default per-request deadline")
+    parser.add_argument("--max-deadline-ms", type=float, default=10000)
+    parser.add_argument("--max-pending", type=int, default=64, help="requests waiting before 503s")
+    args = parser.parse_args()
+
+    server = AsyncHintServer(args.workers, args.cache_size, args.deadline_ms / 1000, args.max_deadline_ms / 1000,
+                             args.max_pending)
+    try:
+        asyncio.run(serve(args.host, args.port, server))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
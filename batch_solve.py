@@ -0,0 +1,142 @@
+"""
+Headless batch solver: solves many boards with one algorithm across a worker pool and
+streams one JSON line per board as soon as it is solved.
+
+Input is either JSON Lines, one board per line:
+
+    {"id": "level-1", "board": [[0, 1, ...], ...], "diamonds": [[0, 1, ...], ...]}
+
+or a NumPy stack of shape (N, 2, grid, grid) holding board and diamonds (.npy, memory-mapped).
+Only a bounded number of boards is in flight at any time, so memory use does not grow
+with the size of the input.
+
+    python batch_solve.py levels.jsonl --algorithm BFS --workers 4 --output results.jsonl
+
+With --shared-memory a .npy stack is copied once into shared memory and workers receive
+only index ranges (see shared_batch.py), which avoids pickling every board and result.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from algorithms import PIECE_SETS
+from solver import ALGORITHMS, label_plan, solve_board
+from visited_sets import VISITED_SETS
+
+
+def read_boards(path):
+    """Yield (id, board, diamonds) from a JSON Lines file or a .npy stack, one board at a time."""
+    if path.endswith(".npy"):
+        import numpy as np
+        stack = np.load(path, mmap_mode="r")
+        for index in range(len(stack)):
+            yield index, stack[index][0].tolist(), stack[index][1].tolist()
+        return
+    with (sys.stdin if path == "-" else open(path)) as f:
+        for line_number, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            yield record.get("id", line_number), record["board"], record["diamonds"]
+
+
+def _solve_task(task):
+    board_id, name, board, diamonds, blocks, max_moves, label_moves, options = task
+    try:
+        result = solve_board(name, board, diamonds, blocks=blocks, max_moves=max_moves, **options)
+        if label_moves:
+            result["labels"] = label_plan(board, diamonds, result["plan"], blocks, max_nodes=label_moves)
+    except Exception as e:  # one bad board must not stop the batch
+        result = {"solved": False, "error": f"{type(e).__name__}: {e}"}
+    result["id"] = board_id
+    result["algorithm"] = name
+    return result
+
+
+def solve_stream(boards, name, blocks=None, workers=None, max_moves=100, max_pending=None, label_moves=None,
+                 **options):
+    """
+    Solve (id, board, diamonds) tuples from the 'boards' iterable with a process pool and
+    yield result dicts in completion order. At most 'max_pending' boards are in flight.
+    With 'label_moves' (a node budget per move) every result also gets the quality of each
+    plan move, as solver.label_plan 'labels'.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    boards = iter(boards)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    board_id, board, diamonds = next(boards)
+                except StopIteration:
+                    exhausted = True
+                    break
+                task = (board_id, name, board, diamonds, blocks, max_moves, label_moves, options)
+                pending.add(executor.submit(_solve_task, task))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a corpus of boards and stream results as JSON Lines.")
+    parser.add_argument("input", help="JSON Lines file ('-' for stdin) or .npy stack of shape (N, 2, grid, grid)")
+    parser.add_argument("--algorithm", default="BFS", choices=list(ALGORITHMS.keys()))
+    parser.add_argument("--piece-set", default="classic", choices=list(PIECE_SETS.keys()))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-moves", type=int, default=100, help="give up on a board after this many moves")
+    parser.add_argument("--max-pending", type=int, default=None, help="boards in flight (default: 4 per worker)")
+    parser.add_argument("--output", default="-", help="output JSON Lines file (default: stdout)")
+    parser.add_argument("--no-plan", action="store_true", help="leave the move list out of the output")
+    parser.add_argument("--shared-memory", action="store_true",
+                        help="pass a .npy stack to the workers through shared memory")
+    parser.add_argument("--chunk-size", type=int, default=16, help="boards per task with --shared-memory")
+    parser.add_argument("--visited", default="set", choices=list(VISITED_SETS.keys()),
+                        help="explored-set backend ('bloom' may miss plans, see visited_sets.py)")
+    parser.add_argument("--model", default=None,
+                        help="learned heuristic weights (.npz) for Greedy, A* weighted and Beam")
+    parser.add_argument("--label-moves", type=int, default=None, metavar="NODES",
+                        help="label each plan move with its distance to the goal and the best one "
+                             "(ranking search of at most NODES states per move)")
+    args = parser.parse_args()
+    if args.shared_memory and not args.input.endswith(".npy"):
+        parser.error("--shared-memory needs a .npy input")
+    if args.shared_memory and args.label_moves:
+        parser.error("--label-moves is not available with --shared-memory")
+
+    blocks = PIECE_SETS[args.piece_set]
+    if args.shared_memory:
+        import numpy as np
+        from shared_batch import solve_shared
+        results = solve_shared(np.load(args.input, mmap_mode="r"), args.algorithm, blocks, args.workers,
+                               args.max_moves, args.chunk_size, visited=args.visited, model=args.model)
+    else:
+        results = solve_stream(read_boards(args.input), args.algorithm, blocks, args.workers, args.max_moves,
+                               args.max_pending, args.label_moves, visited=args.visited, model=args.model)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    solved = total = 0
+    try:
+        for result in results:
+            if args.no_plan:
+                result.pop("plan", None)
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            total += 1
+            solved += bool(result.get("solved"))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{solved}/{total} boards solved with {args.algorithm}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
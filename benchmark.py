@@ -0,0 +1,196 @@
+"""
+Performance regression tracking on the benchmark corpus.
+
+'record' solves every corpus board with every algorithm a few times and stores, per
+algorithm and board, the run times, their median, the nodes expanded and the peak traced
+memory. 'compare' repeats the runs on the current tree and checks them against the stored
+baseline:
+
+- nodes expanded must match exactly for the deterministic searchers;
+- time is a regression when the bootstrap confidence interval of the ratio of medians
+  (current / baseline) lies above 1 and the median ratio exceeds the tolerance;
+- peak memory is a regression when it grows by more than the memory tolerance.
+
+    python benchmark.py record --repeats 5
+    python benchmark.py compare --repeats 5
+
+Baselines are machine-specific: record them on the machine that runs the comparison.
+'compare' exits with status 1 if it finds a regression.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tracemalloc
+
+from algorithms import PIECE_SETS
+from corpus import CORPUS_DIR, CORPUS_VERSION, CORPUS_TIERS, load_corpus, select_boards
+from solver import ALGORITHMS, solve_board
+
+# Searchers that stop on a wall-clock budget: their node counts (and times) depend on the
+# machine, so they are not checked exactly.
+TIME_BUDGETED = {"MCTS", "ARA*"}
+
+# Medians below this many seconds are too noisy to compare.
+MIN_TIME = 0.02
+
+
+def baseline_path(version=CORPUS_VERSION):
+    return os.path.join(CORPUS_DIR, f"baseline_v{version}.json")
+
+
+def measure(name, entry, blocks, repeats=5, measure_memory=True):
+    """Solve one corpus board 'repeats' times and return its times, nodes and peak memory."""
+    # An untimed first run warms up the caches; with memory measurement it is also the
+    # tracemalloc run, since tracing slows the search down too much to time it.
+    peak = None
+    if measure_memory:
+        tracemalloc.start()
+    solve_board(name, entry["board"], entry["diamonds"], blocks=blocks)
+    if measure_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    times, nodes = [], []
+    for _ in range(repeats):
+        result = solve_board(name, entry["board"], entry["diamonds"], blocks=blocks)
+        times.append(result["time"])
+        nodes.append(result["nodes"])
+    return {
+        "times": times,
+        "median_time": statistics.median(times),
+        "nodes": nodes[0] if name not in TIME_BUDGETED else statistics.median(nodes),
+        "nodes_stable": len(set(nodes)) == 1,
+        "moves": result["moves"],
+        "peak_memory": peak,
+        "peak_frontier": result["peak_frontier"],
+        "peak_closed": result["peak_closed"],
+    }
+
+
+def run_suite(algorithms, tiers=None, repeats=5, measure_memory=True, version=CORPUS_VERSION):
+    """Measure every algorithm on the corpus boards; returns the results document."""
+    corpus = load_corpus(version)
+    boards = select_boards(corpus, tiers)
+    blocks = PIECE_SETS[corpus["generator"]["piece_set"]]
+    results = {}
+    for name in algorithms:
+        results[name] = {}
+        for entry in boards:
+            result = measure(name, entry, blocks, repeats, measure_memory)
+            results[name][entry["id"]] = result
+            print(f"{name:<20} {entry['id']:<24} median={result['median_time']:.4f}s "
+                  f"nodes={result['nodes']} moves={result['moves']}", flush=True)
+    return {
+        "corpus_version": corpus["version"],
+        "repeats": repeats,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.processor()},
+        "results": results,
+    }
+
+
+def bootstrap_ratio_ci(baseline, current, confidence=0.95, resamples=2000, rng=None):
+    """Bootstrap confidence interval of median(current) / median(baseline)."""
+    rng = rng or random.Random(0)
+    ratios = sorted(
+        statistics.median(rng.choices(current, k=len(current)))
+        / max(1e-9, statistics.median(rng.choices(baseline, k=len(baseline))))
+        for _ in range(resamples)
+    )
+    alpha = (1 - confidence) / 2
+    return ratios[int(alpha * resamples)], ratios[int((1 - alpha) * resamples) - 1]
+
+
+def compare(baseline, current, tolerance=0.10, memory_tolerance=0.10, confidence=0.95):
+    """
+    Compare two results documents. Returns a list of findings, one per (algorithm, board)
+    present in both, each with a 'status' of "ok", "regression" or "improvement" and the
+    reasons behind it.
+    """
+    if baseline["corpus_version"] != current["corpus_version"]:
+        raise ValueError(f"Baseline was recorded on corpus v{baseline['corpus_version']}, "
+                         f"current results on v{current['corpus_version']}")
+    rng = random.Random(0)
+    findings = []
+    for name, boards in current["results"].items():
+        for board_id, now in boards.items():
+            before = baseline["results"].get(name, {}).get(board_id)
+            if before is None:
+                continue
+            reasons, status = [], "ok"
+            if name not in TIME_BUDGETED and now["nodes"] != before["nodes"]:
+                status = "regression" if now["nodes"] > before["nodes"] else "improvement"
+                reasons.append(f"nodes {before['nodes']} -> {now['nodes']}")
+
+            ratio = now["median_time"] / max(1e-9, before["median_time"])
+            low, high = bootstrap_ratio_ci(before["times"], now["times"], confidence, rng=rng)
+            if max(now["median_time"], before["median_time"]) >= MIN_TIME:
+                if low > 1 and ratio > 1 + tolerance:
+                    status = "regression"
+                    reasons.append(f"time x{ratio:.2f} (CI {low:.2f}-{high:.2f})")
+                elif high < 1 and ratio < 1 - tolerance:
+                    status = "improvement" if status == "ok" else status
+                    reasons.append(f"time x{ratio:.2f} (CI {low:.2f}-{high:.2f})")
+
+            if now["peak_memory"] is not None and before["peak_memory"]:
+                growth = now["peak_memory"] / before["peak_memory"]
+                if growth > 1 + memory_tolerance:
+                    status = "regression"
+                    reasons.append(f"peak memory x{growth:.2f}")
+
+            findings.append({"algorithm": name, "board": board_id, "status": status,
+                             "time_ratio": ratio, "time_ci": (low, high), "reasons": reasons})
+    return findings
+
+
+def report(findings):
+    for finding in findings:
+        if finding["status"] != "ok":
+            print(f"{finding['status'].upper():<12} {finding['algorithm']:<20} {finding['board']:<24} "
+                  + "; ".join(finding["reasons"]))
+    print()
+    for name in dict.fromkeys(finding["algorithm"] for finding in findings):
+        group = [finding for finding in findings if finding["algorithm"] == name]
+        ratio = statistics.median(finding["time_ratio"] for finding in group)
+        regressions = sum(1 for finding in group if finding["status"] == "regression")
+        print(f"{name:<20} median time ratio x{ratio:.2f}, {regressions}/{len(group)} boards regressed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record performance baselines and check for regressions.")
+    parser.add_argument("command", choices=["record", "compare"])
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS.keys()), choices=list(ALGORITHMS.keys()))
+    parser.add_argument("--tiers", nargs="+", default=None, choices=list(CORPUS_TIERS.keys()))
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per algorithm and board")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--baseline", default=baseline_path(), help="baseline results file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10, help="allowed relative memory growth")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--output", help="also write the current results to this file (compare)")
+    args = parser.parse_args()
+
+    results = run_suite(args.algorithms, args.tiers, args.repeats, not args.no_memory)
+    if args.command == "record":
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    findings = compare(baseline, results, args.tolerance, args.memory_tolerance, args.confidence)
+    report(findings)
+    if any(finding["status"] == "regression" for finding in findings):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
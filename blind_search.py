@@ -5,10 +5,11 @@ import heapq
 from abc import ABC, abstractmethod
 
 from algorithms import SearchAlgorithm
+from kernel import KernelState, encode
 
 class BFS(SearchAlgorithm):
-    def __init__(self, board, diamonds, name="Breadth-First Search"):
-        super().__init__(name, board, diamonds, "Uninformed search algorithm using BFS.")
+    def __init__(self, board, diamonds, name="Breadth-First Search", blocks=None):
+        super().__init__(name, board, diamonds, "Uninformed search algorithm using BFS.", blocks)
 
     def evaluate_move(self, move):
         # In uninformed search, all moves are equally valid.
@@ -17,93 +18,146 @@ class BFS(SearchAlgorithm):
     def get_best_move(self, possible_moves, board, diamonds):
         """
         Perform a breadth-first search over the state space starting from the given board
-        and diamond configuration. The algorithm considers all three block pieces:
-          - Horizontal block of 3: [[1,1,1]]
-          - Vertical block of 3: [[1],[1],[1]]
-          - Square block of 2x2: [[1,1],[1,1]]
+        and diamond configuration. The algorithm considers every piece in self.blocks
+        (by default the three classic pieces: horizontal 3, vertical 3 and square 2x2).
         Returns the best move as a tuple (block, x, y) corresponding to the first move
-        that leads to a goal state (i.e. no diamonds remain).
+        that leads to a goal state (i.e. no diamonds remain). Children are goal-tested as
+        they are generated, so the expansion stops at the first goal child.
         """
         
         self.board = copy.deepcopy(board)
         self.diamonds = copy.deepcopy(diamonds)
         self.grid_size = len(board)
+        self.reset_stats()
+        blocks = self.available_blocks()
+        kernel = self.kernel_for(blocks)
         
-        initial_state = (copy.deepcopy(board), copy.deepcopy(diamonds), None)
+        initial_state = (encode(board), encode(diamonds), None)
         frontier = deque([initial_state])
-        explored = set()
+        explored = self.visited_set()
         
         while frontier:
             current_board, current_diamonds, first_move = frontier.popleft()
-            if self.is_goal(current_diamonds):
+            if kernel.is_goal(current_diamonds):
                 return first_move if first_move is not None else None
             
-            state_hash = self.hash_state(current_board, current_diamonds)
+            state_hash = (current_board, current_diamonds)
             if state_hash in explored:
                 continue
             explored.add(state_hash)
+            self.nodes_expanded += 1
+            self.track_sizes(len(frontier), len(explored))
             
-            self.board = current_board
-            
-            for block in self.blocks:
-                moves = self.possible_moves(block)
-                for move in moves:
-                    new_board, new_diamonds = self.apply_move(current_board, current_diamonds, move, block)
-                    next_first_move = first_move if first_move is not None else (block, move[0], move[1])
-                    frontier.append((new_board, new_diamonds, next_first_move))
+            for move, (new_board, new_diamonds), _ in self.successors(current_board, current_diamonds, kernel, blocks):
+                next_first_move = first_move if first_move is not None else move
+                if kernel.is_goal(new_diamonds):
+                    return next_first_move
+                frontier.append((new_board, new_diamonds, next_first_move))
         
         return None  
 
 
 
 class DFS(SearchAlgorithm):
-    def __init__(self, board, diamonds, name="Depth-First Search"):
-        super().__init__(name, board, diamonds, "Uninformed search algorithm using DFS.")
-    
+    def __init__(self, board, diamonds, name="Depth-First Search", blocks=None):
+        super().__init__(name, board, diamonds, "Uninformed search algorithm using DFS.", blocks)
+        self.solution_path = None
+        # Kernel state before each move of the last plan -> index of that move.
+        self.plan_steps = {}
+        self.plan_blocks = None
+
     def evaluate_move(self, move):
         return 0
 
     def get_best_move(self, possible_moves, board, diamonds):
         """
         Perform a depth-first search over the state space starting from the given board
-        and diamond configuration. This DFS explores the state space using all three block pieces:
-          - Horizontal block of 3: [[1,1,1]]
-          - Vertical block of 3:   [[1],[1],[1]]
-          - Square block of 2x2:    [[1,1],[1,1]]
+        and diamond configuration. This DFS explores the state space using every piece
+        in self.blocks (by default horizontal 3, vertical 3 and square 2x2), trying first
+        the moves that complete the most diamond-bearing lines.
         Returns the best move as a tuple (block, x, y) corresponding to the first move
         (from the initial state) that leads to a goal state (i.e. no diamonds remain).
+        A goal child ends the search as soon as it is generated.
+
+        The search runs on one KernelState: moving down the current path makes a move
+        and backtracking unmakes it, so each state on the path only keeps its ordered
+        placements and the index of the next one to try.
+
+        The plan found is kept in self.solution_path. Called again from a state of that
+        plan with the same pieces (as solve_board and run_game do after each move), DFS
+        plays the plan's next move instead of searching again: a new depth-first search
+        from there can pick another plan, and replanning could then go round in circles.
         """
         self.board = copy.deepcopy(board)
         self.diamonds = copy.deepcopy(diamonds)
         self.grid_size = len(board)
-        
-       
-        initial_state = (copy.deepcopy(board), copy.deepcopy(diamonds), None)
-        stack = [initial_state]
-        explored = set()
-        
-        while stack:
-            current_board, current_diamonds, first_move = stack.pop()
-            if self.is_goal(current_diamonds):
-                return first_move if first_move is not None else None
+        self.reset_stats()
+        blocks = self.available_blocks()
+        kernel = self.kernel_for(blocks)
+        state = KernelState(kernel, encode(board), encode(diamonds))
+        if kernel.is_goal(state.diamonds):
+            return None
+        step = self.plan_steps.get((state.board, state.diamonds)) if self.plan_blocks == blocks else None
+        if step is not None:
+            return self.solution_path[step]
+
+        explored = self.visited_set()
+        # One [placements, next index] frame per state on the current path.
+        frames = []
+        pending = 0
+        while True:
+            explored.add((state.board, state.diamonds))
+            self.nodes_expanded += 1
+            self.track_sizes(pending, len(explored))
+            scored = kernel.scored_placements(state.board, state.diamonds)
+            # A goal child completes a diamond line, so goals come before the first score 0,
+            # unless a line is already full: then every child has to be goal-tested.
+            full = kernel.has_full_line(state.board)
+            for score, placement in scored:
+                if score == 0 and not full:
+                    break
+                state.make(placement[3])
+                goal = kernel.is_goal(state.diamonds)
+                state.unmake()
+                if goal:
+                    path = [frame[0][frame[1] - 1][1] for frame in frames] + [placement]
+                    return self.remember_plan(kernel, blocks, encode(board), encode(diamonds), path)
+            frames.append([scored, 0])
+            pending += len(scored)
+
+            # Move to the next unexplored child, most promising first, backtracking as needed.
+            while frames:
+                frame = frames[-1]
+                scored, index = frame
+                if index == len(scored):
+                    frames.pop()
+                    if state.depth():
+                        state.unmake()
+                    continue
+                frame[1] += 1
+                pending -= 1
+                state.make(scored[index][1][3])
+                if (state.board, state.diamonds) in explored or kernel.is_dead(state.board, state.diamonds):
+                    state.unmake()
+                    continue
+                break
+            else:
+                return None
+
+    def remember_plan(self, kernel, blocks, board, diamonds, path):
+        """Keep the plan of kernel placements 'path' from the given state; returns its first move."""
+        self.solution_path = [(blocks[piece], x, y) for piece, x, y, _ in path]
+        self.plan_blocks = blocks
+        self.plan_steps = {}
+        for step, (_, _, _, mask) in enumerate(path):
+            self.plan_steps[(board, diamonds)] = step
+            board, diamonds = kernel.apply(board, diamonds, mask)
+        return self.solution_path[0]
 
-            state_hash = self.hash_state(current_board, current_diamonds)
-            if state_hash in explored:
-                continue
-            explored.add(state_hash)
-            
-            self.board = current_board 
-            for block in self.blocks:
-                moves = self.possible_moves(block)
-                for move in moves:
-                    new_board, new_diamonds = self.apply_move(current_board, current_diamonds, move, block)
-                    next_first_move = first_move if first_move is not None else (block, move[0], move[1])
-                    stack.append((new_board, new_diamonds, next_first_move))
-        return None
 
 class UniformCostSearch(SearchAlgorithm):
-    def __init__(self, board, diamonds, name="Uniform Cost Search"):
-        super().__init__(name, board, diamonds, "Search algorithm that expands the least costly nodes first.")
+    def __init__(self, board, diamonds, name="Uniform Cost Search", blocks=None):
+        super().__init__(name, board, diamonds, "Search algorithm that expands the least costly nodes first.", blocks)
 
     def evaluate_move(self, move):
         # For uniform cost search, assume each move costs 1.
@@ -112,10 +166,8 @@ class UniformCostSearch(SearchAlgorithm):
     def get_best_move(self, possible_moves, board, diamonds):
         """
         Perform a uniform cost search over the state space starting from the given board
-        and diamond configuration. The algorithm considers all three block pieces:
-          - Horizontal block of 3: [[1, 1, 1]]
-          - Vertical block of 3:   [[1], [1], [1]]
-          - Square block of 2x2:    [[1, 1], [1, 1]]
+        and diamond configuration. The algorithm considers every piece in self.blocks
+        (by default the three classic pieces: horizontal 3, vertical 3 and square 2x2).
         Returns the best move as a tuple (block, x, y) corresponding to the first move
         from the initial state that leads to a goal state (i.e., no diamonds remain).
         """
@@ -123,37 +175,42 @@ class UniformCostSearch(SearchAlgorithm):
         self.board = copy.deepcopy(board)
         self.diamonds = copy.deepcopy(diamonds)
         self.grid_size = len(board)
+        self.reset_stats()
+        blocks = self.available_blocks()
+        kernel = self.kernel_for(blocks)
         
-        initial_state = (0, 0, copy.deepcopy(board), copy.deepcopy(diamonds), None)
+        initial_state = (0, 0, encode(board), encode(diamonds), None)
         frontier = []
         heapq.heappush(frontier, initial_state)
-        explored = set()
+        explored = self.visited_set()
         node_counter = 1  
         
         while frontier:
             cost, _, current_board, current_diamonds, first_move = heapq.heappop(frontier)
-            if self.is_goal(current_diamonds):
+            if kernel.is_goal(current_diamonds):
                 return first_move if first_move is not None else None
             
-            state_hash = self.hash_state(current_board, current_diamonds)
+            state_hash = (current_board, current_diamonds)
             if state_hash in explored:
                 continue
             explored.add(state_hash)
+            self.nodes_expanded += 1
+            self.track_sizes(len(frontier), len(explored))
             
-            self.board = current_board
-            for block in self.blocks:
-                moves = self.possible_moves(block)
-                for move in moves:
-                    new_board, new_diamonds = self.apply_move(current_board, current_diamonds, move, block)
-                    next_cost = cost + 1  
-                    next_first_move = first_move if first_move is not None else (block, move[0], move[1])
-                    heapq.heappush(frontier, (next_cost, node_counter, new_board, new_diamonds, next_first_move))
-                    node_counter += 1
+            for (piece, x, y, _), new_board, new_diamonds, _ in kernel.children(current_board, current_diamonds):
+                if kernel.is_dead(new_board, new_diamonds):
+                    continue
+                next_cost = cost + 1  
+                next_first_move = first_move if first_move is not None else (blocks[piece], x, y)
+                heapq.heappush(frontier, (next_cost, node_counter, new_board, new_diamonds, next_first_move))
+                node_counter += 1
         return None
     
 class IterativeDeepeningSearch(SearchAlgorithm):
-    def __init__(self, board, diamonds, name="Iterative Deepening Search"):
-        super().__init__(name, board, diamonds, "Uninformed search algorithm using iterative deepening DFS.")
+    def __init__(self, board, diamonds, name="Iterative Deepening Search", blocks=None, max_table_size=500000):
+        super().__init__(name, board, diamonds, "Uninformed search algorithm using iterative deepening DFS.", blocks)
+        # Caps the transposition table so IDS stays the low-memory option.
+        self.max_table_size = max_table_size
 
     def evaluate_move(self, board, diamonds, block, move):
         # Not used directly in IDS.
@@ -163,30 +220,71 @@ class IterativeDeepeningSearch(SearchAlgorithm):
     def get_best_move(self, possible_moves, board, diamonds, max_depth=50):
         """
         Perform an iterative deepening search over the state space.
-        The search considers all three block pieces and returns the best move as a tuple
-        (block, x, y) corresponding to the first move of the found solution.
+        The search considers every piece in self.blocks and returns the best move as a tuple
+        (block, x, y) corresponding to the first move of the found solution; the whole
+        (shortest) plan is left in self.solution_path.
+
+        Compared to plain IDS:
+          - a depth-aware transposition table remembers, per state, the largest remaining
+            depth already searched without success; it is kept across iterations, so
+            transpositions (A then B vs. B then A) are not searched again;
+          - moves are tried in order of the number of diamond-bearing lines they complete;
+          - states whose admissible lower_bound exceeds the remaining depth are pruned,
+            as are dead states and last moves that complete no diamond line, and the first
+            iteration starts at the root's lower bound;
+          - moves are made and unmade on a single KernelState, and the plan is one list of
+            placements grown and shrunk along the path, so no state is copied per node.
         """
         self.board = copy.deepcopy(board)
         self.diamonds = copy.deepcopy(diamonds)
         self.grid_size = len(board)
+        self.reset_stats()
+        self.transposition = {}
+        self.solution_path = None
+        if self.is_goal(diamonds):
+            self.solution_path = []
+            return None
+        self.search_blocks = self.available_blocks()
+        self.kernel = self.kernel_for(self.search_blocks)
+        self.state = KernelState(self.kernel, encode(board), encode(diamonds))
+        self.path = []
         
-        for depth_limit in range(1, max_depth + 1):
-            result = self.depth_limited_search(board, diamonds, depth_limit, [])
-            if result is not None:
-                return result[0]
+        for depth_limit in range(max(1, self.kernel.lower_bound(self.state.board, self.state.diamonds)),
+                                 max_depth + 1):
+            if self.depth_limited_search(depth_limit):
+                self.solution_path = [(self.search_blocks[piece], x, y) for piece, x, y, _ in self.path]
+                return self.solution_path[0]
         return None
 
-    def depth_limited_search(self, board, diamonds, limit, path):
-        if self.is_goal(diamonds):
-            return path
+    def depth_limited_search(self, limit):
+        """
+        Search below self.state, making and unmaking moves on it and keeping the placements
+        played in self.path. Returns True once a goal is reached; self.path is then the plan.
+        """
+        kernel, state = self.kernel, self.state
+        board, diamonds = state.board, state.diamonds
+        if kernel.is_goal(diamonds):
+            return True
         if limit == 0:
-            return None
-        for block in self.blocks:
-            moves = self.possible_moves(block)
-            for move in moves:
-                new_board, new_diamonds = self.apply_move(board, diamonds, move, block)
-                new_path = path + [(block, move[0], move[1])]
-                result = self.depth_limited_search(new_board, new_diamonds, limit - 1, new_path)
-                if result is not None:
-                    return result
-        return None
+            return False
+        if kernel.lower_bound(board, diamonds) > limit or kernel.is_dead(board, diamonds):
+            return False
+        state_hash = (board, diamonds)
+        if self.transposition.get(state_hash, -1) >= limit:
+            return False
+        self.nodes_expanded += 1
+        # The frontier of a depth-first search is the current path.
+        self.track_sizes(len(self.path), len(self.transposition))
+        full = limit == 1 and kernel.has_full_line(board)
+        for score, placement in kernel.scored_placements(board, diamonds):
+            if limit == 1 and score == 0 and not full:
+                break  # the last move must clear a diamond line; the rest score 0 too
+            state.make(placement[3])
+            self.path.append(placement)
+            if self.depth_limited_search(limit - 1):
+                return True
+            self.path.pop()
+            state.unmake()
+        if len(self.transposition) < self.max_table_size or state_hash in self.transposition:
+            self.transposition[state_hash] = limit
+        return False
@@ -0,0 +1,89 @@
+"""
+Versioned benchmark corpus: a fixed set of easy/medium/hard boards that every benchmark
+runs on, so timings from different commits are measured on the same puzzles.
+
+A corpus version is never rebuilt in place. To change the boards, bump CORPUS_VERSION,
+add its start seed to CORPUS_SEEDS and build the new file:
+
+    python corpus.py --version 2
+
+Benchmark results record the corpus version and the ids of the boards they ran on.
+"""
+import argparse
+import json
+import os
+
+from level_generator import LevelGenerator, TIERS
+
+CORPUS_VERSION = 1
+
+# Corpus version -> first generator seed. The seeds are far from the ones used for the
+# GUI level pack, so the benchmark boards are not the levels players see.
+CORPUS_SEEDS = {
+    1: 1000000,
+}
+
+CORPUS_TIERS = {name: TIERS[name] for name in ("easy", "medium", "hard")}
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+
+
+def corpus_path(version=CORPUS_VERSION):
+    return os.path.join(CORPUS_DIR, f"corpus_v{version}.json")
+
+
+def build_corpus(version=CORPUS_VERSION, per_tier=5, workers=None):
+    """Generate the boards of a corpus version; the same version always yields the same boards."""
+    generator = LevelGenerator(grid_size=5, piece_set="classic", per_tier=per_tier, tiers=CORPUS_TIERS,
+                               workers=workers, start_seed=CORPUS_SEEDS[version])
+    pack = generator.run()
+    boards = []
+    for tier, levels in pack["tiers"].items():
+        for level in levels:
+            boards.append({
+                "id": f"{tier}-{level['id']}",
+                "tier": tier,
+                "seed": level["seed"],
+                "board": level["board"],
+                "diamonds": level["diamonds"],
+                "optimal_moves": level["moves"],
+            })
+    config = generator.config()
+    config["start_seed"] = CORPUS_SEEDS[version]
+    return {"version": version, "generator": config, "boards": boards}
+
+
+def load_corpus(version=CORPUS_VERSION, path=None):
+    path = path or corpus_path(version)
+    with open(path) as f:
+        corpus = json.load(f)
+    if corpus["version"] != version:
+        raise ValueError(f"{path} holds corpus version {corpus['version']}, expected {version}")
+    return corpus
+
+
+def select_boards(corpus, tiers=None):
+    """The boards of the corpus, optionally restricted to some tiers, in corpus order."""
+    return [entry for entry in corpus["boards"] if tiers is None or entry["tier"] in tiers]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a versioned benchmark corpus.")
+    parser.add_argument("--version", type=int, default=CORPUS_VERSION, choices=sorted(CORPUS_SEEDS))
+    parser.add_argument("--per-tier", type=int, default=5, help="boards per difficulty tier")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="overwrite an existing corpus file")
+    args = parser.parse_args()
+
+    path = corpus_path(args.version)
+    if os.path.exists(path) and not args.force:
+        parser.error(f"{path} already exists; corpus versions are immutable, bump the version instead")
+    corpus = build_corpus(args.version, args.per_tier, args.workers)
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(corpus, f)
+    print(f"Wrote {path}: {len(corpus['boards'])} boards")
+
+
+if __name__ == "__main__":
+    main()
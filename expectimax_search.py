@@ -0,0 +1,147 @@
+import copy
+import random
+
+from algorithms import SearchAlgorithm, PieceDealer
+from kernel import encode, get_kernel, popcount
+
+
+class ExpectimaxSearch(SearchAlgorithm):
+    """
+    Expectimax for the dealt-piece game: the player places the pieces of the current
+    hand one by one (max nodes) and, once the hand is empty, a new hand is dealt
+    (chance node). Chance nodes are approximated by sparse sampling: 'samples' hands
+    are drawn per chance depth and their values averaged.
+
+    The search is capped at 'max_placements' placements and only the 'top_k' most
+    promising placements are expanded at each max node. Values are memoized by
+    (state, remaining hand, placements made), so placing A then B and B then A from
+    the same hand is evaluated once.
+    """
+    WIN_VALUE = 10000
+    LOSS_VALUE = -10000
+
+    def __init__(self, name, board, diamonds, description="Expectimax over dealt hands",
+                 blocks=None, dealer=None, max_placements=3, samples=3, top_k=6, seed=0):
+        super().__init__(name, board, diamonds, description, blocks)
+        self.dealer = dealer if dealer is not None else PieceDealer(self.blocks)
+        self.max_placements = max_placements
+        self.samples = samples
+        self.top_k = top_k
+        self.seed = seed
+        # Reset by every search; created here so evaluate_move works before the first one
+        # (e.g. as the rollout policy of MCTSSearch).
+        self.eval_cache = {}
+        self.value_cache = {}
+
+    def evaluate_move(self, board, diamonds, block, move):
+        """Static value of the move, negated: lower is better, as in GreedySearch.evaluate_move."""
+        new_board, new_diamonds = self.apply_move(board, diamonds, move, block)
+        return -self.evaluate(encode(new_board), encode(new_diamonds))
+
+    def evaluate(self, board, diamonds):
+        """
+        Static value of a kernel state (higher is better): remaining diamonds dominate,
+        free cells break ties since they keep more placements open.
+        """
+        state_hash = (board, diamonds)
+        if state_hash in self.eval_cache:
+            return self.eval_cache[state_hash]
+        remaining = popcount(diamonds)
+        if remaining == 0:
+            value = self.WIN_VALUE
+        else:
+            empty = self.grid_size * self.grid_size - popcount(board)
+            value = -100 * remaining + empty
+        self.eval_cache[state_hash] = value
+        return value
+
+    def get_best_move(self, possible_moves, board, diamonds):
+        """
+        Return the (block, x, y) placement from the current hand (self.hand, or one of
+        each piece in self.blocks when no hand was dealt) with the highest expected value.
+        """
+        board = board.tolist() if hasattr(board, "tolist") else copy.deepcopy(board)
+        diamonds = diamonds.tolist() if hasattr(diamonds, "tolist") else copy.deepcopy(diamonds)
+        self.board = board
+        self.diamonds = diamonds
+        self.grid_size = len(board)
+        self.reset_stats()
+        self.eval_cache = {}
+        self.value_cache = {}
+
+        # Pieces are referred to by their index in self.pieces so hands can be memoized.
+        self.pieces = copy.deepcopy(self.dealer.blocks)
+        hand = self.hand if self.hand is not None else self.blocks
+        root_hand = tuple(sorted(self.piece_index(block) for block in hand))
+
+        # Common random numbers: every chance node of the same round sees the same hands.
+        rng = random.Random(self.seed)
+        max_rounds = self.max_placements // max(1, self.dealer.hand_size) + 1
+        self.sampled_hands = [
+            [tuple(sorted(self.piece_index(block) for block in self.dealer.deal(rng))) for _ in range(self.samples)]
+            for _ in range(max_rounds)
+        ]
+
+        # Kernel placements refer to pieces by the same index.
+        self.kernel = get_kernel(self.grid_size, self.pieces)
+        board, diamonds = encode(board), encode(diamonds)
+
+        best_value, best_move = self.LOSS_VALUE - 1, None
+        for _, piece, move, child_board, child_diamonds in self.ranked_children(board, diamonds, root_hand):
+            remaining_hand = self.remove_piece(root_hand, piece)
+            value = self.max_value(child_board, child_diamonds, remaining_hand, 1, 0)
+            if value > best_value:
+                best_value, best_move = value, (self.pieces[piece], move[0], move[1])
+        return best_move
+
+    def piece_index(self, block):
+        if block not in self.pieces:
+            self.pieces.append(copy.deepcopy(block))
+        return self.pieces.index(block)
+
+    @staticmethod
+    def remove_piece(hand, piece):
+        position = hand.index(piece)
+        return hand[:position] + hand[position + 1:]
+
+    def ranked_children(self, board, diamonds, hand):
+        """
+        Placements of the distinct pieces in 'hand' as (value, piece, move, board, diamonds),
+        best static value first, cut to top_k.
+        """
+        self.nodes_expanded += 1
+        self.track_sizes(0, len(self.value_cache))
+        children = []
+        for (piece, x, y, _), child_board, child_diamonds, _ in self.kernel.children(board, diamonds, set(hand)):
+            if self.kernel.is_dead(child_board, child_diamonds):
+                continue  # can never be won, whatever is dealt
+            children.append((self.evaluate(child_board, child_diamonds), piece, (x, y), child_board, child_diamonds))
+        children.sort(key=lambda child: child[0], reverse=True)
+        return children[:self.top_k]
+
+    def max_value(self, board, diamonds, hand, placements, round_index):
+        """Value of a state where the player still has to place the pieces in 'hand'."""
+        if self.kernel.is_goal(diamonds):
+            return self.WIN_VALUE - placements
+        if not hand:
+            return self.chance_value(board, diamonds, placements, round_index + 1)
+        if placements >= self.max_placements:
+            return self.evaluate(board, diamonds)
+
+        key = ((board, diamonds), hand, placements)
+        if key in self.value_cache:
+            return self.value_cache[key]
+
+        best = self.LOSS_VALUE + placements
+        for _, piece, move, child_board, child_diamonds in self.ranked_children(board, diamonds, hand):
+            value = self.max_value(child_board, child_diamonds, self.remove_piece(hand, piece), placements + 1, round_index)
+            best = max(best, value)
+        self.value_cache[key] = best
+        return best
+
+    def chance_value(self, board, diamonds, placements, round_index):
+        """Average value over the sampled hands that could be dealt next."""
+        if placements >= self.max_placements or round_index > len(self.sampled_hands):
+            return self.evaluate(board, diamonds)
+        hands = self.sampled_hands[round_index - 1]
+        return sum(self.max_value(board, diamonds, hand, placements, round_index) for hand in hands) / len(hands)
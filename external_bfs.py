@@ -0,0 +1,307 @@
+"""
+External-memory breadth-first search, for grids whose BFS frontier and explored set do not
+fit in RAM (8x8 and up).
+
+Each state is packed into one integer key, board bits then diamond bits, stored as fixed
+width rows of uint64 words, most significant first, so sorting the rows sorts the keys.
+Layer d of the search lives on disk as a sorted, duplicate-free file of keys, next to one
+sorted file of every state visited so far. Expanding a layer streams it from a memory map
+and collects the children in a buffer of at most 'memory_mb'; a full buffer is sorted and
+written out as a run. The runs of the next layer are then merged together and against the
+visited file in one streaming pass that writes both the new layer (children never seen
+before) and the new visited file. After each layer a checkpoint is written, so an
+interrupted search resumes from the last complete layer.
+
+When a goal child turns up, the plan is rebuilt backwards: each earlier layer is streamed
+once to find a parent of the current state. Plans have the optimal number of moves.
+
+    python external_bfs.py boards.jsonl --work-dir /data/bfs --memory-mb 512
+"""
+import argparse
+import heapq
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from algorithms import PIECE_SETS
+from blind_search import BFS
+from kernel import encode
+
+# Rows read from a key file at a time.
+READ_CHUNK = 1 << 14
+
+# Rough cost in memory of one key in the children buffer (a Python int in a set).
+BYTES_PER_BUFFERED_KEY = 100
+
+MASK64 = (1 << 64) - 1
+
+
+def pack_keys(keys, words):
+    """(len(keys), words) uint64 rows for sorted integer keys."""
+    shifts = [64 * (words - 1 - i) for i in range(words)]
+    return np.array([[(key >> shift) & MASK64 for shift in shifts] for key in keys], dtype=np.uint64).reshape(-1, words)
+
+
+def iter_keys(path, words, chunk=READ_CHUNK):
+    """Stream the keys of a key file, in file order, through a memory map."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    rows = np.memmap(path, dtype=np.uint64, mode="r").reshape(-1, words)
+    for start in range(0, len(rows), chunk):
+        for row in rows[start:start + chunk].tolist():
+            key = 0
+            for word in row:
+                key = (key << 64) | word
+            yield key
+
+
+class KeyWriter:
+    """Appends keys to a key file in chunks."""
+    def __init__(self, path, words, chunk=READ_CHUNK):
+        self.file = open(path, "wb")
+        self.words = words
+        self.chunk = chunk
+        self.buffer = []
+        self.count = 0
+
+    def add(self, key):
+        self.buffer.append(key)
+        self.count += 1
+        if len(self.buffer) >= self.chunk:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            pack_keys(self.buffer, self.words).tofile(self.file)
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class ExternalBFS(BFS):
+    """
+    BFS with its layers and explored set on disk (see the module docstring). 'work_dir'
+    holds the layer files and the checkpoint; without one a temporary directory is used
+    and removed afterwards. 'memory_mb' bounds the buffer of children kept in memory.
+    After each call self.solution_path holds the plan.
+    """
+    def __init__(self, board, diamonds, name="External-memory BFS", blocks=None, work_dir=None, memory_mb=256):
+        super().__init__(board, diamonds, name, blocks)
+        self.description = "Breadth-first search with its layers and explored set in sorted files on disk."
+        self.work_dir = work_dir
+        self.memory_mb = memory_mb
+        self.solution_path = None
+
+    def get_best_move(self, possible_moves, board, diamonds):
+        """Return the first move of an optimal plan, or None; the plan is left in self.solution_path."""
+        self.grid_size = len(board)
+        self.reset_stats()
+        board = board.tolist() if hasattr(board, "tolist") else board
+        diamonds = diamonds.tolist() if hasattr(diamonds, "tolist") else diamonds
+        blocks = self.available_blocks()
+        work_dir = self.work_dir if self.work_dir is not None else tempfile.mkdtemp(prefix="woodblock-bfs-")
+        os.makedirs(work_dir, exist_ok=True)
+        try:
+            plan = self.search(encode(board), encode(diamonds), blocks, work_dir)
+        finally:
+            if self.work_dir is None:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        self.solution_path = [(blocks[piece], x, y) for piece, x, y in plan] if plan is not None else None
+        return self.solution_path[0] if self.solution_path else None
+
+    def search(self, board, diamonds, blocks, work_dir):
+        """Layered search from the kernel state; returns the plan as (piece, x, y) or None."""
+        kernel = self.kernel_for(blocks)
+        cells = self.grid_size * self.grid_size
+        words = -(-2 * cells // 64)
+        root = (board << cells) | diamonds
+        config = {"grid_size": self.grid_size, "blocks": blocks, "root": str(root)}
+        checkpoint_path = os.path.join(work_dir, "checkpoint.json")
+        buffer_limit = max(1, self.memory_mb * 2 ** 20 // BYTES_PER_BUFFERED_KEY)
+
+        def layer_path(depth):
+            return os.path.join(work_dir, f"layer_{depth}.bin")
+
+        def visited_path(depth):
+            return os.path.join(work_dir, f"visited_{depth}.bin")
+
+        state = None
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                state = json.load(f)
+            if state["config"] != config:
+                raise ValueError(f"Checkpoint {checkpoint_path} was written for a different search")
+        if state is None:
+            if kernel.is_goal(diamonds):
+                return []
+            for path in (layer_path(0), visited_path(0)):
+                writer = KeyWriter(path, words)
+                writer.add(root)
+                writer.close()
+            state = {"config": config, "depth": 0, "layers": [1], "visited": 1, "nodes": 0, "plan": None,
+                     "done": False}
+            self.save_checkpoint(checkpoint_path, state)
+        self.nodes_expanded = state["nodes"]
+        self.track_sizes(max(state["layers"]), state["visited"])
+
+        while not state["done"]:
+            depth = state["depth"]
+            runs, goal = self.expand_layer(kernel, layer_path(depth), cells, words, buffer_limit, work_dir)
+            state["nodes"] = self.nodes_expanded
+            if goal is not None:
+                parent, placement = goal
+                state["plan"] = self.rebuild_plan(kernel, parent, placement, depth, cells, words, layer_path)
+                state["done"] = True
+            else:
+                count, visited = self.merge_layer(runs, visited_path(depth), layer_path(depth + 1),
+                                                  visited_path(depth + 1), words)
+                os.remove(visited_path(depth))
+                state["depth"] = depth + 1
+                state["layers"].append(count)
+                state["visited"] = visited
+                state["done"] = count == 0
+                self.track_sizes(count, visited)
+            for run in runs:
+                os.remove(run)
+            self.save_checkpoint(checkpoint_path, state)
+
+        # The checkpoint keeps the answer; the layer files are no longer needed.
+        for name in os.listdir(work_dir):
+            if name.endswith(".bin"):
+                os.remove(os.path.join(work_dir, name))
+        return [tuple(step) for step in state["plan"]] if state["plan"] is not None else None
+
+    def expand_layer(self, kernel, path, cells, words, buffer_limit, work_dir):
+        """
+        Expand every state of a layer file, writing its live children as sorted runs.
+        Returns (run paths, None), or ([], (parent key, placement)) at the first goal child.
+        """
+        low = (1 << cells) - 1
+        runs = []
+        buffer = set()
+        for key in iter_keys(path, words):
+            board, diamonds = key >> cells, key & low
+            self.nodes_expanded += 1
+            for (piece, x, y, _), child_board, child_diamonds, _ in kernel.iter_children(board, diamonds):
+                if kernel.is_goal(child_diamonds):
+                    for run in runs:
+                        os.remove(run)
+                    return [], (key, (piece, x, y))
+                if kernel.is_dead(child_board, child_diamonds):
+                    continue
+                buffer.add((child_board << cells) | child_diamonds)
+                if len(buffer) >= buffer_limit:
+                    runs.append(self.write_run(buffer, words, work_dir, len(runs)))
+                    buffer = set()
+        if buffer:
+            runs.append(self.write_run(buffer, words, work_dir, len(runs)))
+        return runs, None
+
+    @staticmethod
+    def write_run(keys, words, work_dir, index):
+        path = os.path.join(work_dir, f"run_{index}.bin")
+        writer = KeyWriter(path, words)
+        for key in sorted(keys):
+            writer.add(key)
+        writer.close()
+        return path
+
+    @staticmethod
+    def merge_layer(runs, visited_path, layer_path, new_visited_path, words):
+        """
+        Merge the sorted runs of the next layer and drop the keys already in the visited
+        file; writes the new layer and the new visited file in the same pass.
+        Returns (states in the new layer, states visited).
+        """
+        layer = KeyWriter(layer_path, words)
+        visited = KeyWriter(new_visited_path, words)
+        old = iter_keys(visited_path, words)
+        next_old = next(old, None)
+        last = None
+        for key in heapq.merge(*(iter_keys(run, words) for run in runs)):
+            if key == last:
+                continue
+            last = key
+            while next_old is not None and next_old < key:
+                visited.add(next_old)
+                next_old = next(old, None)
+            if next_old == key:
+                continue
+            layer.add(key)
+            visited.add(key)
+        while next_old is not None:
+            visited.add(next_old)
+            next_old = next(old, None)
+        layer.close()
+        visited.close()
+        return layer.count, visited.count
+
+    @staticmethod
+    def rebuild_plan(kernel, parent, placement, depth, cells, words, layer_path):
+        """Walk back from the goal's parent in layer 'depth' to the root, one layer file per step."""
+        low = (1 << cells) - 1
+        plan = [placement]
+        target = parent
+        for earlier in range(depth - 1, -1, -1):
+            target_state = (target >> cells, target & low)
+            for key in iter_keys(layer_path(earlier), words):
+                step = next(((piece, x, y) for (piece, x, y, _), child_board, child_diamonds, _
+                             in kernel.iter_children(key >> cells, key & low)
+                             if (child_board, child_diamonds) == target_state), None)
+                if step is not None:
+                    plan.append(step)
+                    target = key
+                    break
+            else:
+                raise RuntimeError(f"No parent found in layer {earlier}: the layer files are inconsistent")
+        return list(reversed(plan))
+
+    @staticmethod
+    def save_checkpoint(path, state):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+
+def main():
+    from batch_solve import read_boards
+
+    parser = argparse.ArgumentParser(description="Solve boards optimally with a disk-backed BFS.")
+    parser.add_argument("input", help="JSON Lines file ('-' for stdin) or .npy stack of shape (N, 2, grid, grid)")
+    parser.add_argument("--piece-set", default="classic", choices=list(PIECE_SETS.keys()))
+    parser.add_argument("--work-dir", required=True, help="layer files and one checkpoint per board go here")
+    parser.add_argument("--memory-mb", type=int, default=256, help="memory for the children buffer")
+    parser.add_argument("--output", default="-", help="output JSON Lines file (default: stdout)")
+    args = parser.parse_args()
+
+    blocks = PIECE_SETS[args.piece_set]
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for board_id, board, diamonds in read_boards(args.input):
+            searcher = ExternalBFS(board, diamonds, blocks=blocks, memory_mb=args.memory_mb,
+                                   work_dir=os.path.join(args.work_dir, str(board_id)))
+            start = time.perf_counter()
+            searcher.get_best_move(None, board, diamonds)
+            plan = searcher.solution_path
+            out.write(json.dumps({"id": board_id, "solved": plan is not None,
+                                  "moves": len(plan) if plan is not None else 0,
+                                  "plan": [list(step) for step in plan] if plan is not None else [],
+                                  "nodes": searcher.nodes_expanded, "peak_frontier": searcher.peak_frontier,
+                                  "peak_closed": searcher.peak_closed,
+                                  "time": time.perf_counter() - start}) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
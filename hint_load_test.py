@@ -0,0 +1,115 @@
+"""
+Load test for hint_server.py: concurrent clients send hint requests for corpus boards
+(each board also sent mirrored, so symmetric states hit the same cache entry) and the
+script reports throughput and p50/p99 latency.
+
+    python hint_load_test.py --start-server --clients 16 --requests 400
+    python hint_load_test.py --url http://127.0.0.1:8765 --algorithm BFS
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from corpus import load_corpus
+from hint_server import HintService, make_server
+from solver import ALGORITHMS
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def post_hint(url, payload, timeout):
+    request = urllib.request.Request(url + "/hint", data=json.dumps(payload).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def make_payloads(algorithms, count, want_plan, seed=0):
+    """'count' requests over the corpus boards, in random order, half of them mirrored."""
+    rng = random.Random(seed)
+    boards = load_corpus()["boards"]
+    payloads = []
+    for _ in range(count):
+        entry = rng.choice(boards)
+        board, diamonds = entry["board"], entry["diamonds"]
+        if rng.random() < 0.5:
+            board, diamonds = [row[::-1] for row in board], [row[::-1] for row in diamonds]
+        payloads.append({"board": board, "diamonds": diamonds, "algorithm": rng.choice(algorithms),
+                         "plan": want_plan})
+    return payloads
+
+
+def run_load_test(url, payloads, clients, timeout=60.0):
+    latencies, errors, flags = [], [], {"cached": 0, "coalesced": 0}
+    lock = threading.Lock()
+
+    def send(payload):
+        start = time.perf_counter()
+        try:
+            response = post_hint(url, payload, timeout)
+        except (urllib.error.URLError, OSError) as e:
+            with lock:
+                errors.append(str(e))
+            return
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            for flag in flags:
+                flags[flag] += bool(response.get(flag))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(send, payloads))
+    wall = time.perf_counter() - start
+    return latencies, errors, flags, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the hint server and report latency percentiles.")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--start-server", action="store_true", help="start a server on a free localhost port")
+    parser.add_argument("--workers", type=int, default=None, help="server workers (with --start-server)")
+    parser.add_argument("--algorithm", nargs="+", default=["A*", "Greedy", "Iterative Deepening"],
+                        choices=list(ALGORITHMS.keys()))
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--plan", action="store_true", help="ask for whole plans instead of single moves")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = service = None
+    url = args.url
+    if args.start_server:
+        service = HintService(workers=args.workers)
+        server = make_server("127.0.0.1", 0, service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        payloads = make_payloads(args.algorithm, args.requests, args.plan, args.seed)
+        latencies, errors, flags, wall = run_load_test(url, payloads, args.clients)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            service.shutdown()
+
+    print(f"{len(latencies)} ok, {len(errors)} errors in {wall:.2f}s ({len(latencies) / wall:.1f} req/s)")
+    if latencies:
+        print(f"p50 {percentile(latencies, 0.50) * 1000:.1f} ms   p99 {percentile(latencies, 0.99) * 1000:.1f} ms"
+              f"   max {max(latencies) * 1000:.1f} ms")
+        print(f"cache hits {flags['cached']}, coalesced {flags['coalesced']}")
+    for error in errors[:5]:
+        print("error:", error)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Local hint service: serves best moves (or whole plans) over HTTP/JSON so front-ends other
+than the Tk window can ask for hints.
+
+    python hint_server.py --port 8765 --workers 4
+
+    POST /hint  {"board": [[...]], "diamonds": [[...]], "algorithm": "A*",
+                 "piece_set": "classic", "hand": null, "plan": false}
+    ->          {"move": [block, x, y], "plan": [...], "solved": true, "nodes": 42,
+                 "cached": false, "coalesced": false, "time": 0.01}
+    GET  /stats cache and request counters
+
+Searches run in a process pool. Results are kept in an LRU cache keyed by the canonical
+form of the state, so boards equal up to a symmetry share one entry (the move is mapped
+back onto the board that was asked about). Identical requests arriving while the first one
+is still being solved wait for its result instead of starting a second search, and each
+algorithm has its own limit on concurrent searches.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from algorithms import PIECE_SETS, SYMMETRIES, piece_set_symmetries
+from solver import ALGORITHMS, first_legal_move, make_algorithm, solve_board
+
+# Concurrent searches per algorithm; the slow or time-budgeted ones get fewer slots
+# so they cannot starve the others. Algorithms not listed may use every worker.
+DEFAULT_CONCURRENCY = {"BFS": 2, "UCS": 2, "MCTS": 1, "ARA*": 1, "Expectimax": 2}
+
+
+def as_tuple(grid):
+    return tuple(tuple(row) for row in grid)
+
+
+def inverse_transform(transform, grid_size):
+    """The symmetry that undoes 'transform' on grid_size x grid_size grids."""
+    probe = [[i * grid_size + j for j in range(grid_size)] for i in range(grid_size)]
+    for candidate in SYMMETRIES:
+        if candidate(transform(probe)) == probe:
+            return candidate
+    raise ValueError("transform has no inverse among the board symmetries")
+
+
+def keeps_rows(transform, grid_size):
+    """True if 'transform' maps rows to rows (no rotation by 90 degrees or transposition)."""
+    probe = [[i] * grid_size for i in range(grid_size)]
+    return all(len(set(row)) == 1 for row in transform(probe))
+
+
+def canonicalize(board, diamonds, blocks, hand=None):
+    """
+    Canonical form of a request: the symmetry of the piece set giving the smallest
+    (board, diamonds), the transformed state and hand, and the inverse symmetry.
+
+    Only symmetries keeping rows as rows are used: apply_move clears full rows before
+    checking columns, so a transposed board can play out differently and its plan
+    could not be mapped back.
+    """
+    best = None
+    transforms = [transform for transform in piece_set_symmetries(blocks) if keeps_rows(transform, len(board))]
+    for transform in transforms:
+        state = (as_tuple(transform(board)), as_tuple(transform(diamonds)))
+        if best is None or state < best[0]:
+            best = (state, transform)
+    state, transform = best
+    canonical_hand = None
+    if hand is not None:
+        canonical_hand = sorted(as_tuple(transform(block)) for block in hand)
+    return state, canonical_hand, inverse_transform(transform, len(board))
+
+
+def unmap_move(move, inverse, grid_size):
+    """Map a [block, x, y] placement on the canonical board back onto the original board."""
+    block, x, y = move
+    mask = [[0] * grid_size for _ in range(grid_size)]
+    for i, row in enumerate(block):
+        for j, cell in enumerate(row):
+            if cell == 1:
+                mask[x + i][y + j] = 1
+    mask = inverse(mask)
+    rows = [i for i in range(grid_size) if any(mask[i])]
+    cols = [j for j in range(grid_size) if any(mask[i][j] for i in range(grid_size))]
+    original = [mask[i][cols[0]:cols[-1] + 1] for i in range(rows[0], rows[-1] + 1)]
+    return [original, rows[0], cols[0]]
+
+
+def compute_hint(name, board, diamonds, blocks, hand=None, want_plan=False, max_moves=100):
+    """Run in a pool worker: the best move, or the whole plan, for one state."""
+    if want_plan and hand is None:
+        result = solve_board(name, board, diamonds, blocks=blocks, max_moves=max_moves)
+        plan = result["plan"]
+        return {"move": plan[0] if plan else None, "plan": plan, "solved": result["solved"],
+                "nodes": result["nodes"]}
+    search_algo = make_algorithm(name, board, diamonds, blocks=blocks)
+    search_algo.set_hand(hand)
+    move = None if search_algo.is_unsolvable(board, diamonds) else search_algo.get_best_move(None, board, diamonds)
+    if move is None and hand is not None:
+        # As in WoodBlockAI.best_move: with a dealt hand, any piece that fits must be placed.
+        move = first_legal_move(search_algo, board, hand)
+    return {"move": list(move) if move is not None else None, "plan": None, "solved": None,
+            "nodes": search_algo.nodes_expanded}
+
+
+class LRUCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        if key not in self.entries:
+            return None
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+class HintService:
+    """Cache, request coalescing and per-algorithm limits in front of a process pool."""
+    def __init__(self, workers=None, cache_size=10000, concurrency=None, max_moves=100):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.cache = LRUCache(cache_size)
+        self.max_moves = max_moves
+        limits = dict(DEFAULT_CONCURRENCY, **(concurrency or {}))
+        self.limits = {name: threading.BoundedSemaphore(min(limits.get(name, self.workers), self.workers))
+                       for name in ALGORITHMS}
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    def hint(self, name, board, diamonds, blocks, hand=None, want_plan=False):
+        """Return the hint dict for a state, from the cache, an in-flight search or a new one."""
+        if name not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm {name!r}")
+        start = time.perf_counter()
+        state, canonical_hand, inverse = canonicalize(board, diamonds, blocks, hand)
+        want_plan = want_plan and hand is None
+        key = (name, state, as_tuple(as_tuple(block) for block in blocks),
+               None if canonical_hand is None else tuple(canonical_hand), want_plan)
+
+        with self.lock:
+            self.stats["requests"] += 1
+            cached = self.cache.get(key)
+            future = self.in_flight.get(key) if cached is None else None
+            owner = cached is None and future is None
+            if cached is not None:
+                self.stats["hits"] += 1
+            elif future is not None:
+                self.stats["coalesced"] += 1
+            else:
+                self.stats["misses"] += 1
+                future = Future()
+                self.in_flight[key] = future
+
+        if owner:
+            try:
+                canonical_board = [list(row) for row in state[0]]
+                canonical_diamonds = [list(row) for row in state[1]]
+                hand_lists = None if canonical_hand is None else [[list(row) for row in block] for block in canonical_hand]
+                with self.limits[name]:
+                    result = self.pool.submit(compute_hint, name, canonical_board, canonical_diamonds, blocks,
+                                              hand_lists, want_plan, self.max_moves).result()
+                with self.lock:
+                    self.cache.put(key, result)
+                future.set_result(result)
+            except Exception as e:
+                with self.lock:
+                    self.stats["errors"] += 1
+                future.set_exception(e)
+            finally:
+                with self.lock:
+                    del self.in_flight[key]
+        result = cached if cached is not None else future.result()
+
+        grid_size = len(board)
+        response = {
+            "move": unmap_move(result["move"], inverse, grid_size) if result["move"] is not None else None,
+            "plan": [unmap_move(move, inverse, grid_size) for move in result["plan"]] if result["plan"] is not None else None,
+            "solved": result["solved"],
+            "nodes": result["nodes"],
+            "cached": cached is not None,
+            "coalesced": not owner and cached is None,
+            "time": time.perf_counter() - start,
+        }
+        return response
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats, cache_size=len(self.cache.entries), in_flight=len(self.in_flight))
+
+    def shutdown(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def parse_request(payload):
+    """Validate a /hint payload and return (name, board, diamonds, blocks, hand, plan)."""
+    board, diamonds = payload.get("board"), payload.get("diamonds")
+    if not board or not diamonds or len(board) != len(diamonds) or any(len(row) != len(board) for row in board + diamonds):
+        raise ValueError("'board' and 'diamonds' must be square grids of the same size")
+    if "blocks" in payload:
+        blocks = payload["blocks"]
+    else:
+        piece_set = payload.get("piece_set", "classic")
+        if piece_set not in PIECE_SETS:
+            raise ValueError(f"Unknown piece set {piece_set!r}")
+        blocks = PIECE_SETS[piece_set]
+    return (payload.get("algorithm", "A*"), board, diamonds, blocks, payload.get("hand"),
+            bool(payload.get("plan", False)))
+
+
+class HintHandler(BaseHTTPRequestHandler):
+    service = None  # set by make_server
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_json(200, self.service.snapshot())
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/hint":
+            self.send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = parse_request(json.loads(self.rfile.read(length)))
+        except (ValueError, TypeError, AttributeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        try:
+            self.send_json(200, self.service.hint(*request))
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        pass  # one line per request is too noisy under load
+
+
+def make_server(host="127.0.0.1", port=8765, service=None):
+    handler = type("BoundHintHandler", (HintHandler,), {"service": service or HintService()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve best moves over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    parser.add_argument("--limit", nargs=2, action="append", metavar=("ALGORITHM", "N"), default=[],
+                        help="max concurrent searches for an algorithm (repeatable)")
+    args = parser.parse_args()
+
+    service = HintService(args.workers, args.cache_size, {name: int(n) for name, n in args.limit})
+    server = make_server(args.host, args.port, service)
+    print(f"Serving hints on http://{args.host}:{server.server_port}/hint")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import copy
 import heapq
+import time
 from abc import ABC, abstractmethod
 from algorithms import SearchAlgorithm
+from kernel import encode, popcount
 import numpy as np
 
 
@@ -17,56 +19,68 @@ class GreedySearch(SearchAlgorithm):
         Here, we use a simple heuristic: the number of remaining diamonds.
         Lower values are better.
         """
-        new_board, new_diamonds = self.apply_move(board, diamonds, move, block)
-        # Heuristic: count remaining diamonds.
-        h = sum(sum(row) for row in new_diamonds)
-        return h
+        return self.diamonds_after(board, diamonds, move, block)
+
+    def heuristic(self, diamonds):
+        """Heuristic on kernel state: number of remaining diamonds."""
+        return popcount(diamonds)
 
     def get_best_move(self, possible_moves, board, diamonds):
         """
         Perform a Greedy Best-First Search over the state space starting from the given board
-        and diamond configuration. The algorithm considers all three block pieces.
+        and diamond configuration. The algorithm considers every piece in self.blocks.
         It returns the best move as a tuple (block, x, y) corresponding to the first move
         (from the initial state) that leads to a goal state (i.e., no diamonds remain), based
-        on the heuristic value.
+        on the heuristic value. Children are goal-tested as they are generated.
         """
         self.board = copy.deepcopy(board)
         self.diamonds = copy.deepcopy(diamonds)
         self.grid_size = len(board)
+        self.reset_stats()
+        blocks = self.available_blocks()
+        kernel = self.kernel_for(blocks)
         
 
         node_counter = 0
-        initial_state = (self.evaluate_move(board, diamonds, self.blocks[0], (0,0)),
+        root = (encode(board), encode(diamonds))
+        h_root = self.heuristic(root[1]) if self.model is None else self.model.estimate([root], self.grid_size)[0]
+        initial_state = (h_root,
                          node_counter,
-                         copy.deepcopy(board),
-                         copy.deepcopy(diamonds),
+                         root[0],
+                         root[1],
                          None)
         node_counter += 1
         frontier = []
         heapq.heappush(frontier, initial_state)
-        explored = set()
+        explored = self.visited_set()
         
         while frontier:
             h, _, current_board, current_diamonds, first_move = heapq.heappop(frontier)
-            if self.is_goal(current_diamonds):
+            if kernel.is_goal(current_diamonds):
                 return first_move if first_move is not None else None
 
-            state_hash = self.hash_state(current_board, current_diamonds)
+            state_hash = (current_board, current_diamonds)
             if state_hash in explored:
                 continue
             explored.add(state_hash)
+            self.nodes_expanded += 1
+            self.track_sizes(len(frontier), len(explored))
             
-            # Update self.board for generating moves.
-            self.board = current_board
-            
-            for block in self.blocks:
-                moves = self.possible_moves(block)
-                for move in moves:
-                    new_board, new_diamonds = self.apply_move(current_board, current_diamonds, move, block)
-                    new_h = self.evaluate_move(current_board, current_diamonds, block, move)
-                    next_first_move = first_move if first_move is not None else (block, move[0], move[1])
-                    heapq.heappush(frontier, (new_h, node_counter, new_board, new_diamonds, next_first_move))
-                    node_counter += 1
+            successors = self.successors(current_board, current_diamonds, kernel, blocks)
+            if self.model is not None:
+                # Goal-test every child, then score them all in one batched call.
+                successors = list(successors)
+                goal = next((move for move, (_, new_diamonds), _ in successors if kernel.is_goal(new_diamonds)), None)
+                if goal is not None:
+                    return first_move if first_move is not None else goal
+                estimates = self.model.estimate([state for _, state, _ in successors], self.grid_size).tolist()
+            for index, (move, (new_board, new_diamonds), removed) in enumerate(successors):
+                new_h = h - removed if self.model is None else estimates[index]
+                next_first_move = first_move if first_move is not None else move
+                if kernel.is_goal(new_diamonds):
+                    return next_first_move
+                heapq.heappush(frontier, (new_h, node_counter, new_board, new_diamonds, next_first_move))
+                node_counter += 1
         return None
 
 
@@ -79,68 +93,69 @@ class AStarSearch(SearchAlgorithm):
     - h(n): heuristic (e.g., number of remaining diamonds)
     """
     def evaluate_move(self, board, diamonds, block, move):
-        new_board, new_diamonds = self.apply_move(board, diamonds, move, block)
         # Simple heuristic: count the number of remaining diamonds.
-        return sum(sum(row) for row in new_diamonds)
+        return self.diamonds_after(board, diamonds, move, block)
     
     def heuristic(self, diamonds):
-        """Heuristic: number of remaining diamonds."""
-        return sum(sum(row) for row in diamonds)
+        """Heuristic: number of remaining diamonds (kernel state)."""
+        return popcount(diamonds)
     
     def get_best_move(self, possible_moves, board, diamonds):
         """
         Perform an A* search over the state space starting from the given board
-        and diamond configuration. The algorithm considers all three block pieces:
-        - Horizontal block of 3: [[1, 1, 1]]
-        - Vertical block of 3:   [[1], [1], [1]]
-        - Square block of 2x2:    [[1, 1], [1, 1]]
+        and diamond configuration. The algorithm considers every piece in self.blocks
+        (by default horizontal 3, vertical 3 and square 2x2).
         Returns the best move as a tuple (block, x, y) corresponding to the first move
         that leads to a goal state (i.e., no diamonds remain).
         """
         self.board = copy.deepcopy(board)
         self.diamonds = copy.deepcopy(diamonds)
         self.grid_size = len(board)
+        self.reset_stats()
+        blocks = self.available_blocks()
+        kernel = self.kernel_for(blocks)
     
         
-        start_board = copy.deepcopy(board)
-        start_diamonds = copy.deepcopy(diamonds)
+        start_board = encode(board)
+        start_diamonds = encode(diamonds)
         g_start = 0
         h_start = self.heuristic(start_diamonds)
         f_start = g_start + h_start
         
 
+        # Entries are (f, g, insertion counter, state, path): the counter breaks ties
+        # so states and paths are never compared.
         open_heap = []
-        start_hash = self.hash_state(start_board, start_diamonds)
-        heapq.heappush(open_heap, (f_start, g_start, start_hash, start_board, start_diamonds, []))
+        start_hash = (start_board, start_diamonds)
+        heapq.heappush(open_heap, (f_start, g_start, 0, start_hash, []))
         
-        closed_set = set()
-        node_counter = 0  
+        closed_set = self.visited_set()
+        node_counter = 1  
         
         while open_heap:
-            f, g, state_hash, current_board, current_diamonds, path = heapq.heappop(open_heap)
+            f, g, _, state_hash, path = heapq.heappop(open_heap)
+            current_board, current_diamonds = state_hash
             
-            if self.is_goal(current_diamonds):
+            if kernel.is_goal(current_diamonds):
                 return path[0] if path else None
             
             if state_hash in closed_set:
                 continue
             closed_set.add(state_hash)
+            self.nodes_expanded += 1
+            self.track_sizes(len(open_heap), len(closed_set))
             
-            self.board = current_board 
-            
-            for block in self.blocks:
-                moves = self.possible_moves(block)
-                for move in moves:
-                    new_board, new_diamonds = self.apply_move(current_board, current_diamonds, move, block)
-                    new_state_hash = self.hash_state(new_board, new_diamonds)
-                    if new_state_hash in closed_set:
-                        continue
-                    g_new = g + 1
-                    h_new = self.heuristic(new_diamonds)
-                    f_new = g_new + h_new
-                    new_path = path + [(block, move[0], move[1])]
-                    heapq.heappush(open_heap, (f_new, g_new, node_counter, new_board, new_diamonds, new_path))
-                    node_counter += 1
+            h = f - g
+            for (piece, x, y, _), new_board, new_diamonds, removed in kernel.children(current_board, current_diamonds):
+                new_state_hash = (new_board, new_diamonds)
+                if new_state_hash in closed_set or kernel.is_dead(new_board, new_diamonds):
+                    continue
+                g_new = g + 1
+                h_new = h - removed
+                f_new = g_new + h_new
+                new_path = path + [(blocks[piece], x, y)]
+                heapq.heappush(open_heap, (f_new, g_new, node_counter, new_state_hash, new_path))
+                node_counter += 1
 
         
         return None
@@ -152,9 +167,11 @@ class WeightedAStarSearch(SearchAlgorithm):
     """
     Weighted A*: f(n) = g(n) + w * h(n)
     Favours states with a lower heuristic value when w > 1.
+    With a learned heuristic (set_model), h is its estimate, computed for all the
+    children of an expansion in one batched call.
     """
-    def __init__(self, name, board, diamonds, description="Weighted A*",w = 1.5):
-        super().__init__(name, board, diamonds, description)
+    def __init__(self, name, board, diamonds, description="Weighted A*",w = 1.5, blocks=None):
+        super().__init__(name, board, diamonds, description, blocks)
         self.w = w  # Weight for the heuristic
 
     def evaluate_move(self, board, diamonds, block, move):
@@ -163,56 +180,333 @@ class WeightedAStarSearch(SearchAlgorithm):
 
     def heuristic(self, diamonds):
         """
-        Heuristic: number of remaining diamonds.
+        Heuristic: number of remaining diamonds (kernel state).
         """
-        return sum(sum(row) for row in diamonds)
+        return popcount(diamonds)
 
     def get_best_move(self, possible_moves, board, diamonds):
         """
         Perform a Weighted A* search over the state space starting from the given board
-        and diamond configuration. The search considers all three block pieces.
+        and diamond configuration. The search considers every piece in self.blocks.
         Returns the best move as a tuple (block, x, y) corresponding to the first move
         in the plan that leads to a goal state (i.e. no diamonds remain).
         """
         self.board = copy.deepcopy(board)
         self.diamonds = copy.deepcopy(diamonds)
         self.grid_size = len(board)
+        self.reset_stats()
+        blocks = self.available_blocks()
+        kernel = self.kernel_for(blocks)
         
-        start_board = copy.deepcopy(board)
-        start_diamonds = copy.deepcopy(diamonds)
+        start_board = encode(board)
+        start_diamonds = encode(diamonds)
         g_start = 0
-        h_start = self.heuristic(start_diamonds)
+        start_state_hash = (start_board, start_diamonds)
+        if self.model is None:
+            h_start = self.heuristic(start_diamonds)
+        else:
+            h_start = self.model.estimate([start_state_hash], self.grid_size)[0]
         f_start = g_start + self.w * h_start
-        start_state_hash = self.hash_state(start_board, start_diamonds)
         
         
+        # The state's heuristic rides at the end of the entry, so children get theirs by delta.
         open_heap = []
-        heapq.heappush(open_heap, (f_start, g_start, start_state_hash, (start_board, start_diamonds), []))
-        closed_set = set()
+        heapq.heappush(open_heap, (f_start, g_start, start_state_hash, [], h_start))
+        closed_set = self.visited_set()
         
         while open_heap:
-            f, g, state_hash, (current_board, current_diamonds), path = heapq.heappop(open_heap)
+            f, g, state_hash, path, h = heapq.heappop(open_heap)
+            current_board, current_diamonds = state_hash
             
-            if self.is_goal(current_diamonds):
+            if kernel.is_goal(current_diamonds):
                 return path[0] if path else None
             
             if state_hash in closed_set:
                 continue
             closed_set.add(state_hash)
+            self.nodes_expanded += 1
+            self.track_sizes(len(open_heap), len(closed_set))
             
-            self.board = current_board  
-            for block in self.blocks:
-                pmoves = self.possible_moves(block)
-                for move in pmoves:
-                    new_board, new_diamonds = self.apply_move(current_board, current_diamonds, move, block)
-                    new_state_hash = self.hash_state(new_board, new_diamonds)
-                    if new_state_hash in closed_set:
-                        continue
-                    
-                    g_new = g + 1
-                    h_new = self.heuristic(new_diamonds)
-                    f_new = g_new + self.w * h_new
-                    new_path = path + [(block, move[0], move[1])]
-                    heapq.heappush(open_heap, (f_new, g_new, new_state_hash, (new_board, new_diamonds), new_path))
+            children = [child for child in kernel.children(current_board, current_diamonds)
+                        if (child[1], child[2]) not in closed_set and not kernel.is_dead(child[1], child[2])]
+            if self.model is not None:
+                # One batched call scores every child of the expansion.
+                estimates = self.model.estimate([(child[1], child[2]) for child in children], self.grid_size).tolist()
+            for index, ((piece, x, y, _), new_board, new_diamonds, removed) in enumerate(children):
+                new_state_hash = (new_board, new_diamonds)
+                g_new = g + 1
+                h_new = h - removed if self.model is None else estimates[index]
+                f_new = g_new + self.w * h_new
+                new_path = path + [(blocks[piece], x, y)]
+                heapq.heappush(open_heap, (f_new, g_new, new_state_hash, new_path, h_new))
         
         return None
+
+
+class AnytimeWeightedAStarSearch(WeightedAStarSearch):
+    """
+    Anytime Repairing A* (ARA*): runs Weighted A* with a high weight to get a first
+    plan quickly, then keeps lowering w and repairing the search, reusing the g-values,
+    open list and the inconsistent states found so far, until w reaches 'w_final'
+    or the time budget runs out.
+
+    The heuristic is the admissible lower_bound (the diamond count can overestimate,
+    since one move may clear several diamonds), so w = 1 yields an optimal plan;
+    the diamond count only breaks ties. That heuristic is weak, so the search is
+    seeded with the plan of a narrow BeamSearch ('beam_width', 0 to disable) and
+    ARA* then only has to improve on it.
+    After each call, self.solution_path holds the current plan and
+    self.suboptimality_bound an upper bound on cost(plan) / cost(optimal plan).
+    """
+    def __init__(self, name, board, diamonds, description="Anytime Repairing A*", w=3.0, w_final=1.0,
+                 w_step=0.5, time_limit=1.0, beam_width=10, blocks=None):
+        super().__init__(name, board, diamonds, description, w, blocks)
+        self.beam_width = beam_width
+        self.w_start = w
+        self.w_final = w_final
+        self.w_step = w_step
+        self.time_limit = time_limit
+        self.solution_path = None
+        self.suboptimality_bound = float("inf")
+        self.history = []
+
+    def get_best_move(self, possible_moves, board, diamonds):
+        """
+        Return the first move (block, x, y) of the best plan found within the time budget.
+        If the beam seed found no plan, the first pass runs until it finds one;
+        otherwise every pass stops at the deadline.
+        """
+        deadline = time.perf_counter() + self.time_limit
+        start_time = time.perf_counter()
+        self.board = copy.deepcopy(board)
+        self.diamonds = copy.deepcopy(diamonds)
+        self.grid_size = len(board)
+        self.reset_stats()
+        self.solution_path = None
+        self.suboptimality_bound = float("inf")
+        self.history = []
+        # (cost, plan) of the beam seed, until the search finds a goal at most as deep.
+        self.incumbent = None
+
+        # States are kernel (board, diamonds) ints, which are their own hash keys.
+        self.search_blocks = self.available_blocks()
+        self.kernel = self.kernel_for(self.search_blocks)
+        start_hash = (encode(board), encode(diamonds))
+        self.g = {start_hash: 0}
+        self.parent = {start_hash: None}
+        self.h = {}
+        # Diamonds left per state, kept up to date by the children's deltas; breaks ties on f.
+        self.diamonds_left = {start_hash: self.heuristic(start_hash[1])}
+        self.goal_hash = start_hash if self.is_goal(diamonds) else None
+        self.open_f = {}
+        self.open_heap = []
+        self.closed_set = self.visited_set()
+        self.incons = set()
+        self.counter = 0
+
+        if self.beam_width and self.goal_hash is None:
+            self.seed_with_beam(board, diamonds)
+
+        self.w = self.w_start
+        self.push_open(start_hash)
+        # Without an incumbent plan the first pass must run to completion.
+        has_plan = self.goal_hash is not None or self.incumbent is not None
+        completed = self.improve_path(deadline if has_plan else None)
+        self.publish(start_time, completed)
+        if not completed:
+            return self.solution_path[0] if self.solution_path else None
+        while self.w > self.w_final and time.perf_counter() < deadline:
+            self.w = max(self.w_final, self.w - self.w_step)
+            # Move the inconsistent states back to OPEN and re-key OPEN with the new weight.
+            pending = set(self.open_f) | self.incons
+            self.incons = set()
+            self.open_f = {}
+            self.open_heap = []
+            for state_hash in pending:
+                self.push_open(state_hash)
+            self.closed_set = self.visited_set()
+            completed = self.improve_path(deadline)
+            self.publish(start_time, completed)
+            if not completed:
+                break
+
+        return self.solution_path[0] if self.solution_path else None
+
+    def seed_with_beam(self, board, diamonds):
+        """
+        Use a beam search plan as the initial incumbent solution. Only its cost and its
+        moves are kept: the states along it get no g or parent, so the search still
+        expands them and whatever lies below.
+        """
+        beam = BeamSearch("ARA* seed", board, diamonds, width=self.beam_width, blocks=self.blocks)
+        beam.hand = self.hand
+        beam.get_best_move(None, board, diamonds)
+        self.nodes_expanded += beam.nodes_expanded
+        self.track_sizes(beam.peak_frontier, beam.peak_closed)
+        if beam.solution_path:
+            self.incumbent = (len(beam.solution_path), list(beam.solution_path))
+
+    def heuristic_of(self, state_hash):
+        if state_hash not in self.h:
+            self.h[state_hash] = self.kernel.lower_bound(*state_hash)
+        return self.h[state_hash]
+
+    def f_value(self, state_hash):
+        return self.g[state_hash] + self.w * self.heuristic_of(state_hash)
+
+    def push_open(self, state_hash):
+        f = self.f_value(state_hash)
+        self.open_f[state_hash] = f
+        # Ties on f go to the state with fewer diamonds left, which is usually closer to a goal.
+        tie_break = self.diamonds_left[state_hash]
+        heapq.heappush(self.open_heap, (f, tie_break, self.counter, state_hash))
+        self.counter += 1
+
+    def goal_cost(self):
+        cost = self.g[self.goal_hash] if self.goal_hash is not None else float("inf")
+        return min(cost, self.incumbent[0]) if self.incumbent is not None else cost
+
+    def improve_path(self, deadline):
+        """
+        Expand states while the incumbent plan can still be improved at the current weight.
+        Returns False if the deadline interrupted the repair.
+        """
+        while self.open_heap:
+            f, _, _, state_hash = self.open_heap[0]
+            if self.open_f.get(state_hash) != f:
+                heapq.heappop(self.open_heap)  # stale entry
+                continue
+            if self.goal_cost() <= f:
+                return True
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            heapq.heappop(self.open_heap)
+            del self.open_f[state_hash]
+            self.closed_set.add(state_hash)
+            self.nodes_expanded += 1
+            self.track_sizes(len(self.open_f), len(self.closed_set))
+
+            g_new = self.g[state_hash] + 1
+            left = self.diamonds_left[state_hash]
+            for (piece, x, y, _), new_board, new_diamonds, removed in self.kernel.children(*state_hash):
+                new_hash = (new_board, new_diamonds)
+                if g_new >= self.g.get(new_hash, float("inf")) or self.kernel.is_dead(new_board, new_diamonds):
+                    continue
+                self.g[new_hash] = g_new
+                self.diamonds_left[new_hash] = left - removed
+                self.parent[new_hash] = (state_hash, (self.search_blocks[piece], x, y))
+                if self.kernel.is_goal(new_diamonds):
+                    if g_new < self.goal_cost():
+                        self.goal_hash = new_hash
+                    continue
+                if new_hash in self.closed_set:
+                    self.incons.add(new_hash)
+                else:
+                    self.push_open(new_hash)
+        return True
+
+    def publish(self, start_time, completed):
+        """
+        Record the current plan and its suboptimality bound. The weight only bounds
+        the plan of a pass that completed; the OPEN/INCONS bound always holds.
+        """
+        if self.goal_hash is None and self.incumbent is None:
+            return
+        if self.goal_hash is not None and self.g[self.goal_hash] == self.goal_cost():
+            path = []
+            state_hash = self.goal_hash
+            while self.parent[state_hash] is not None:
+                state_hash, move = self.parent[state_hash]
+                path.append(move)
+            self.solution_path = list(reversed(path))
+        else:
+            self.solution_path = list(self.incumbent[1])
+
+        # Any cheaper plan must pass through a state still in OPEN or INCONS.
+        pending = set(self.open_f) | self.incons
+        cost = self.goal_cost()
+        lower = min([self.g[s] + self.heuristic_of(s) for s in pending] + [cost])
+        bound = cost / lower if lower > 0 else 1.0
+        self.suboptimality_bound = min(self.w, bound) if completed else bound
+        self.history.append((self.w, cost, self.suboptimality_bound, time.perf_counter() - start_time))
+
+
+class BeamSearch(SearchAlgorithm):
+    """
+    Beam search: a breadth-first search that keeps only the 'width' best states of
+    each layer, ranked by the ARA* heuristic (lower_bound), ties broken by the number
+    of remaining diamonds.
+
+    After each call, self.solution_path holds the plan and self.suboptimality_bound
+    an upper bound on cost(plan) / cost(optimal plan): a shorter plan would have to go
+    through a pruned state, so the cheapest pruned g + lower_bound bounds the optimum.
+    With a learned heuristic (set_model) each layer is ranked by its estimates, scored in
+    one batched call, and no bound is reported.
+    """
+    def __init__(self, name, board, diamonds, description="Beam search", width=20, max_depth=50, blocks=None):
+        super().__init__(name, board, diamonds, description, blocks)
+        self.width = width
+        self.max_depth = max_depth
+        self.solution_path = None
+        self.suboptimality_bound = float("inf")
+
+    def evaluate_move(self, board, diamonds, block, move):
+        return self.diamonds_after(board, diamonds, move, block)
+
+    def heuristic(self, diamonds):
+        """Heuristic: number of remaining diamonds (kernel state)."""
+        return popcount(diamonds)
+
+    def get_best_move(self, possible_moves, board, diamonds):
+        """
+        Run the beam search and return the first move (block, x, y) of the plan found,
+        or None if the beam dies out or max_depth is reached.
+        """
+        self.board = copy.deepcopy(board)
+        self.diamonds = copy.deepcopy(diamonds)
+        self.grid_size = len(board)
+        self.reset_stats()
+        self.solution_path = None
+        self.suboptimality_bound = float("inf")
+        if self.is_goal(diamonds):
+            self.solution_path = []
+            self.suboptimality_bound = 1.0
+            return None
+
+        blocks = self.available_blocks()
+        kernel = self.kernel_for(blocks)
+        beam = [(encode(board), encode(diamonds), [], self.heuristic(encode(diamonds)))]
+        explored = self.visited_set()
+        explored.add((beam[0][0], beam[0][1]))
+        pruned_bound = float("inf")
+        for depth in range(1, self.max_depth + 1):
+            candidates = []
+            for current_board, current_diamonds, path, h in beam:
+                self.nodes_expanded += 1
+                for (piece, x, y, _), new_board, new_diamonds, removed in kernel.children(current_board, current_diamonds):
+                    new_hash = (new_board, new_diamonds)
+                    if new_hash in explored or kernel.is_dead(new_board, new_diamonds):
+                        continue
+                    explored.add(new_hash)
+                    new_path = path + [(blocks[piece], x, y)]
+                    if kernel.is_goal(new_diamonds):
+                        self.solution_path = new_path
+                        # The learned estimates are no lower bound, so they bound nothing.
+                        if self.model is None:
+                            self.suboptimality_bound = depth / min(depth, pruned_bound)
+                        return new_path[0]
+                    bound = kernel.lower_bound(new_board, new_diamonds) if self.model is None else 0
+                    candidates.append(((bound, h - removed), len(candidates), new_board, new_diamonds, new_path))
+            self.track_sizes(len(candidates), len(explored))
+            if not candidates:
+                return None
+            if self.model is not None:
+                # The whole layer is scored in one batched call.
+                estimates = self.model.estimate([(c[2], c[3]) for c in candidates], self.grid_size).tolist()
+                candidates = [((estimate, c[0][1]),) + c[1:] for estimate, c in zip(estimates, candidates)]
+            candidates.sort(key=lambda c: (c[0], c[1]))
+            if self.model is None:
+                for rank, _, _, _, _ in candidates[self.width:]:
+                    pruned_bound = min(pruned_bound, depth + rank[0])
+            beam = [(c[2], c[3], c[4], c[0][1]) for c in candidates[:self.width]]
+        return None
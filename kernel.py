@@ -0,0 +1,372 @@
+"""
+Search kernel: the rules of the game on flat integer state.
+
+A grid is a single int in which cell (i, j) is bit size * size - 1 - (i * size + j), so a
+state is the pair of ints (board, diamonds): hashing it is cheap, comparing two of them
+orders the grids like comparing their rows, and placing a block or clearing a line is a
+handful of bitwise operations instead of copying nested lists.
+Every search algorithm goes through a Kernel built for its grid size and pieces, and
+prunes the dead states it reports (a diamond that no sequence of moves can clear).
+
+If Numba is installed, children(), ordered_children() and scored_placements() (one call
+per expanded node, covering every child) run as compiled functions for grids of up to 8x8;
+otherwise, or with WOODBLOCK_NUMBA=0 in the environment, the pure-Python versions below
+are used. Both give the same children in the same order.
+
+Depth-first searches keep a single KernelState and make/unmake moves on it.
+"""
+import os
+
+try:
+    import numba
+    import numpy as np
+except ImportError:  # Numba is optional; the pure-Python kernel is the reference.
+    numba = None
+
+NUMBA_ENABLED = numba is not None and os.environ.get("WOODBLOCK_NUMBA", "1") != "0"
+
+# Boards whose clearable cells each kernel remembers before starting over.
+DEAD_CACHE_SIZE = 1 << 18
+
+
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+if hasattr(int, "bit_count"):  # Python 3.10+
+    popcount = int.bit_count
+
+
+def encode(grid):
+    """Bits of the cells equal to 1 in a square grid (nested lists or a 2D array)."""
+    bits = 0
+    for row in grid:
+        for cell in row:
+            bits = (bits << 1) | (1 if cell else 0)
+    return bits
+
+
+def decode(bits, size):
+    """The size x size grid of 0/1 lists for 'bits'."""
+    cells = [(bits >> shift) & 1 for shift in range(size * size - 1, -1, -1)]
+    return [cells[i * size:(i + 1) * size] for i in range(size)]
+
+
+def block_mask(block, x, y, size):
+    """Bits of the cells covered by 'block' placed at (x, y)."""
+    mask = 0
+    for i, row in enumerate(block):
+        for j, cell in enumerate(row):
+            if cell == 1:
+                mask |= 1 << (size * size - 1 - (x + i) * size - (y + j))
+    return mask
+
+
+class Kernel:
+    """
+    Move generation, move application with line clearing, the goal test and the
+    heuristics for one grid size and one list of pieces.
+
+    Placements are (piece, x, y, mask) tuples, 'piece' being the index of the block in
+    'blocks', in the order block, then row, then column.
+    """
+    def __init__(self, size, blocks, use_numba=None):
+        self.size = size
+        self.blocks = blocks
+        self.row_masks = [block_mask([[1] * size], i, 0, size) for i in range(size)]
+        self.col_masks = [block_mask([[1]] * size, 0, j, size) for j in range(size)]
+        self.placements = []
+        # Lines (rows, then columns) each placement touches: only those can be completed by it.
+        self.touched = []
+        for piece, block in enumerate(blocks):
+            block_h, block_w = len(block), len(block[0])
+            for x in range(size - block_h + 1):
+                for y in range(size - block_w + 1):
+                    mask = block_mask(block, x, y, size)
+                    self.placements.append((piece, x, y, mask))
+                    self.touched.append([line for line in self.row_masks + self.col_masks if line & mask])
+        self.full = (1 << size * size) - 1
+        self.distinct_masks = sorted({mask for _, _, _, mask in self.placements})
+        self.clearable = {}
+        # Widest piece row and tallest piece column, for lower_bound.
+        self.max_width = max(max(sum(row) for row in block) for block in blocks)
+        self.max_height = max(max(sum(column) for column in zip(*block)) for block in blocks)
+
+        if use_numba is None:
+            use_numba = NUMBA_ENABLED
+        self.use_numba = use_numba and numba is not None and size * size <= 64
+        if self.use_numba:
+            self.np_masks = np.array([mask for _, _, _, mask in self.placements], dtype=np.uint64)
+            self.np_rows = np.array(self.row_masks, dtype=np.uint64)
+            self.np_cols = np.array(self.col_masks, dtype=np.uint64)
+
+    def legal(self, board):
+        """Placements that fit on 'board'."""
+        return [placement for placement in self.placements if not board & placement[3]]
+
+    def apply(self, board, diamonds, mask):
+        """
+        Place the cells of 'mask' and clear the filled lines: full rows first, then the
+        columns that are still full. Returns the new (board, diamonds).
+        """
+        board, diamonds, _ = self.play(board, diamonds, mask)
+        return board, diamonds
+
+    def play(self, board, diamonds, mask):
+        """
+        apply() that also returns how many diamonds the cleared lines removed: the change
+        of the diamond-count heuristic from the parent to the child.
+        """
+        board |= mask
+        cleared = 0
+        for row in self.row_masks:
+            if board & row == row:
+                cleared |= row
+        board &= ~cleared
+        for col in self.col_masks:
+            if board & col == col:
+                cleared |= col
+        if not cleared:
+            return board, diamonds, 0
+        return board & ~cleared, diamonds & ~cleared, popcount(diamonds & cleared)
+
+    def is_goal(self, diamonds):
+        return diamonds == 0
+
+    def has_full_line(self, board):
+        """
+        Whether 'board' holds a full row or column. play() clears them, so only a board
+        given from outside can; any move then clears it, completing a line or not.
+        """
+        return any(board & line == line for line in self.row_masks + self.col_masks)
+
+    def completed_lines(self, board, diamonds, index):
+        """Lines holding a diamond that placement number 'index' fills (and therefore clears)."""
+        filled = board | self.placements[index][3]
+        return sum(1 for line in self.touched[index] if diamonds & line and filled & line == line)
+
+    def children(self, board, diamonds, pieces=None):
+        """
+        (placement, child board, child diamonds, diamonds removed) for every placement that
+        fits, optionally only for the piece indices in 'pieces'.
+        """
+        if self.use_numba:
+            indices, boards, gems, removed, _ = _numba_children(board, diamonds, self.np_masks, self.np_rows,
+                                                                self.np_cols, False)
+            placements = self.placements
+            return [(placements[i], b, d, r)
+                    for i, b, d, r in zip(indices.tolist(), boards.tolist(), gems.tolist(), removed.tolist())
+                    if pieces is None or placements[i][0] in pieces]
+        play = self.play
+        return [(placement, *play(board, diamonds, placement[3]))
+                for placement in self.placements
+                if not board & placement[3] and (pieces is None or placement[0] in pieces)]
+
+    def iter_children(self, board, diamonds):
+        """children(), lazily: the pure-Python kernel builds each child only when it is asked for."""
+        if self.use_numba:
+            yield from self.children(board, diamonds)
+            return
+        play = self.play
+        for placement in self.placements:
+            if not board & placement[3]:
+                yield (placement, *play(board, diamonds, placement[3]))
+
+    def ordered_children(self, board, diamonds):
+        """
+        (score, placement, child board, child diamonds, diamonds removed) for every placement
+        that fits, most diamond lines completed first; ties keep the placement order.
+        """
+        if self.use_numba:
+            indices, boards, gems, removed, scores = _numba_children(board, diamonds, self.np_masks, self.np_rows,
+                                                                     self.np_cols, True)
+            placements = self.placements
+            children = [(s, placements[i], b, d, r)
+                        for i, b, d, r, s in zip(indices.tolist(), boards.tolist(), gems.tolist(), removed.tolist(),
+                                                 scores.tolist())]
+        else:
+            play, completed = self.play, self.completed_lines
+            children = [(completed(board, diamonds, index), placement, *play(board, diamonds, placement[3]))
+                        for index, placement in enumerate(self.placements) if not board & placement[3]]
+        children.sort(key=lambda child: -child[0])
+        return children
+
+    def scored_placements(self, board, diamonds):
+        """
+        ordered_children() without the children: (score, placement) for every placement that
+        fits, most diamond lines completed first, for searches that make/unmake moves on a
+        KernelState instead of keeping every child.
+        """
+        if self.use_numba:
+            indices, _, _, _, scores = _numba_children(board, diamonds, self.np_masks, self.np_rows,
+                                                       self.np_cols, True)
+            placements = self.placements
+            scored = [(s, placements[i]) for i, s in zip(indices.tolist(), scores.tolist())]
+        else:
+            completed = self.completed_lines
+            scored = [(completed(board, diamonds, index), placement)
+                      for index, placement in enumerate(self.placements) if not board & placement[3]]
+        scored.sort(key=lambda entry: -entry[0])
+        return scored
+
+    def clearable_cells(self, board):
+        """
+        Cells of every line that some sequence of placements could still fill, cached per board.
+
+        A cell can only be empty at some point if it is empty now or lies on a line that gets
+        cleared, and a line can only be filled if each of its cells is occupied now or covered
+        by a placement that fits on cells which can be empty. Growing both sets to a fixed
+        point over-approximates the lines that can ever be cleared, so a diamond outside them
+        can never be removed.
+        """
+        cells = self.clearable.get(board)
+        if cells is not None:
+            return cells
+        lines = self.row_masks + self.col_masks
+        empty = self.full & ~board
+        cells = 0
+        while True:
+            covered = board
+            for mask in self.distinct_masks:
+                if not mask & ~empty:
+                    covered |= mask
+            if covered == board:
+                break  # nothing fits: no move is ever made, so not even a full line is cleared
+            fillable = 0
+            for line in lines:
+                if covered & line == line:
+                    fillable |= line
+            if fillable == cells:
+                break
+            cells = fillable
+            empty |= fillable
+        if len(self.clearable) >= DEAD_CACHE_SIZE:
+            self.clearable.clear()
+        self.clearable[board] = cells
+        return cells
+
+    def is_dead(self, board, diamonds):
+        """True if some diamond can never be cleared: no sequence of moves reaches the goal."""
+        return bool(diamonds & ~self.clearable_cells(board))
+
+    def lower_bound(self, board, diamonds):
+        """
+        Admissible estimate of the moves still needed to clear every diamond: a diamond
+        is cleared only when its row or its column is filled, and one piece fills at most
+        max_width cells of a row or max_height cells of a column.
+        """
+        if not diamonds:
+            return 0
+        size = self.size
+        last = size * size - 1
+        row_needed = [-(-(size - popcount(board & row)) // self.max_width) for row in self.row_masks]
+        col_needed = [-(-(size - popcount(board & col)) // self.max_height) for col in self.col_masks]
+        bound = 1
+        while diamonds:
+            low = diamonds & -diamonds
+            cell = last - (low.bit_length() - 1)
+            needed = min(row_needed[cell // size], col_needed[cell % size])
+            if needed > bound:
+                bound = needed
+            diamonds ^= low
+        return bound
+
+
+class KernelState:
+    """
+    The one live state of a depth-first search. make() places a mask and clears the filled
+    lines, pushing the previous board and diamonds on an undo stack, and unmake() pops them
+    back, so the state is restored exactly and nothing is kept per node but two ints.
+    """
+    __slots__ = ("kernel", "board", "diamonds", "undo_boards", "undo_diamonds")
+
+    def __init__(self, kernel, board, diamonds):
+        self.kernel = kernel
+        self.board = board
+        self.diamonds = diamonds
+        self.undo_boards = []
+        self.undo_diamonds = []
+
+    def make(self, mask):
+        """Play 'mask' on the state; returns the diamonds it removed."""
+        self.undo_boards.append(self.board)
+        self.undo_diamonds.append(self.diamonds)
+        self.board, self.diamonds, removed = self.kernel.play(self.board, self.diamonds, mask)
+        return removed
+
+    def unmake(self):
+        """Undo the last make()."""
+        self.board = self.undo_boards.pop()
+        self.diamonds = self.undo_diamonds.pop()
+
+    def depth(self):
+        return len(self.undo_boards)
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _numba_apply(board, diamonds, mask, rows, cols):
+        board |= mask
+        cleared = np.uint64(0)
+        for row in rows:
+            if board & row == row:
+                cleared |= row
+        board &= ~cleared
+        diamonds &= ~cleared
+        cleared = np.uint64(0)
+        for col in cols:
+            if board & col == col:
+                cleared |= col
+        return board & ~cleared, diamonds & ~cleared
+
+    @numba.njit(cache=True)
+    def _numba_children_impl(board, diamonds, masks, rows, cols, scored):
+        count = len(masks)
+        indices = np.empty(count, dtype=np.int64)
+        boards = np.empty(count, dtype=np.uint64)
+        gems = np.empty(count, dtype=np.uint64)
+        removed = np.zeros(count, dtype=np.int64)
+        scores = np.zeros(count, dtype=np.int64)
+        n = 0
+        for k in range(count):
+            mask = masks[k]
+            if board & mask:
+                continue
+            indices[n] = k
+            boards[n], gems[n] = _numba_apply(board, diamonds, mask, rows, cols)
+            gone = diamonds & ~gems[n]
+            while gone:
+                gone &= gone - np.uint64(1)
+                removed[n] += 1
+            if scored:
+                filled = board | mask
+                score = 0
+                for lines in (rows, cols):
+                    for line in lines:
+                        if line & mask and diamonds & line and filled & line == line:
+                            score += 1
+                scores[n] = score
+            n += 1
+        return indices[:n], boards[:n], gems[:n], removed[:n], scores[:n]
+
+    def _numba_children(board, diamonds, masks, rows, cols, scored):
+        return _numba_children_impl(np.uint64(board), np.uint64(diamonds), masks, rows, cols, scored)
+
+
+_kernels = {}
+
+
+def set_numba(enabled):
+    """Switch the compiled kernel on or off for the kernels built from now on (for benchmarks)."""
+    global NUMBA_ENABLED
+    NUMBA_ENABLED = bool(enabled) and numba is not None
+    _kernels.clear()
+
+
+def get_kernel(size, blocks):
+    """The Kernel for a grid size and list of pieces, built once and then shared."""
+    key = (size, tuple(tuple(tuple(row) for row in block) for block in blocks))
+    kernel = _kernels.get(key)
+    if kernel is None:
+        kernel = _kernels[key] = Kernel(size, blocks)
+    return kernel
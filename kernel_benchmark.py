@@ -0,0 +1,85 @@
+"""
+Compares the pure-Python search kernel with the Numba-compiled one (when Numba is
+installed): raw child generation per expanded state, then whole solves of the corpus
+boards with every deterministic algorithm. Both kernels must expand the same nodes.
+
+    python kernel_benchmark.py --tiers easy medium --repeats 3
+"""
+import argparse
+import statistics
+import time
+
+import kernel
+from algorithms import PIECE_SETS
+from corpus import CORPUS_TIERS, load_corpus, select_boards
+from solver import ALGORITHMS, solve_board
+
+# The time-budgeted searchers do as much work as their budget allows, so they are left out.
+ALGORITHM_NAMES = [name for name in ALGORITHMS if name not in ("MCTS", "ARA*")]
+
+
+def children_rate(boards, blocks, seconds=1.0):
+    """States expanded per second by Kernel.ordered_children on the corpus start states."""
+    states = []
+    for entry in boards:
+        size = len(entry["board"])
+        states.append((kernel.get_kernel(size, blocks), kernel.encode(entry["board"]), kernel.encode(entry["diamonds"])))
+    for search_kernel, board, diamonds in states:
+        search_kernel.ordered_children(board, diamonds)  # warm-up (and JIT compilation)
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for search_kernel, board, diamonds in states:
+            search_kernel.ordered_children(board, diamonds)
+        count += len(states)
+    return count / (time.perf_counter() - start)
+
+
+def solve_times(boards, blocks, names, repeats):
+    """Median total solve time over the boards, and total nodes, per algorithm."""
+    results = {}
+    for name in names:
+        options = {"w": 2.0} if name == "A* weighted" else {}
+        times, nodes = [], 0
+        for repeat in range(repeats + 1):
+            start = time.perf_counter()
+            nodes = sum(solve_board(name, entry["board"], entry["diamonds"], blocks=blocks, **options)["nodes"]
+                        for entry in boards)
+            if repeat:  # the first run is a warm-up
+                times.append(time.perf_counter() - start)
+        results[name] = (statistics.median(times), nodes)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the pure-Python and Numba search kernels.")
+    parser.add_argument("--tiers", nargs="+", default=["easy", "medium"], choices=list(CORPUS_TIERS))
+    parser.add_argument("--algorithms", nargs="+", default=ALGORITHM_NAMES, choices=ALGORITHM_NAMES)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    boards = select_boards(corpus, args.tiers)
+    blocks = PIECE_SETS[corpus["generator"]["piece_set"]]
+    modes = [("python", False)] + ([("numba", True)] if kernel.numba is not None else [])
+    if len(modes) == 1:
+        print("Numba is not installed: timing the pure-Python kernel only.")
+
+    rates, timings = {}, {}
+    for mode, enabled in modes:
+        kernel.set_numba(enabled)
+        rates[mode] = children_rate(boards, blocks)
+        timings[mode] = solve_times(boards, blocks, args.algorithms, args.repeats)
+    kernel.set_numba(True)
+
+    print(f"{len(boards)} boards ({', '.join(args.tiers)})")
+    print(f"{'children/s':<22}" + "".join(f"{rates[mode]:>14,.0f}" for mode, _ in modes))
+    print(f"{'algorithm':<22}" + "".join(f"{mode + ' (s)':>14}" for mode, _ in modes) + f"{'nodes':>10}")
+    for name in args.algorithms:
+        nodes = {timings[mode][name][1] for mode, _ in modes}
+        line = f"{name:<22}" + "".join(f"{timings[mode][name][0]:>14.3f}" for mode, _ in modes)
+        print(line + f"{'/'.join(str(n) for n in sorted(nodes)):>10}" + ("" if len(nodes) == 1 else "  MISMATCH"))
+
+
+if __name__ == "__main__":
+    main()
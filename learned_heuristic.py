@@ -0,0 +1,229 @@
+"""
+Learned heuristic: a small model, fitted on optimally solved boards, that estimates the
+number of moves left from a kernel state.
+
+Training solves random boards with solver.rank_moves, which gives the exact distance to
+the goal of every child of the root, and turns each labelled state into a few cheap
+features of its rows and columns (FEATURES). A linear model (least squares) or a one
+hidden layer MLP (tanh, trained with Adam) is fitted on them with NumPy only and saved
+as an .npz file.
+
+GreedySearch, WeightedAStarSearch and BeamSearch use a model set with set_model() (or the
+'model' option of solver.make_algorithm): the children of an expansion (of a whole layer,
+for beam search) are scored in one batched call. The estimates are not admissible, so
+weighted A* loses its bound on the plan length and beam search reports none.
+
+    python learned_heuristic.py --boards 400 --hidden 16 --output models/heuristic_classic_5x5.npz
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from kernel import block_mask, encode, get_kernel
+
+FEATURES = [
+    "diamonds",             # diamonds left
+    "filled",               # filled cells
+    "diamond_lines",        # rows and columns holding a diamond
+    "diamond_line_gaps",    # empty cells over the rows and columns holding a diamond
+    "diamond_gaps",         # for each diamond, the empty cells of its emptier line, summed
+    "worst_diamond_gaps",   # ... and the largest of them
+    "holes",                # empty cells whose four neighbours are filled or off the grid
+    "near_full_lines",      # lines with one or two empty cells
+]
+
+
+def state_cells(values, size):
+    """(len(values), size, size) uint8 cells of kernel grids (Python ints of any width)."""
+    cells = size * size
+    width = (cells + 7) // 8
+    raw = b"".join(value.to_bytes(width, "big") for value in values)
+    bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8).reshape(len(values), width), axis=1)
+    return bits[:, width * 8 - cells:].reshape(len(values), size, size)
+
+
+def features(states, size):
+    """(len(states), len(FEATURES)) float features of (board, diamonds) kernel states."""
+    if not states:
+        return np.zeros((0, len(FEATURES)))
+    boards = state_cells([board for board, _ in states], size).astype(np.int32)
+    diamonds = state_cells([diamonds for _, diamonds in states], size).astype(np.int32)
+    row_gaps = size - boards.sum(axis=2)
+    col_gaps = size - boards.sum(axis=1)
+    row_diamonds = diamonds.sum(axis=2) > 0
+    col_diamonds = diamonds.sum(axis=1) > 0
+    cell_gaps = np.minimum(row_gaps[:, :, None], col_gaps[:, None, :])
+    empty = np.pad(1 - boards, ((0, 0), (1, 1), (1, 1)))
+    neighbours = empty[:, :-2, 1:-1] + empty[:, 2:, 1:-1] + empty[:, 1:-1, :-2] + empty[:, 1:-1, 2:]
+    return np.stack([
+        diamonds.sum(axis=(1, 2)),
+        boards.sum(axis=(1, 2)),
+        row_diamonds.sum(axis=1) + col_diamonds.sum(axis=1),
+        (row_gaps * row_diamonds).sum(axis=1) + (col_gaps * col_diamonds).sum(axis=1),
+        (cell_gaps * diamonds).sum(axis=(1, 2)),
+        (cell_gaps * diamonds).max(axis=(1, 2)),
+        ((1 - boards) * (neighbours == 0)).sum(axis=(1, 2)),
+        ((row_gaps >= 1) & (row_gaps <= 2)).sum(axis=1) + ((col_gaps >= 1) & (col_gaps <= 2)).sum(axis=1),
+    ], axis=1).astype(float)
+
+
+class HeuristicModel:
+    """
+    Linear model or one hidden layer MLP on standardized FEATURES. 'layers' is a list of
+    (weights, bias) pairs, tanh between them; the output is clipped at 0.
+    """
+    def __init__(self, layers, mean, std, grid_size, blocks):
+        self.layers = layers
+        self.mean = mean
+        self.std = std
+        self.grid_size = grid_size
+        self.blocks = blocks
+
+    def predict(self, x):
+        """Estimates for a (N, len(FEATURES)) feature matrix, one matrix multiply per layer."""
+        x = (x - self.mean) / self.std
+        for weights, bias in self.layers[:-1]:
+            x = np.tanh(x @ weights + bias)
+        weights, bias = self.layers[-1]
+        return np.maximum(x @ weights + bias, 0.0).ravel()
+
+    def estimate(self, states, size):
+        """Estimated moves left for a list of (board, diamonds) kernel states, as an array."""
+        if size != self.grid_size:
+            raise ValueError(f"The model was trained on {self.grid_size}x{self.grid_size} grids, not {size}x{size}")
+        return self.predict(features(states, size))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {f"weights_{i}": weights for i, (weights, _) in enumerate(self.layers)}
+        arrays.update({f"bias_{i}": bias for i, (_, bias) in enumerate(self.layers)})
+        np.savez(path, mean=self.mean, std=self.std, features=np.array(FEATURES),
+                 config=np.array(json.dumps({"grid_size": self.grid_size, "blocks": self.blocks,
+                                             "layers": len(self.layers)})), **arrays)
+
+
+def load_model(path):
+    with np.load(path) as data:
+        if list(data["features"]) != FEATURES:
+            raise ValueError(f"{path} was trained on other features: {list(data['features'])}")
+        config = json.loads(str(data["config"]))
+        layers = [(data[f"weights_{i}"], data[f"bias_{i}"]) for i in range(config["layers"])]
+        return HeuristicModel(layers, data["mean"], data["std"], config["grid_size"], config["blocks"])
+
+
+def collect_samples(boards, blocks, max_nodes=20000):
+    """
+    (states, distances) from solving each (board, diamonds) with solver.rank_moves: the
+    root and every child of it whose exact distance to the goal was found.
+    """
+    from solver import rank_moves
+
+    states, distances = [], []
+    for board, diamonds in boards:
+        size = len(board)
+        kernel = get_kernel(size, blocks)
+        root = (encode(board), encode(diamonds))
+        known = [(distance, move) for distance, move in rank_moves(board, diamonds, blocks=blocks,
+                                                                    max_nodes=max_nodes)["ranking"]
+                 if distance is not None]
+        for distance, (block, x, y) in known:
+            states.append(kernel.apply(*root, block_mask(block, x, y, size)))
+            distances.append(distance - 1)
+        if known:
+            states.append(root)
+            distances.append(known[0][0])
+    return states, np.array(distances, dtype=float)
+
+
+def fit(x, y, grid_size, blocks, hidden=0, epochs=3000, learning_rate=0.01, seed=0):
+    """Fit a HeuristicModel to features x and distances y: least squares, or an MLP with 'hidden' units."""
+    mean = x.mean(axis=0)
+    std = x.std(axis=0)
+    std[std == 0] = 1.0
+    z = (x - mean) / std
+    if not hidden:
+        solution, *_ = np.linalg.lstsq(np.hstack([z, np.ones((len(z), 1))]), y, rcond=None)
+        layers = [(solution[:-1, None], solution[-1:])]
+        return HeuristicModel(layers, mean, std, grid_size, blocks)
+
+    rng = np.random.default_rng(seed)
+    params = [rng.normal(0, 1 / np.sqrt(z.shape[1]), (z.shape[1], hidden)), np.zeros(hidden),
+              rng.normal(0, 1 / np.sqrt(hidden), (hidden, 1)), np.full(1, y.mean())]
+    moments = [(np.zeros_like(p), np.zeros_like(p)) for p in params]
+    target = y[:, None]
+    for step in range(1, epochs + 1):
+        w1, b1, w2, b2 = params
+        h = np.tanh(z @ w1 + b1)
+        error = (h @ w2 + b2 - target) * (2 / len(z))
+        dh = (error @ w2.T) * (1 - h * h)
+        grads = [z.T @ dh, dh.sum(axis=0), h.T @ error, error.sum(axis=0)]
+        for p, g, (m, v) in zip(params, grads, moments):
+            m *= 0.9
+            m += 0.1 * g
+            v *= 0.999
+            v += 0.001 * g * g
+            p -= learning_rate * (m / (1 - 0.9 ** step)) / (np.sqrt(v / (1 - 0.999 ** step)) + 1e-8)
+    w1, b1, w2, b2 = params
+    return HeuristicModel([(w1, b1), (w2, b2)], mean, std, grid_size, blocks)
+
+
+def random_boards(count, grid_size=5, seed=0):
+    """Random boards with as many clusters and diamonds per cell as the GUI's."""
+    from algorithms import generate_board
+
+    rng = random.Random(seed)
+    area = grid_size * grid_size
+    return [generate_board(grid_size=grid_size, max_blocks=8 * area // 25, max_diamonds=5 * area // 25, rng=rng)
+            for _ in range(count)]
+
+
+def main():
+    from algorithms import PIECE_SETS
+    from corpus import load_corpus
+    from solver import solve_board
+
+    parser = argparse.ArgumentParser(description="Fit a heuristic on optimally solved boards.")
+    parser.add_argument("--boards", type=int, default=400, help="random boards to solve for training")
+    parser.add_argument("--grid-size", type=int, default=5)
+    parser.add_argument("--piece-set", default="classic", choices=list(PIECE_SETS.keys()))
+    parser.add_argument("--hidden", type=int, default=16, help="hidden units (0 for a linear model)")
+    parser.add_argument("--max-nodes", type=int, default=20000, help="node budget of each training solve")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True, help=".npz file for the weights")
+    args = parser.parse_args()
+
+    blocks = PIECE_SETS[args.piece_set]
+    start = time.perf_counter()
+    states, distances = collect_samples(random_boards(args.boards, args.grid_size, args.seed), blocks,
+                                        args.max_nodes)
+    x = features(states, args.grid_size)
+    split = len(x) * 4 // 5
+    model = fit(x[:split], distances[:split], args.grid_size, blocks, hidden=args.hidden, seed=args.seed)
+    error = np.abs(model.predict(x[split:]) - distances[split:]).mean()
+    print(f"{len(x)} states from {args.boards} boards in {time.perf_counter() - start:.1f}s; "
+          f"held-out mean absolute error {error:.2f} moves", file=sys.stderr)
+    model = fit(x, distances, args.grid_size, blocks, hidden=args.hidden, seed=args.seed)
+    model.save(args.output)
+    print(f"Model written to {args.output}", file=sys.stderr)
+
+    if args.grid_size == 5 and args.piece_set == load_corpus()["generator"]["piece_set"]:
+        for name, options in (("Greedy", {}), ("A* weighted", {"w": 2.0}), ("Beam", {})):
+            nodes = [0, 0]
+            moves = [0, 0]
+            for entry in load_corpus()["boards"]:
+                for i, learned in enumerate((None, model)):
+                    result = solve_board(name, entry["board"], entry["diamonds"], blocks=blocks, model=learned,
+                                         **options)
+                    nodes[i] += result["nodes"]
+                    moves[i] += result["moves"]
+            print(f"{name} on the corpus: {nodes[0]} -> {nodes[1]} nodes, {moves[0]} -> {moves[1]} moves",
+                  file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Level generation pipeline: random candidate boards are deduplicated by canonical hash,
+solved optimally, and bucketed into difficulty tiers by optimal move count; within a
+tier, boards with more legal first moves (a higher branching factor) come first.
+
+Candidates are solved in parallel and progress is checkpointed, so an interrupted run
+resumes where it stopped:
+
+    python level_generator.py --per-tier 50 --output levels/classic_5x5.json
+
+The resulting pack is what the GUI picks boards from.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from algorithms import canonical_state, generate_board, PIECE_SETS
+from blind_search import IterativeDeepeningSearch
+
+# Tier name -> (min, max) optimal number of moves.
+TIERS = {
+    "easy": (1, 2),
+    "medium": (3, 3),
+    "hard": (4, 4),
+    "expert": (5, 8),
+}
+
+
+def tier_of(moves, tiers=TIERS):
+    for name, (low, high) in tiers.items():
+        if low <= moves <= high:
+            return name
+    return None
+
+
+def state_key(board, diamonds, blocks):
+    """Short, stable hash of the canonical form of a board."""
+    canonical = canonical_state(board, diamonds, blocks)
+    return hashlib.sha1(repr(canonical).encode()).hexdigest()[:16]
+
+
+def evaluate_candidate(task):
+    """
+    Generate the candidate board for 'seed' and solve it optimally.
+    Returns a level dict, or None if the board is trivial or not solvable within max_moves.
+    """
+    seed, grid_size, max_blocks, max_diamonds, blocks, max_moves = task
+    board, diamonds = generate_board(grid_size=grid_size, max_blocks=max_blocks, max_diamonds=max_diamonds,
+                                     rng=random.Random(seed))
+    if sum(sum(row) for row in diamonds) == 0:
+        return None
+    searcher = IterativeDeepeningSearch(board, diamonds, blocks=blocks)
+    searcher.get_best_move(None, board, diamonds, max_depth=max_moves)
+    if not searcher.solution_path:
+        return None
+    searcher.board = board
+    branching = sum(len(searcher.possible_moves(block)) for block in searcher.blocks)
+    return {
+        "id": state_key(board, diamonds, blocks),
+        "seed": seed,
+        "board": board,
+        "diamonds": diamonds,
+        "moves": len(searcher.solution_path),
+        "branching": branching,
+        "nodes": searcher.nodes_expanded,
+    }
+
+
+class LevelGenerator:
+    def __init__(self, grid_size=5, piece_set="classic", per_tier=20, max_blocks=8, max_diamonds=5,
+                 tiers=TIERS, checkpoint=None, workers=None, batch_size=64, start_seed=0):
+        self.grid_size = grid_size
+        self.piece_set = piece_set
+        self.blocks = PIECE_SETS[piece_set]
+        self.per_tier = per_tier
+        self.max_blocks = max_blocks
+        self.max_diamonds = max_diamonds
+        self.tiers = tiers
+        self.max_moves = max(high for _, high in tiers.values())
+        self.checkpoint = checkpoint
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.next_seed = start_seed
+        self.seen = set()
+        self.levels = {name: [] for name in tiers}
+        if checkpoint and os.path.exists(checkpoint):
+            self.load_checkpoint()
+
+    def config(self):
+        return {
+            "grid_size": self.grid_size,
+            "piece_set": self.piece_set,
+            "max_blocks": self.max_blocks,
+            "max_diamonds": self.max_diamonds,
+            "tiers": {name: list(bounds) for name, bounds in self.tiers.items()},
+        }
+
+    def load_checkpoint(self):
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        if state["config"] != self.config():
+            raise ValueError(f"Checkpoint {self.checkpoint} was written with a different configuration")
+        self.next_seed = state["next_seed"]
+        self.seen = set(state["seen"])
+        self.levels = state["levels"]
+        print(f"Resuming from seed {self.next_seed} with {self.progress()}")
+
+    def save_checkpoint(self):
+        state = {"config": self.config(), "next_seed": self.next_seed,
+                 "seen": sorted(self.seen), "levels": self.levels}
+        tmp = self.checkpoint + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.checkpoint)
+
+    def done(self):
+        return all(len(levels) >= self.per_tier for levels in self.levels.values())
+
+    def progress(self):
+        return ", ".join(f"{name}: {len(levels)}/{self.per_tier}" for name, levels in self.levels.items())
+
+    def add(self, level):
+        """Keep a solved candidate if it is new and its tier still needs levels."""
+        if level is None or level["id"] in self.seen:
+            return
+        self.seen.add(level["id"])
+        tier = tier_of(level["moves"], self.tiers)
+        if tier is not None and len(self.levels[tier]) < self.per_tier:
+            self.levels[tier].append(level)
+
+    def run(self, max_candidates=100000):
+        """Generate candidates in parallel batches until every tier is full."""
+        stop_seed = self.next_seed + max_candidates
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            while not self.done() and self.next_seed < stop_seed:
+                seeds = range(self.next_seed, min(self.next_seed + self.batch_size, stop_seed))
+                tasks = [(seed, self.grid_size, self.max_blocks, self.max_diamonds, self.blocks, self.max_moves)
+                         for seed in seeds]
+                # map keeps the seed order, so a resumed run makes the same choices.
+                for level in executor.map(evaluate_candidate, tasks, chunksize=8):
+                    self.add(level)
+                self.next_seed = seeds[-1] + 1
+                if self.checkpoint:
+                    self.save_checkpoint()
+                print(f"seed {self.next_seed}: {self.progress()}", flush=True)
+        return self.pack()
+
+    def pack(self):
+        """The level pack: per tier, the hardest-branching boards first."""
+        tiers = {}
+        for name, levels in self.levels.items():
+            ordered = sorted(levels, key=lambda level: (-level["branching"], level["id"]))
+            tiers[name] = [
+                {key: level[key] for key in ("id", "seed", "board", "diamonds", "moves", "branching")}
+                for level in ordered
+            ]
+        return {"grid_size": self.grid_size, "piece_set": self.piece_set, "tiers": tiers}
+
+
+def load_pack(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def pick_level(pack, tier=None, rng=random):
+    """Pick a random level from the pack, optionally from one tier only."""
+    tiers = [tier] if tier is not None else [name for name, levels in pack["tiers"].items() if levels]
+    levels = pack["tiers"][rng.choice(tiers)]
+    return rng.choice(levels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a pack of solvable levels bucketed by difficulty.")
+    parser.add_argument("--grid-size", type=int, default=5)
+    parser.add_argument("--piece-set", default="classic", choices=list(PIECE_SETS.keys()))
+    parser.add_argument("--per-tier", type=int, default=20, help="levels per difficulty tier")
+    parser.add_argument("--max-blocks", type=int, default=8)
+    parser.add_argument("--max-diamonds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-candidates", type=int, default=100000)
+    parser.add_argument("--checkpoint", default=None, help="checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--output", default="levels/classic_5x5.json")
+    args = parser.parse_args()
+
+    checkpoint = args.checkpoint or args.output + ".checkpoint"
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    generator = LevelGenerator(args.grid_size, args.piece_set, args.per_tier, args.max_blocks,
+                               args.max_diamonds, checkpoint=checkpoint, workers=args.workers)
+    pack = generator.run(args.max_candidates)
+    with open(args.output, "w") as f:
+        json.dump(pack, f)
+    print(f"Wrote {args.output}: {generator.progress()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Lockstep simulator: plays N full games at once, for evaluating one-ply policies and
+estimating level difficulty over thousands of games.
+
+Every game is a pair of uint64 kernel grids (see kernel.py), so the N games are two
+(N,) arrays and each step is a few array operations for all of them: legal-move masks
+against every placement, the chosen placements applied, full lines cleared (rows, or
+columns if no row is full, as in Kernel.play) and the per-game stats updated. Games that
+are won, stuck or out of moves drop out; the rest go on. Grids of up to 8x8.
+
+A policy is a function (games, index, legal) -> choice: for the games 'index' and their
+(len(index), placements) legal masks, the placement index each game plays. greedy_policy
+(fewest diamonds left, the GreedySearch heuristic) and random_policy are built in.
+
+    python lockstep.py --games 10000 --policy greedy --dealt
+    python lockstep.py --input boards.jsonl --repeats 200 --dealt --output difficulty.jsonl
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from algorithms import DEFAULT_BLOCKS, PIECE_SETS, generate_board
+from kernel import get_kernel
+
+# Games advanced together in one block of array operations; bounds the (games, placements)
+# arrays a step allocates.
+CHUNK_SIZE = 2048
+
+ZERO = np.uint64(0)
+
+
+def encode_stack(grids):
+    """uint64 kernel bits of an (N, size, size) stack of 0/1 grids."""
+    grids = np.asarray(grids, dtype=np.uint64)
+    flat = grids.reshape(len(grids), -1)
+    shifts = np.arange(flat.shape[1] - 1, -1, -1, dtype=np.uint64)
+    return np.bitwise_or.reduce(flat << shifts, axis=1) if len(flat) else np.zeros(0, dtype=np.uint64)
+
+
+class LockstepGames:
+    """
+    N games advanced in lockstep. Without 'hand_size' every piece of 'blocks' can be
+    placed at every move (as in the searchers); with it, hands of 'hand_size' pieces are
+    dealt per game like PieceDealer (drawn with replacement, optional 'weights') and a
+    game is over once no piece of its hand fits, as in solver.run_game. A game stops
+    when its diamonds are gone, when it is stuck or after 'max_moves' moves.
+    """
+    def __init__(self, boards, diamonds, blocks=None, hand_size=None, weights=None, max_moves=100, seed=0,
+                 chunk_size=CHUNK_SIZE):
+        boards = np.asarray(boards)
+        self.grid_size = boards.shape[-1]
+        if self.grid_size * self.grid_size > 64:
+            raise ValueError(f"Lockstep games fit grids of up to 8x8, not {self.grid_size}x{self.grid_size}")
+        self.blocks = blocks if blocks is not None else DEFAULT_BLOCKS
+        kernel = get_kernel(self.grid_size, self.blocks)
+        self.placements = kernel.placements
+        self.masks = np.array([mask for _, _, _, mask in kernel.placements], dtype=np.uint64)
+        self.pieces = np.array([piece for piece, _, _, _ in kernel.placements])
+        self.rows = np.array(kernel.row_masks, dtype=np.uint64)
+        self.cols = np.array(kernel.col_masks, dtype=np.uint64)
+
+        self.board = encode_stack(boards)
+        self.diamonds = encode_stack(diamonds)
+        count = len(self.board)
+        self.moves = np.zeros(count, dtype=np.int64)
+        self.lines = np.zeros(count, dtype=np.int64)
+        self.won = self.diamonds == 0
+        self.stuck = np.zeros(count, dtype=bool)
+        self.max_moves = max_moves
+        self.chunk_size = chunk_size
+        self.rng = np.random.default_rng(seed)
+
+        self.hand_size = hand_size
+        if hand_size:
+            self.hands = np.full((count, hand_size), -1)
+            self.weights = None
+            if weights is not None:
+                weights = np.asarray(weights, dtype=float)
+                self.weights = weights / weights.sum()
+
+    def __len__(self):
+        return len(self.board)
+
+    def active(self):
+        """Indices of the games still being played."""
+        return np.nonzero(~self.won & ~self.stuck & (self.moves < self.max_moves))[0]
+
+    def deal(self, index):
+        """Deal new hands to the games 'index' whose hand is used up."""
+        empty = index[(self.hands[index] < 0).all(axis=1)]
+        if len(empty):
+            self.hands[empty] = self.rng.choice(len(self.blocks), size=(len(empty), self.hand_size), p=self.weights)
+
+    def legal(self, index):
+        """(len(index), placements) mask of the placements that fit (and are in hand) in the games 'index'."""
+        legal = (self.board[index, None] & self.masks) == 0
+        if self.hand_size:
+            in_hand = (self.hands[index][:, :, None] == np.arange(len(self.blocks))).any(axis=1)
+            legal &= in_hand[:, self.pieces]
+        return legal
+
+    def clear(self, placed):
+        """
+        (cleared cells, lines cleared) for boards 'placed' of any shape just after a
+        placement: the full rows, or the full columns if no row is full.
+        """
+        full_rows = (placed[..., None] & self.rows) == self.rows
+        full_cols = (placed[..., None] & self.cols) == self.cols
+        rows = np.bitwise_or.reduce(np.where(full_rows, self.rows, ZERO), axis=-1)
+        cols = np.bitwise_or.reduce(np.where(full_cols, self.cols, ZERO), axis=-1)
+        any_row = rows != 0
+        return np.where(any_row, rows, cols), np.where(any_row, full_rows.sum(axis=-1), full_cols.sum(axis=-1))
+
+    def diamonds_after(self, index):
+        """(len(index), placements) diamonds left after each placement in the games 'index'."""
+        cleared, _ = self.clear(self.board[index, None] | self.masks)
+        return np.bitwise_count(self.diamonds[index, None] & ~cleared)
+
+    def step(self, index, policy):
+        """Play one move in each of the active games 'index'."""
+        if self.hand_size:
+            self.deal(index)
+        legal = self.legal(index)
+        can_move = legal.any(axis=1)
+        self.stuck[index[~can_move]] = True
+        index, legal = index[can_move], legal[can_move]
+        if not len(index):
+            return
+        choice = policy(self, index, legal)
+        placed = self.board[index] | self.masks[choice]
+        cleared, lines = self.clear(placed)
+        self.board[index] = placed & ~cleared
+        self.diamonds[index] &= ~cleared
+        self.moves[index] += 1
+        self.lines[index] += lines
+        self.won[index] = self.diamonds[index] == 0
+        if self.hand_size:
+            # Spend one copy of the placed piece: its first slot in the hand.
+            hands = self.hands[index]
+            slot = (hands == self.pieces[choice][:, None]).argmax(axis=1)
+            hands[np.arange(len(index)), slot] = -1
+            self.hands[index] = hands
+
+    def play(self, policy):
+        """Play every game to its end with 'policy' and return stats()."""
+        while True:
+            index = self.active()
+            if not len(index):
+                break
+            for start in range(0, len(index), self.chunk_size):
+                self.step(index[start:start + self.chunk_size], policy)
+        return self.stats()
+
+    def stats(self):
+        """Per-game arrays: won, stuck, moves, lines cleared and diamonds left."""
+        return {
+            "won": self.won.copy(),
+            "stuck": self.stuck.copy(),
+            "moves": self.moves.copy(),
+            "lines": self.lines.copy(),
+            "diamonds_left": np.bitwise_count(self.diamonds).astype(np.int64),
+        }
+
+
+def pick(games, score, legal):
+    """Lowest-scoring legal placement of each game, ties broken at random."""
+    score = score + 0.5 * games.rng.random(score.shape)
+    score[~legal] = np.inf
+    return score.argmin(axis=1)
+
+
+def greedy_policy(games, index, legal):
+    """The placement leaving the fewest diamonds (GreedySearch.evaluate_move)."""
+    return pick(games, games.diamonds_after(index).astype(float), legal)
+
+
+def random_policy(games, index, legal):
+    """A uniformly random legal placement."""
+    return pick(games, np.zeros(legal.shape), legal)
+
+
+POLICIES = {
+    "greedy": greedy_policy,
+    "random": random_policy,
+}
+
+
+def estimate_difficulty(boards, diamonds, repeats=100, policy=greedy_policy, **options):
+    """
+    Play every board 'repeats' times (with different hands in dealt mode) and return
+    per-board arrays: the win rate and the mean moves of the won games (nan if none).
+    """
+    games = LockstepGames(np.repeat(np.asarray(boards), repeats, axis=0),
+                          np.repeat(np.asarray(diamonds), repeats, axis=0), **options)
+    stats = games.play(policy)
+    won = stats["won"].reshape(-1, repeats)
+    moves = np.where(won, stats["moves"].reshape(-1, repeats), 0)
+    with np.errstate(invalid="ignore"):
+        mean_moves = moves.sum(axis=1) / won.sum(axis=1)
+    return {"win_rate": won.mean(axis=1), "moves": mean_moves}
+
+
+def main():
+    from batch_solve import read_boards
+
+    parser = argparse.ArgumentParser(description="Play many games in lockstep with a one-ply policy.")
+    parser.add_argument("--input", help="JSON Lines file or .npy stack of boards (default: random boards)")
+    parser.add_argument("--games", type=int, default=10000, help="random boards to generate")
+    parser.add_argument("--grid-size", type=int, default=5)
+    parser.add_argument("--piece-set", default="classic", choices=list(PIECE_SETS.keys()))
+    parser.add_argument("--policy", default="greedy", choices=list(POLICIES.keys()))
+    parser.add_argument("--dealt", action="store_true", help="deal hands of three pieces")
+    parser.add_argument("--max-moves", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=None,
+                        help="play each input board this many times and write its difficulty")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="-", help="per-board difficulty JSON Lines (with --repeats)")
+    args = parser.parse_args()
+
+    blocks = PIECE_SETS[args.piece_set]
+    if args.input:
+        ids, boards, diamonds = zip(*read_boards(args.input))
+    else:
+        rng = random.Random(args.seed)
+        ids = range(args.games)
+        boards, diamonds = zip(*(generate_board(grid_size=args.grid_size, rng=rng) for _ in ids))
+    options = {"blocks": blocks, "hand_size": 3 if args.dealt else None, "max_moves": args.max_moves,
+               "seed": args.seed}
+    policy = POLICIES[args.policy]
+
+    start = time.perf_counter()
+    if args.repeats:
+        difficulty = estimate_difficulty(boards, diamonds, args.repeats, policy, **options)
+        elapsed = time.perf_counter() - start
+        out = sys.stdout if args.output == "-" else open(args.output, "w")
+        try:
+            for board_id, win_rate, moves in zip(ids, difficulty["win_rate"], difficulty["moves"]):
+                out.write(json.dumps({"id": board_id, "win_rate": float(win_rate),
+                                      "moves": None if np.isnan(moves) else float(moves)}) + "\n")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        played = len(boards) * args.repeats
+    else:
+        stats = LockstepGames(boards, diamonds, **options).play(policy)
+        elapsed = time.perf_counter() - start
+        played = len(boards)
+        print(f"won {stats['won'].mean():.1%}, stuck {stats['stuck'].mean():.1%}, "
+              f"mean moves {stats['moves'].mean():.2f}, mean lines {stats['lines'].mean():.2f}, "
+              f"mean diamonds left {stats['diamonds_left'].mean():.2f}")
+    print(f"{played} games with the {args.policy} policy in {elapsed:.2f}s ({played / elapsed:.0f} games/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,63 +4,196 @@ from PIL import Image, ImageTk
 import time 
 import random
 from blind_search import DFS, BFS, UniformCostSearch, IterativeDeepeningSearch
-from informed_search import GreedySearch, AStarSearch, WeightedAStarSearch
+from informed_search import GreedySearch, AStarSearch, WeightedAStarSearch, AnytimeWeightedAStarSearch, BeamSearch
+from expectimax_search import ExpectimaxSearch
+from mcts_search import MCTSSearch
+from algorithms import DEFAULT_BLOCKS, PIECE_SETS, PieceDealer, generate_board
+from level_generator import load_pack, pick_level
+import os
+from solver import first_legal_move, rank_moves
+
+# Colores de los hints, de la mejor jugada a la peor.
+HINT_COLORS = ["orange", "gold", "khaki"]
 
 
 class WoodBlockAI:
-    def __init__(self, grid_size=5, chosen_algorithm=None):
-        """Inicializa el juego con un tamaño de tablero y un algoritmo de IA."""
+    def __init__(self, grid_size=5, chosen_algorithm=None, blocks=None, dealer=None):
+        """
+        Inicializa el juego con un tamaño de tablero, un conjunto de piezas y un algoritmo de IA.
+        Con un PieceDealer se juega en modo reparto: solo se pueden colocar las piezas de la mano.
+        """
         self.grid_size = grid_size
+        self.blocks = blocks if blocks is not None else DEFAULT_BLOCKS
+        self.dealer = dealer
+        self.hand = dealer.deal() if dealer is not None else None
         self.board = np.zeros((grid_size, grid_size), dtype=int)
         self.diamonds = np.zeros((grid_size, grid_size), dtype=int)
         self.chosen_algorithm = chosen_algorithm
         self.ALGORITHM_NAME_MAP = {
-            "BFS": BFS(self.board, self.diamonds),
-            "DFS": DFS(self.board, self.diamonds),
-            "UCS": UniformCostSearch(self.board, self.diamonds),  
-            "Iterative Deepening" : IterativeDeepeningSearch(self.board, self.diamonds),
-            "Greedy": GreedySearch("Greedy", self.board, self.diamonds),
-            "A*": AStarSearch("A*", self.board, self.diamonds),
-            "A* weighted": WeightedAStarSearch("A* Weighted", self.board, self.diamonds, w=1.5),
+            "BFS": BFS(self.board, self.diamonds, blocks=self.blocks),
+            "DFS": DFS(self.board, self.diamonds, blocks=self.blocks),
+            "UCS": UniformCostSearch(self.board, self.diamonds, blocks=self.blocks),  
+            "Iterative Deepening" : IterativeDeepeningSearch(self.board, self.diamonds, blocks=self.blocks),
+            "Greedy": GreedySearch("Greedy", self.board, self.diamonds, blocks=self.blocks),
+            "A*": AStarSearch("A*", self.board, self.diamonds, blocks=self.blocks),
+            "A* weighted": WeightedAStarSearch("A* Weighted", self.board, self.diamonds, w=1.5, blocks=self.blocks),
+            "Expectimax": ExpectimaxSearch("Expectimax", self.board, self.diamonds, blocks=self.blocks,
+                                           dealer=dealer if dealer is not None else PieceDealer(self.blocks)),
+            "MCTS": MCTSSearch("MCTS", self.board, self.diamonds, blocks=self.blocks, time_limit=1.0),
+            "ARA*": AnytimeWeightedAStarSearch("ARA*", self.board, self.diamonds, time_limit=1.0, blocks=self.blocks),
+            "Beam": BeamSearch("Beam", self.board, self.diamonds, width=20, blocks=self.blocks),
         }
+        # Posiciones de cada pieza: anclas (x, y) con índice x * grid_size + y y sus celdas,
+        # y para cada celda, las jugadas (pieza, ancla) que la ocupan.
+        self.block_ids = {}
+        self.covering = [[[] for _ in range(grid_size)] for _ in range(grid_size)]
+        self.anchors = []
+        for b, block in enumerate(self.blocks):
+            self.block_ids.setdefault(self.block_key(block), b)
+            block_h, block_w = len(block), len(block[0])
+            anchors = []
+            for x in range(grid_size - block_h + 1):
+                for y in range(grid_size - block_w + 1):
+                    cells = [(x + i, y + j) for i in range(block_h) for j in range(block_w) if block[i][j] == 1]
+                    anchors.append((x * grid_size + y, cells))
+                    for i, j in cells:
+                        self.covering[i][j].append((b, x * grid_size + y))
+            self.anchors.append(anchors)
+        self.set_board(self.board, self.diamonds)
 
 
     def set_board(self, board, diamonds):
-        """Establece el estado inicial del tablero."""
+        """
+        Establece el estado inicial del tablero y recalcula desde cero lo que después se
+        actualiza jugada a jugada: celdas llenas por fila y columna, diamantes restantes y,
+        por pieza, cuántas celdas ocupadas tapa cada posición y el bitmap de posiciones libres.
+        """
         self.board = np.array(board)
         self.diamonds = np.array(diamonds)
+        self.diamond_count = int(self.diamonds.sum())
+        self.row_fill = self.board.sum(axis=1).tolist()
+        self.col_fill = self.board.sum(axis=0).tolist()
+        self.blocked = []
+        self.legal = []
+        for anchors in self.anchors:
+            blocked = {anchor: sum(int(self.board[i][j]) for i, j in cells) for anchor, cells in anchors}
+            self.blocked.append(blocked)
+            self.legal.append(sum(1 << anchor for anchor, count in blocked.items() if count == 0))
+
+    @staticmethod
+    def block_key(block):
+        return tuple(tuple(row) for row in block)
+
+    def set_cell(self, i, j, value):
+        """Llena (1) o vacía (0) una celda y actualiza los contadores y los bitmaps de las piezas que la tapan."""
+        if self.board[i][j] == value:
+            return
+        self.board[i][j] = value
+        step = 1 if value else -1
+        self.row_fill[i] += step
+        self.col_fill[j] += step
+        for b, anchor in self.covering[i][j]:
+            count = self.blocked[b][anchor] + step
+            self.blocked[b][anchor] = count
+            if count == 0:
+                self.legal[b] |= 1 << anchor
+            elif count == 1 and value:
+                self.legal[b] &= ~(1 << anchor)
+
+    def place_block(self, block, x, y):
+        """Coloca un bloque en (x, y); las líneas completas se borran después con clear_lines."""
+        for i in range(len(block)):
+            for j in range(len(block[0])):
+                if block[i][j] == 1:
+                    self.set_cell(x + i, y + j, 1)
+
+    def complete_lines(self):
+        """Filas y columnas llenas, según los contadores."""
+        rows = [i for i in range(self.grid_size) if self.row_fill[i] == self.grid_size]
+        cols = [j for j in range(self.grid_size) if self.col_fill[j] == self.grid_size]
+        return rows, cols
+
+    def clear_lines(self, rows, cols):
+        """Vacía las filas y columnas dadas junto con sus diamantes."""
+        cells = {(row, j) for row in rows for j in range(self.grid_size)}
+        cells |= {(i, col) for col in cols for i in range(self.grid_size)}
+        for i, j in cells:
+            self.set_cell(i, j, 0)
+            if self.diamonds[i][j] == 1:
+                self.diamonds[i][j] = 0
+                self.diamond_count -= 1
+
+    def has_moves(self):
+        """Si alguna pieza disponible cabe en algún sitio."""
+        return any(self.legal[self.block_ids[self.block_key(block)]] for block in self.current_blocks())
+
+    def current_blocks(self):
+        """Piezas disponibles: la mano en modo reparto, o todas las piezas."""
+        return self.hand if self.dealer is not None else self.blocks
+
+    def deal_hand(self):
+        """Reparte una mano nueva (solo en modo reparto)."""
+        if self.dealer is not None:
+            self.hand = self.dealer.deal()
+
+    def use_block(self, block):
+        """En modo reparto, retira de la mano la pieza jugada y reparte otra mano al vaciarse."""
+        if self.dealer is None:
+            return
+        self.hand.remove(block)
+        if not self.hand:
+            self.deal_hand()
 
     def possible_moves(self, block):
-        """Devuelve todas las posiciones donde se puede colocar un bloque."""
-        block_h, block_w = len(block), len(block[0])
+        """Devuelve todas las posiciones donde se puede colocar un bloque, leídas de su bitmap."""
+        bits = self.legal[self.block_ids[self.block_key(block)]]
         moves = []
-        for i in range(self.grid_size - block_h + 1):
-            for j in range(self.grid_size - block_w + 1):
-                if self.can_place_block(block, i, j):
-                    moves.append((i, j))
+        while bits:
+            low = bits & -bits
+            moves.append(divmod(low.bit_length() - 1, self.grid_size))
+            bits ^= low
         return moves
 
     def can_place_block(self, block, x, y):
         """Verifica si se puede colocar un bloque en (x, y)."""
-        block_h, block_w = len(block), len(block[0])
-        for i in range(block_h):
-            for j in range(block_w):
-                if block[i][j] == 1 and self.board[x + i][y + j] == 1:
-                    return False  
-        return True
+        if not (0 <= x < self.grid_size and 0 <= y < self.grid_size):
+            return False
+        return bool(self.legal[self.block_ids[self.block_key(block)]] >> (x * self.grid_size + y) & 1)
 
     def best_move(self, blocks):
         """Encuentra la mejor jugada basada en la cantidad de diamantes destruidos."""
 
-        search_algorithm = self.ALGORITHM_NAME_MAP.get(self.chosen_algorithm, BFS(self.board, self.diamonds))  # Default to BFS if not found  , BFS(self.board, self.diamonds)
+        search_algorithm = self.ALGORITHM_NAME_MAP.get(self.chosen_algorithm, BFS(self.board, self.diamonds, blocks=self.blocks))  # Default to BFS if not found  , BFS(self.board, self.diamonds)
+        if blocks is not None:
+            search_algorithm.blocks = blocks
+        search_algorithm.set_hand(self.hand)
         
-        default_block = [[1, 1, 1]]
-        possible_moves = search_algorithm.possible_moves(default_block)
-        print("Possible moves (from initial state):", possible_moves)
-        move = search_algorithm.get_best_move(possible_moves, self.board, self.diamonds)
+        search_algorithm.board = self.board
+        search_algorithm.grid_size = self.grid_size
+        # Los algoritmos generan sus propias jugadas con las piezas disponibles.
+        if search_algorithm.is_unsolvable(self.board, self.diamonds):
+            # Algún diamante ya no se puede eliminar: no hace falta buscar.
+            print("Unsolvable board: some diamond can never be cleared.")
+            move = None
+        else:
+            move = search_algorithm.get_best_move(None, self.board, self.diamonds)
+        if move is None and self.dealer is not None:
+            # En modo reparto hay que seguir colocando piezas aunque no haya plan.
+            move = first_legal_move(search_algorithm, self.board, self.hand)
         print(f"Best move found using {search_algorithm.name}:", move)
         return move
 
+    def rank_moves(self, blocks=None, max_nodes=None):
+        """
+        Todas las jugadas legales con los movimientos que faltan para ganar empezando por
+        cada una, calculados con una sola búsqueda compartida (ver solver.rank_moves).
+        Devuelve pares (distancia, (bloque, x, y)) de mejor a peor; distancia None si no
+        se encontró solución dentro del límite de nodos.
+        """
+        result = rank_moves(self.board, self.diamonds, blocks=blocks if blocks is not None else self.blocks,
+                            hand=self.hand if self.dealer is not None else None, max_nodes=max_nodes)
+        return result["ranking"]
+
 
 
 class AlgorithmSelectionDialog(tk.Toplevel):
@@ -68,7 +201,7 @@ class AlgorithmSelectionDialog(tk.Toplevel):
         super().__init__(master)
         self.title("Selecciona Algoritmo")
         self.callback = callback
-        self.geometry("300x150")
+        self.geometry("300x190")
         self.resizable(False, False)
         self.grab_set() 
 
@@ -76,13 +209,18 @@ class AlgorithmSelectionDialog(tk.Toplevel):
             self, text="Select AI Algorithm:", font=("Helvetica", 14)
         ).pack(pady=10)
 
-        self.algorithms = ["BFS","DFS", "UCS" ,"A*", "A* weighted", "Greedy", "Iterative Deepening"]
+        self.algorithms = ["BFS","DFS", "UCS" ,"A*", "A* weighted", "Greedy", "Iterative Deepening", "Expectimax", "MCTS", "ARA*", "Beam"]
         self.selected_algo = tk.StringVar(self)
         self.selected_algo.set(self.algorithms[0])
         option_menu = tk.OptionMenu(self, self.selected_algo, *self.algorithms)
         option_menu.config(font=("Helvetica", 12))
         option_menu.pack(pady=5)
 
+        self.dealt = tk.BooleanVar(self, value=False)
+        tk.Checkbutton(
+            self, text="Deal 3 random pieces per round", variable=self.dealt
+        ).pack()
+
         tk.Button(
             self, text="Start Game", font=("Helvetica", 12), command=self.on_start
         ).pack(pady=10)
@@ -90,7 +228,7 @@ class AlgorithmSelectionDialog(tk.Toplevel):
     def on_start(self):
         algo = self.selected_algo.get()
         print(f"Chosen Algorithm: {algo}")
-        self.callback("IA", algo)
+        self.callback("IA", algo, self.dealt.get())
         self.destroy()
 
 
@@ -103,7 +241,8 @@ class WoodBlockGUI(tk.Frame):
         self.mode = mode 
         self.grid_size = game.grid_size
         self.selected_block = None
-        
+        self.check_timer = None
+
 
         self.pack(expand=True, fill="both")
 
@@ -128,15 +267,9 @@ class WoodBlockGUI(tk.Frame):
             tk.Label(self.control_frame, text="Choose a block:").pack(
                 side="left", padx=5
             )
-            for idx, block in enumerate(self.blocks):
-                preview = self.create_block_preview(block)
-                frame = tk.Frame(self.control_frame, bd=2, relief="raised")
-                preview.pack(in_=frame)
-                frame.pack(side="left", padx=3)
-                preview.bind(
-                    "<Button-1>", lambda e, b=block: self.set_selected_block(b)
-                )
-                frame.bind("<Button-1>", lambda e, b=block: self.set_selected_block(b))
+            self.hand_frame = tk.Frame(self.control_frame)
+            self.hand_frame.pack(side="left")
+            self.draw_hand()
             self.canvas.bind("<Button-1>", self.on_canvas_click)
             self.hint_button = tk.Button(
                 self.control_frame, text="Hint", command=self.show_hint
@@ -149,13 +282,22 @@ class WoodBlockGUI(tk.Frame):
         self.reset_button.pack(side="left", padx=5)
         
 
-    def show_hint(self):
-        """Muestra un hint de la mejor jugada posible."""
-        
-        move = self.game.best_move(self.blocks)
-        if move is not None:
-            block, x, y = move
-            
+    def show_hint(self, count=len(HINT_COLORS), max_nodes=50000):
+        """
+        Muestra las 'count' mejores jugadas, coloreadas de mejor a peor, con los movimientos
+        que faltan para ganar con cada una. Si hay una pieza seleccionada, solo sus jugadas.
+        """
+        ranking = self.game.rank_moves(self.blocks, max_nodes=max_nodes)
+        if self.selected_block is not None:
+            ranking = [entry for entry in ranking if entry[1][0] == self.selected_block]
+        hints = [entry for entry in ranking if entry[0] is not None][:count] or ranking[:1]
+        if not hints:
+            print("No possible moves for hint.")
+            return
+        # La mejor jugada se dibuja la última para que quede encima de las demás.
+        for rank in reversed(range(len(hints))):
+            distance, (block, x, y) = hints[rank]
+            print(f"Hint {rank + 1}: {block} at ({x}, {y}), moves to win: {distance}")
             for i in range(len(block)):
                 for j in range(len(block[0])):
                     if block[i][j] == 1:
@@ -164,12 +306,38 @@ class WoodBlockGUI(tk.Frame):
                         x2 = x1 + self.cell_size
                         y2 = y1 + self.cell_size
                         self.canvas.create_rectangle(
-                            x1, y1, x2, y2, fill="orange", outline="black"
+                            x1, y1, x2, y2, fill=HINT_COLORS[rank], outline="black"
                         )
-            
-            self.after(600, self.draw_board)
-        else:
-            print("No possible moves for hint.")
+            if distance is not None:
+                self.canvas.create_text(
+                    self.x_offset + (y + 0.5) * self.cell_size,
+                    self.y_offset + (x + 0.5) * self.cell_size,
+                    text=str(distance),
+                )
+
+        self.after(1500, self.draw_board)
+
+    def draw_hand(self):
+        """Dibuja las piezas disponibles (la mano actual en modo reparto)."""
+        for child in self.hand_frame.winfo_children():
+            child.destroy()
+        for block in self.game.current_blocks():
+            preview = self.create_block_preview(block)
+            frame = tk.Frame(self.hand_frame, bd=2, relief="raised")
+            preview.pack(in_=frame)
+            frame.pack(side="left", padx=3)
+            preview.bind(
+                "<Button-1>", lambda e, b=block: self.set_selected_block(b)
+            )
+            frame.bind("<Button-1>", lambda e, b=block: self.set_selected_block(b))
+
+    def use_block(self, block):
+        """Retira la pieza de la mano (modo reparto) y actualiza las previsualizaciones."""
+        if self.game.dealer is None:
+            return
+        self.game.use_block(block)
+        if self.mode != "IA":
+            self.draw_hand()
 
     def create_block_preview(self, block):
         """Crea un canvas pequeño que representa gráficamente el bloque."""
@@ -247,13 +415,11 @@ class WoodBlockGUI(tk.Frame):
             return
 
         if self.game.can_place_block(self.selected_block, i, j):
-            for di in range(len(self.selected_block)):
-                for dj in range(len(self.selected_block[0])):
-                    if self.selected_block[di][dj] == 1:
-                        self.game.board[i + di][j + dj] = 1
+            self.game.place_block(self.selected_block, i, j)
+            self.use_block(self.selected_block)
+            # clear_complete_lines comprueba el fin de la partida, una sola vez por jugada.
             self.clear_complete_lines()
             self.draw_board()
-            self.check_game_over()
             self.selected_block = None
         else:
             print("Invalid movement in position:", i, j)
@@ -339,8 +505,7 @@ class WoodBlockGUI(tk.Frame):
 
     def clear_complete_lines(self):
         print("clear_complete_lines called")
-        rows_to_clear = [i for i in range(self.grid_size) if all(self.game.board[i])]
-        cols_to_clear = [j for j in range(self.grid_size) if all(self.game.board[:, j])]
+        rows_to_clear, cols_to_clear = self.game.complete_lines()
         print("Rows to clear:", rows_to_clear)
         print("Columns to clear:", cols_to_clear)
         if rows_to_clear or cols_to_clear:
@@ -351,12 +516,7 @@ class WoodBlockGUI(tk.Frame):
 
     def _clear_lines(self, rows, cols):
         print("Clearing lines for rows:", rows, "and columns:", cols)
-        for row in rows:
-            self.game.board[row] = np.zeros(self.grid_size, dtype=int)
-            self.game.diamonds[row] = np.zeros(self.grid_size, dtype=int)
-        for col in cols:
-            self.game.board[:, col] = np.zeros(self.grid_size, dtype=int)
-            self.game.diamonds[:, col] = np.zeros(self.grid_size, dtype=int)
+        self.game.clear_lines(rows, cols)
         print("Board state after clearing lines:")
         print(self.game.board)
         self.draw_board()
@@ -419,13 +579,10 @@ class WoodBlockGUI(tk.Frame):
             print("No possible moves.")
 
     def commit_move(self, block, x, y):
-        for i in range(len(block)):
-            for j in range(len(block[0])):
-                if block[i][j] == 1:
-                    self.game.board[x + i][y + j] = 1
+        self.game.place_block(block, x, y)
+        self.use_block(block)
         self.clear_complete_lines()
         self.draw_board()
-        self.check_game_over()
 
     def reset_game(self):
         board = [[0] * self.grid_size for _ in range(self.grid_size)]
@@ -434,20 +591,31 @@ class WoodBlockGUI(tk.Frame):
         board[2][2] = board[2][3] = 1
         diamonds[1][3] = 1
         diamonds[2][2] = 1
+        self.cancel_check()
         self.game.set_board(board, diamonds)
+        self.game.deal_hand()
+        if self.mode != "IA":
+            self.draw_hand()
         self.draw_board()
 
     def check_game_over(self):
-        if np.sum(self.game.diamonds) == 0:
+        if self.game.diamond_count == 0:
             self.show_game_over("YOU'VE WON")
             self.game_over = True
             return True
-        self.after(1500, self._check_moves)
+        # Un solo temporizador pendiente: cada jugada reprograma la comprobación.
+        self.cancel_check()
+        self.check_timer = self.after(1500, self._check_moves)
         return False
 
+    def cancel_check(self):
+        if self.check_timer is not None:
+            self.after_cancel(self.check_timer)
+            self.check_timer = None
+
     def _check_moves(self):
-        has_moves = any(self.game.possible_moves(block) for block in self.blocks)
-        if not has_moves:
+        self.check_timer = None
+        if not self.game.has_moves():
             print("No possible moves left, YOU'VE LOST.")
             self.show_game_over("YOU'VE LOST")
             self.game_over = True
@@ -460,6 +628,7 @@ class WoodBlockGUI(tk.Frame):
             self.after_cancel(self.auto_timer)
         if hasattr(self, "animation_timer"):
             self.after_cancel(self.animation_timer)
+        self.cancel_check()
         
         self.canvas.delete("all")
         cw = self.canvas.winfo_width()
@@ -565,22 +734,24 @@ class StartScreen(tk.Frame):
 
 
 class GameScreen(tk.Frame):
-    def __init__(self, master, mode, algorithm=None):
+    def __init__(self, master, mode, algorithm=None, grid_size=5, blocks=None, dealt=False, seed=None):
         super().__init__(master)
         self.master = master
         self.mode = mode
         self.algorithm = algorithm  
 
-        grid_size = 5  
-        board, diamonds = self.generate_board(grid_size = grid_size , max_blocks=8, max_diamonds=5)
-
-        game = WoodBlockAI(grid_size, chosen_algorithm=algorithm)
+        if blocks is None:
+            blocks = DEFAULT_BLOCKS  # Horizontal de 3, vertical de 3 y cuadrado 2x2
+        self.blocks = blocks
+        # Con una semilla, el tablero y las manos repartidas son reproducibles.
+        self.rng = random.Random(seed) if seed is not None else random
+
+        # Las formaciones y los diamantes escalan con el área del tablero (8 y 5 en 5x5).
+        area = grid_size * grid_size
+        board, diamonds = self.generate_board(grid_size = grid_size , max_blocks=8 * area // 25, max_diamonds=5 * area // 25)
+        dealer = PieceDealer(blocks, seed=seed) if dealt else None
+        game = WoodBlockAI(grid_size, chosen_algorithm=algorithm, blocks=blocks, dealer=dealer)
         game.set_board(board, diamonds)
-        blocks = [
-            [[1, 1, 1]],  # Horizontal Block de 3
-            [[1], [1], [1]],  # Vertical Block de 3
-            [[1, 1], [1, 1]],  # Squared Block de 2x2
-        ]
 
         if self.mode == "IA":
             print(
@@ -608,9 +779,22 @@ class GameScreen(tk.Frame):
         home_button.place(relx=0.98, rely=0.02, anchor="ne")
         
     
+    def load_level_pack(self, grid_size):
+        """Carga el pack de niveles pre-generado (level_generator.py) para este tablero y estas piezas, si existe."""
+        piece_set = next((name for name, pieces in PIECE_SETS.items() if pieces == self.blocks), None)
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels", f"{piece_set}_{grid_size}x{grid_size}.json")
+        if piece_set is None or not os.path.exists(path):
+            return None
+        try:
+            return load_pack(path)
+        except Exception as e:
+            print("Error loading level pack:", e)
+            return None
+
     def generate_board(self, grid_size=5, max_blocks=8, max_diamonds=5):
         """
-        Genera un tablero (board) y un arreglo de diamantes (diamonds) para el juego,
+        Elige al instante un nivel resoluble del pack pre-generado si existe; si no,
+        genera un tablero (board) y un arreglo de diamantes (diamonds) para el juego,
         favoreciendo la creación de pequeñas formaciones (clusters) juntas.
         
         Parámetros:
@@ -621,69 +805,25 @@ class GameScreen(tk.Frame):
         Devuelve:
         board, diamonds: dos listas de listas (grid_size x grid_size) con valores 0 o 1.
         """
-        board = [[0] * grid_size for _ in range(grid_size)]
-        diamonds = [[0] * grid_size for _ in range(grid_size)]
-        
-
-        cluster_patterns = [
-            [(0, 0)],                               
-            [(0, 0), (0, 1), (1, 0), (1, 1)],        
-            [(0, 0), (0, 1)],                        
-            [(0, 0), (1, 0)],                        
-            [(0, 0), (0, 1), (0, 2)],                  
-            [(0, 0), (1, 0), (2, 0)]                   
-        ]
-        
-        blocks_placed = 0
-        attempts = 0
-        while blocks_placed < max_blocks and attempts < 20:
-            attempts += 1
-            pattern = random.choice(cluster_patterns)
-            if len(pattern) > max_blocks - blocks_placed:
-                continue
-            max_x = grid_size - max(p[0] for p in pattern)
-            max_y = grid_size - max(p[1] for p in pattern)
-            if max_x <= 0 or max_y <= 0:
-                continue
-            x = random.randint(0, max_x - 1)
-            y = random.randint(0, max_y - 1)
-            can_place = True
-            for dx, dy in pattern:
-                if board[x + dx][y + dy] == 1:
-                    can_place = False
-                    break
-            if can_place:
-                
-                for dx, dy in pattern:
-                    board[x + dx][y + dy] = 1
-                    blocks_placed += 1
-                    if blocks_placed >= max_blocks:
-                        break
-
-        
-        diamond_count = 0
-        
-        block_positions = [(i, j) for i in range(grid_size) for j in range(grid_size) if board[i][j] == 1]
-        random.shuffle(block_positions)
-        for pos in block_positions:
-            if diamond_count < max_diamonds:
-                
-                if random.random() < 0.5:
-                    i, j = pos
-                    diamonds[i][j] = 1
-                    diamond_count += 1
-            else:
-                break
-
-        return board, diamonds
+        pack = self.load_level_pack(grid_size)
+        if pack is not None:
+            level = pick_level(pack, rng=self.rng)
+            print(f"Level {level['id']} ({level['moves']} moves)")
+            return [list(row) for row in level["board"]], [list(row) for row in level["diamonds"]]
+        return generate_board(grid_size=grid_size, max_blocks=max_blocks, max_diamonds=max_diamonds, rng=self.rng)
 
 
 class MainApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, grid_size=5, blocks=None, dealt=False, seed=None):
         super().__init__()
         self.title("Wood Block Game")
         self.geometry("500x600")
         self.resizable(False, False)
+        self.grid_size = grid_size
+        self.blocks = blocks
+        self.dealt = dealt
+        # Con una semilla, cada partida empieza con el mismo tablero y las mismas manos.
+        self.seed = seed
         self.current_frame = None
         self.show_start_screen()
 
@@ -697,13 +837,24 @@ class MainApp(tk.Tk):
         
         AlgorithmSelectionDialog(self, self.start_game)
 
-    def start_game(self, mode, algorithm=None):
+    def start_game(self, mode, algorithm=None, dealt=None):
         if self.current_frame:
             self.current_frame.destroy()
-        self.current_frame = GameScreen(self, mode, algorithm)
+        if dealt is None:
+            dealt = self.dealt
+        self.current_frame = GameScreen(self, mode, algorithm, grid_size=self.grid_size, blocks=self.blocks, dealt=dealt,
+                                        seed=self.seed)
         self.current_frame.pack(expand=True, fill="both")
 
 
 if __name__ == "__main__":
-    app = MainApp()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Wood Block Game")
+    parser.add_argument("--grid-size", type=int, default=5)
+    parser.add_argument("--piece-set", default="classic", choices=list(PIECE_SETS.keys()))
+    parser.add_argument("--dealt", action="store_true", help="jugar con manos repartidas")
+    parser.add_argument("--seed", type=int, default=None, help="semilla del tablero y de las manos")
+    args = parser.parse_args()
+    app = MainApp(grid_size=args.grid_size, blocks=PIECE_SETS[args.piece_set], dealt=args.dealt, seed=args.seed)
     app.mainloop()
@@ -0,0 +1,264 @@
+import copy
+import math
+import random
+import time
+
+from algorithms import SearchAlgorithm
+from informed_search import GreedySearch
+from kernel import decode, encode, popcount
+
+try:
+    import numpy as np
+except ImportError:  # NumPy only speeds up the rollouts; the search works without it.
+    np = None
+
+
+class MCTSNode:
+    """Statistics of one state in the search tree. Nodes are shared by every path reaching the state."""
+    __slots__ = ("board", "diamonds", "visits", "value", "untried", "edges", "terminal")
+
+    def __init__(self, board, diamonds, untried, terminal):
+        self.board = board
+        self.diamonds = diamonds
+        self.visits = 0
+        self.value = 0.0
+        self.untried = untried   # kernel placements not expanded yet
+        self.edges = []          # (placement, child_hash) for the expanded moves
+        self.terminal = terminal
+
+
+def placement_masks(blocks, grid_size):
+    """
+    Boolean (P, grid_size, grid_size) array with one mask per placement of every block,
+    plus the matching list of (block, (x, y)) placements.
+    """
+    masks, placements = [], []
+    for block in blocks:
+        block_h, block_w = len(block), len(block[0])
+        for x in range(grid_size - block_h + 1):
+            for y in range(grid_size - block_w + 1):
+                mask = np.zeros((grid_size, grid_size), dtype=bool)
+                mask[x:x + block_h, y:y + block_w] = np.array(block, dtype=bool)
+                masks.append(mask)
+                placements.append((block, (x, y)))
+    return np.array(masks), placements
+
+
+class MCTSSearch(SearchAlgorithm):
+    """
+    Monte Carlo Tree Search with UCT selection.
+
+    - The tree is a transposition table: nodes are keyed by state hash, so placing
+      A then B and B then A share the statistics of the resulting state.
+    - Each iteration expands one move and runs 'batch_size' rollouts from it in one go;
+      with vectorized=True (and NumPy installed) the batch is played in lockstep as
+      (batch, grid, grid) arrays.
+    - Rollouts follow the greedy policy of GreedySearch.evaluate_move (fewest remaining
+      diamonds among a few sampled moves), with 'epsilon' random moves.
+    - The search is anytime: it stops after 'time_limit' seconds (or 'max_iterations')
+      and returns the most visited root move.
+    """
+    def __init__(self, name, board, diamonds, description="Monte Carlo Tree Search", blocks=None,
+                 time_limit=1.0, max_iterations=None, exploration=1.4, batch_size=8, rollout_depth=20,
+                 rollout_candidates=6, epsilon=0.1, vectorized=False, rollout_policy=None, seed=0):
+        super().__init__(name, board, diamonds, description, blocks)
+        self.time_limit = time_limit
+        self.max_iterations = max_iterations
+        self.exploration = exploration
+        self.batch_size = batch_size
+        self.rollout_depth = rollout_depth
+        self.rollout_candidates = rollout_candidates
+        self.epsilon = epsilon
+        self.vectorized = vectorized and np is not None
+        self.rollout_policy = rollout_policy if rollout_policy is not None else GreedySearch(
+            "Greedy rollout", board, diamonds, blocks=self.blocks)
+        self.seed = seed
+        self.iterations = 0
+        self.rollouts = 0
+
+    def evaluate_move(self, board, diamonds, block, move):
+        return self.rollout_policy.evaluate_move(board, diamonds, block, move)
+
+    def get_best_move(self, possible_moves, board, diamonds):
+        """
+        Run MCTS from the given board until the time budget is spent and return the
+        most visited first move as (block, x, y), or None if no move is possible.
+        """
+        deadline = time.perf_counter() + self.time_limit
+        board = board.tolist() if hasattr(board, "tolist") else copy.deepcopy(board)
+        diamonds = diamonds.tolist() if hasattr(diamonds, "tolist") else copy.deepcopy(diamonds)
+        self.board = board
+        self.diamonds = diamonds
+        self.grid_size = len(board)
+        self.rollout_policy.grid_size = self.grid_size
+        self.reset_stats()
+        self.iterations = 0
+        self.rollouts = 0
+        self.rng = random.Random(self.seed)
+        self.blocks_in_play = self.available_blocks()
+        self.kernel = self.kernel_for(self.blocks_in_play)
+        if self.vectorized:
+            self.np_rng = np.random.default_rng(self.seed)
+            self.masks, self.mask_placements = placement_masks(self.blocks_in_play, self.grid_size)
+        self.initial_diamonds = sum(sum(row) for row in diamonds)
+
+        # Tree nodes hold kernel states, the (board, diamonds) ints that also key the tree.
+        self.tree = {}
+        root_hash = (encode(board), encode(diamonds))
+        root = self.new_node(*root_hash)
+        self.tree[root_hash] = root
+        if root.terminal:
+            return None
+
+        while time.perf_counter() < deadline:
+            if self.max_iterations is not None and self.iterations >= self.max_iterations:
+                break
+            self.iterate(root_hash)
+            self.iterations += 1
+            # A root with a single legal move needs no more thought.
+            if not root.untried and len(root.edges) == 1:
+                break
+
+        if not root.edges:
+            # Not a single iteration fitted in the budget: fall back to the first legal move.
+            piece, x, y, _ = root.untried[-1]
+            return (self.blocks_in_play[piece], x, y)
+        (piece, x, y, _), _ = max(root.edges, key=lambda edge: self.tree[edge[1]].visits)
+        return (self.blocks_in_play[piece], x, y)
+
+    def new_node(self, board, diamonds):
+        # Goal and dead states are leaves: nothing below them can change the outcome.
+        done = self.kernel.is_goal(diamonds) or self.kernel.is_dead(board, diamonds)
+        untried = [] if done else self.kernel.legal(board)
+        self.rng.shuffle(untried)
+        self.nodes_expanded += 1
+        self.track_sizes(0, len(self.tree))
+        return MCTSNode(board, diamonds, untried, terminal=not untried)
+
+    def uct_edge(self, node):
+        log_visits = math.log(node.visits)
+        best_edge, best_score = None, -math.inf
+        for edge in node.edges:
+            child = self.tree[edge[1]]
+            score = child.value / child.visits + self.exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_edge, best_score = edge, score
+        return best_edge
+
+    def iterate(self, root_hash):
+        """One selection / expansion / batched rollout / backpropagation step."""
+        path = [root_hash]
+        on_path = {root_hash}
+        node = self.tree[root_hash]
+
+        # Selection: follow UCT while the node is fully expanded.
+        while not node.terminal and not node.untried:
+            _, child_hash = self.uct_edge(node)
+            if child_hash in on_path:  # line clears can, rarely, lead back to a state on the path
+                break
+            path.append(child_hash)
+            on_path.add(child_hash)
+            node = self.tree[child_hash]
+
+        # Expansion: add one untried move; transpositions reuse the existing node.
+        if not node.terminal and node.untried:
+            placement = node.untried.pop()
+            child_hash = self.kernel.apply(node.board, node.diamonds, placement[3])
+            if child_hash not in self.tree:
+                self.tree[child_hash] = self.new_node(*child_hash)
+            node.edges.append((placement, child_hash))
+            path.append(child_hash)
+            node = self.tree[child_hash]
+
+        # Simulation, batched.
+        depth = len(path) - 1
+        if self.vectorized:
+            rewards = self.vectorized_rollouts(node.board, node.diamonds, depth)
+        else:
+            rewards = [self.rollout(node.board, node.diamonds, depth) for _ in range(self.batch_size)]
+        self.rollouts += len(rewards)
+
+        # Backpropagation.
+        total = sum(rewards)
+        for state_hash in path:
+            stats = self.tree[state_hash]
+            stats.visits += len(rewards)
+            stats.value += total
+
+    def reward(self, remaining, steps):
+        """
+        Rollout reward in [0, 1]: any win beats any non-win and shorter wins score higher;
+        non-wins score by the fraction of diamonds cleared.
+        """
+        if remaining == 0:
+            return 0.5 + 0.5 / (1 + steps)
+        return 0.5 * (1 - remaining / max(1, self.initial_diamonds))
+
+    def rollout_score(self, board, diamonds, left, placement):
+        """Rollout policy value of a placement on a kernel state with 'left' diamonds (lower is better)."""
+        if type(self.rollout_policy) is GreedySearch:
+            # GreedySearch.evaluate_move, without leaving the kernel: the diamonds left.
+            return left - self.kernel.play(board, diamonds, placement[3])[2]
+        piece, x, y, _ = placement
+        return self.evaluate_move(decode(board, self.grid_size), decode(diamonds, self.grid_size),
+                                  self.blocks_in_play[piece], (x, y))
+
+    def rollout(self, board, diamonds, depth):
+        """Play one epsilon-greedy game from the given kernel state and return its reward."""
+        steps = depth
+        left = popcount(diamonds)
+        for _ in range(self.rollout_depth):
+            if self.kernel.is_goal(diamonds):
+                break
+            moves = self.kernel.legal(board)
+            if not moves:
+                break
+            if self.rng.random() < self.epsilon:
+                placement = self.rng.choice(moves)
+            else:
+                candidates = self.rng.sample(moves, min(self.rollout_candidates, len(moves)))
+                placement = min(candidates, key=lambda m: self.rollout_score(board, diamonds, left, m))
+            board, diamonds, removed = self.kernel.play(board, diamonds, placement[3])
+            left -= removed
+            steps += 1
+        return self.reward(left, steps)
+
+    def vectorized_rollouts(self, board, diamonds, depth):
+        """
+        Play 'batch_size' epsilon-greedy rollouts in lockstep with NumPy. Every legal
+        placement of every game is scored at once by the diamonds left after it
+        (the GreedySearch.evaluate_move heuristic), with random tie-breaking.
+        """
+        batch = self.batch_size
+        masks = self.masks
+        board, diamonds = decode(board, self.grid_size), decode(diamonds, self.grid_size)
+        boards = np.repeat(np.array(board, dtype=bool)[None], batch, axis=0)
+        gems = np.repeat(np.array(diamonds, dtype=bool)[None], batch, axis=0)
+        steps = np.full(batch, depth)
+        done = gems.reshape(batch, -1).sum(axis=1) == 0
+        for _ in range(self.rollout_depth):
+            if done.all():
+                break
+            legal = ~(boards[:, None] & masks[None]).reshape(batch, len(masks), -1).any(axis=2)
+            movers = ~done & legal.any(axis=1)
+            done |= ~movers
+            if not movers.any():
+                break
+            index = np.nonzero(movers)[0]
+            placed = boards[index, None] | masks[None]
+            # Full rows are cleared; full columns only if no row is (as in Kernel.play).
+            full_rows, full_cols = placed.all(axis=3), placed.all(axis=2)
+            cleared = np.where(full_rows.any(axis=2)[..., None, None], full_rows[..., :, None], full_cols[..., None, :])
+            left = (gems[index, None] & ~cleared).reshape(len(index), len(masks), -1).sum(axis=2)
+            score = left + 0.5 * self.np_rng.random(left.shape)
+            explore = self.np_rng.random(len(index)) < self.epsilon
+            score[explore] = self.np_rng.random((explore.sum(), len(masks)))
+            score[~legal[index]] = np.inf
+            choice = score.argmin(axis=1)
+            rows = np.arange(len(index))
+            boards[index] = placed[rows, choice] & ~cleared[rows, choice]
+            gems[index] = gems[index] & ~cleared[rows, choice]
+            steps[index] += 1
+            done[index] |= gems[index].reshape(len(index), -1).sum(axis=1) == 0
+        remaining = gems.reshape(batch, -1).sum(axis=1)
+        return [self.reward(int(r), int(s)) for r, s in zip(remaining, steps)]
@@ -0,0 +1,46 @@
+"""
+Memory measurement for the benchmark workers.
+
+Each search is measured in a fresh worker process so its numbers are its own:
+
+- peak_memory: the tracemalloc peak of the Python allocations made by the search;
+- rss_start / rss_peak: the resident set size high-water mark of the worker before
+  and after the search (what a container memory limit sees);
+- peak_frontier / peak_closed: the largest frontier and closed set the searcher held.
+"""
+import sys
+import tracemalloc
+
+from solver import solve_board
+
+try:
+    import resource
+except ImportError:  # Windows has no getrusage; RSS is then not reported.
+    resource = None
+
+
+def peak_rss():
+    """High-water resident set size of this process in bytes, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # kilobytes on Linux
+
+
+def measured_solve(name, board, diamonds, blocks=None, measure_memory=True, **options):
+    """
+    solver.solve_board plus its memory use; meant to run in a fresh worker process.
+    The timed run is not traced, since tracemalloc slows the search down a lot: with
+    measure_memory the board is solved a second time under tracemalloc.
+    """
+    rss_start = peak_rss()
+    result = solve_board(name, board, diamonds, blocks=blocks, **options)
+    result["rss_start"] = rss_start
+    result["rss_peak"] = peak_rss()
+    result["peak_memory"] = None
+    if measure_memory:
+        tracemalloc.start()
+        solve_board(name, board, diamonds, blocks=blocks, **options)
+        result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
@@ -0,0 +1,93 @@
+"""
+Live progress view for long benchmark runs: per-group (e.g. per-algorithm) progress,
+throughput and ETA, printed as a terminal table and optionally written to a static HTML
+page that reloads itself, so a sweep can be followed from a browser.
+"""
+import html
+import os
+import time
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class ProgressView:
+    """
+    Tracks completed tasks per group. 'totals' maps each group to its number of tasks and
+    'done' to the tasks already finished by an earlier, resumed run; throughput and ETA
+    only count the tasks finished by this run.
+    """
+    def __init__(self, totals, done=None, html_path=None, interval=5.0, title="Progress"):
+        self.totals = dict(totals)
+        self.resumed = {group: (done or {}).get(group, 0) for group in self.totals}
+        self.finished = {group: 0 for group in self.totals}
+        self.html_path = html_path
+        self.interval = interval
+        self.title = title
+        self.start_time = time.perf_counter()
+        self.last_render = None
+
+    def update(self, group, count=1):
+        self.finished[group] += count
+        now = time.perf_counter()
+        if self.last_render is None or now - self.last_render >= self.interval or self.complete():
+            self.render()
+
+    def complete(self):
+        return all(self.resumed[group] + self.finished[group] >= total for group, total in self.totals.items())
+
+    def rows(self):
+        """(group, done, total, tasks per second, ETA in seconds) per group, plus an overall row."""
+        elapsed = max(1e-9, time.perf_counter() - self.start_time)
+        rows = []
+        for group, total in self.totals.items():
+            rows.append(self._row(group, self.resumed[group] + self.finished[group], total, self.finished[group], elapsed))
+        done = sum(self.resumed.values()) + sum(self.finished.values())
+        rows.append(self._row("total", done, sum(self.totals.values()), sum(self.finished.values()), elapsed))
+        return rows
+
+    @staticmethod
+    def _row(group, done, total, finished, elapsed):
+        rate = finished / elapsed
+        remaining = total - done
+        eta = 0 if remaining == 0 else (remaining / rate if rate > 0 else None)
+        return group, done, total, rate, eta
+
+    def table(self):
+        lines = [f"{'':<22}{'done':>12}  {'tasks/s':>8}  {'ETA':>8}"]
+        for group, done, total, rate, eta in self.rows():
+            lines.append(f"{group:<22}{str(done) + '/' + str(total):>12}  {rate:>8.2f}  {format_duration(eta):>8}")
+        return "\n".join(lines)
+
+    def render(self):
+        self.last_render = time.perf_counter()
+        elapsed = format_duration(self.last_render - self.start_time)
+        print(f"\n{self.title} (elapsed {elapsed})\n{self.table()}\n", flush=True)
+        if self.html_path:
+            self.write_html()
+
+    def write_html(self):
+        refresh = "" if self.complete() else f'<meta http-equiv="refresh" content="{max(1, int(self.interval))}">'
+        cells = "".join(
+            f"<tr><td>{html.escape(str(group))}</td><td>{done}/{total}</td>"
+            f"<td><progress value='{done}' max='{max(1, total)}'></progress></td>"
+            f"<td>{rate:.2f}</td><td>{format_duration(eta)}</td></tr>"
+            for group, done, total, rate, eta in self.rows()
+        )
+        page = (f"<!DOCTYPE html><html><head><meta charset='utf-8'>{refresh}<title>{html.escape(self.title)}</title>"
+                "<style>body{font-family:sans-serif}td,th{padding:4px 12px;text-align:right}"
+                "td:first-child{text-align:left}</style></head><body>"
+                f"<h2>{html.escape(self.title)}</h2><p>Elapsed {format_duration(time.perf_counter() - self.start_time)}"
+                f"{'' if not self.complete() else ' (finished)'}</p>"
+                "<table><tr><th>Group</th><th>Done</th><th></th><th>Tasks/s</th><th>ETA</th></tr>"
+                f"{cells}</table></body></html>")
+        tmp = self.html_path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(page)
+        os.replace(tmp, self.html_path)
@@ -0,0 +1,179 @@
+"""
+Scaling benchmark: nodes expanded, time and peak memory vs. grid size for each algorithm.
+Memory is reported as the tracemalloc peak, the worker's RSS high-water mark and the
+peak frontier / closed-set sizes of the search.
+
+Every search runs in its own process so a run that blows past the time limit can be
+killed and reported as a timeout instead of stalling the whole sweep.
+
+    python scaling_benchmark.py --sizes 5 6 8 10 --piece-set woodblock --timeout 30
+"""
+import argparse
+import csv
+import multiprocessing as mp
+import random
+import time
+import tracemalloc
+
+from algorithms import generate_board, pattern_from_block, DEFAULT_BLOCKS, PIECE_SETS
+from profiling import peak_rss
+from solver import ALGORITHMS, make_algorithm
+
+
+def _search_worker(name, board, diamonds, blocks, measure_memory, queue):
+    """Run a single search and report nodes, time and peak memory."""
+    rss_start = peak_rss()
+    if measure_memory:
+        tracemalloc.start()
+    algo = make_algorithm(name, board, diamonds, blocks=blocks)
+    start = time.perf_counter()
+    move = algo.get_best_move(None, board, diamonds)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if measure_memory else None
+    queue.put({
+        "nodes": algo.nodes_expanded,
+        "time": elapsed,
+        "peak_memory": peak,
+        "rss_start": rss_start,
+        "rss_peak": peak_rss(),
+        "peak_frontier": algo.peak_frontier,
+        "peak_closed": algo.peak_closed,
+        "solved": move is not None,
+    })
+
+
+def measure_search(name, board, diamonds, blocks, timeout, measure_memory=True):
+    """
+    Measure one search of 'name' on the given board in a child process.
+    Returns a dict with status "ok" or "timeout" plus the measured values.
+    """
+    empty = {"nodes": None, "peak_memory": None, "rss_start": None, "rss_peak": None,
+             "peak_frontier": None, "peak_closed": None, "solved": None}
+    queue = mp.Queue()
+    process = mp.Process(target=_search_worker, args=(name, board, diamonds, blocks, measure_memory, queue))
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return dict(empty, status="timeout", time=timeout)
+    if queue.empty():
+        return dict(empty, status="error", time=None)
+    result = queue.get()
+    result["status"] = "ok"
+    return result
+
+
+def scaled_board(grid_size, cluster_patterns=None, density=0.32, diamond_ratio=0.2, rng=None):
+    """Generate a board whose filled cells and diamonds scale with the grid area (8 and 5 on 5x5)."""
+    area = grid_size * grid_size
+    return generate_board(
+        grid_size=grid_size,
+        max_blocks=int(density * area),
+        max_diamonds=max(1, int(diamond_ratio * area)),
+        cluster_patterns=cluster_patterns,
+        rng=rng,
+    )
+
+
+def run_benchmark(sizes, algorithms, blocks, boards_per_size=3, timeout=30.0, seed=0, measure_memory=True):
+    """Run every algorithm on 'boards_per_size' boards per grid size and return a list of rows."""
+    rng = random.Random(seed)
+    # The classic set keeps the default clusters; other sets pre-fill the board with their own shapes.
+    cluster_patterns = None if blocks == DEFAULT_BLOCKS else [pattern_from_block(block) for block in blocks]
+    rows = []
+    for grid_size in sizes:
+        boards = [scaled_board(grid_size, cluster_patterns, rng=rng) for _ in range(boards_per_size)]
+        for name in algorithms:
+            timed_out = False
+            for board_id, (board, diamonds) in enumerate(boards):
+                if timed_out:
+                    # Once an algorithm times out on a size, the remaining boards would too.
+                    result = {"status": "skipped", "nodes": None, "time": None, "peak_memory": None,
+                              "rss_start": None, "rss_peak": None, "peak_frontier": None, "peak_closed": None,
+                              "solved": None}
+                else:
+                    result = measure_search(name, board, diamonds, blocks, timeout, measure_memory)
+                    timed_out = result["status"] == "timeout"
+                row = {"grid_size": grid_size, "algorithm": name, "board": board_id}
+                row.update(result)
+                rows.append(row)
+                print(format_row(row), flush=True)
+    return rows
+
+
+def format_row(row):
+    nodes = "-" if row["nodes"] is None else row["nodes"]
+    elapsed = "-" if row["time"] is None else f"{row['time']:.3f}s"
+    memory = "-" if row["peak_memory"] is None else f"{row['peak_memory'] / 1e6:.1f}MB"
+    rss = "-" if row["rss_peak"] is None else f"{row['rss_peak'] / 1e6:.1f}MB"
+    frontier = "-" if row["peak_frontier"] is None else row["peak_frontier"]
+    closed = "-" if row["peak_closed"] is None else row["peak_closed"]
+    return (f"{row['grid_size']:>3}x{row['grid_size']:<3} {row['algorithm']:<20} board={row['board']} "
+            f"{row['status']:<8} nodes={nodes} time={elapsed} peak={memory} rss={rss} "
+            f"frontier={frontier} closed={closed}")
+
+
+def summarize(rows):
+    """Print the median nodes/time/memory per (grid size, algorithm) and where each one breaks down."""
+    print("\nGrid  Algorithm            solved  median nodes  median time  median peak   median rss"
+          "  max frontier  max closed")
+    breakdown = {}
+    for grid_size in sorted({row["grid_size"] for row in rows}):
+        for name in dict.fromkeys(row["algorithm"] for row in rows):
+            group = [row for row in rows if row["grid_size"] == grid_size and row["algorithm"] == name]
+            finished = [row for row in group if row["status"] == "ok"]
+            if len(finished) < len(group) and name not in breakdown:
+                breakdown[name] = grid_size
+            if not finished:
+                print(f"{grid_size:>2}x{grid_size:<2} {name:<20} {'0/' + str(len(group)):>6}  (timeout)")
+                continue
+            nodes = _median([row["nodes"] for row in finished])
+            elapsed = _median([row["time"] for row in finished])
+            peaks = [row["peak_memory"] for row in finished if row["peak_memory"] is not None]
+            peak = f"{_median(peaks) / 1e6:.1f}MB" if peaks else "-"
+            rss_peaks = [row["rss_peak"] for row in finished if row["rss_peak"] is not None]
+            rss = f"{_median(rss_peaks) / 1e6:.1f}MB" if rss_peaks else "-"
+            frontier = max(row["peak_frontier"] for row in finished)
+            closed = max(row["peak_closed"] for row in finished)
+            solved = sum(1 for row in finished if row["solved"])
+            print(f"{grid_size:>2}x{grid_size:<2} {name:<20} {str(solved) + '/' + str(len(group)):>6}"
+                  f"  {nodes:>12.0f}  {elapsed:>10.3f}s  {peak:>11}  {rss:>11}  {frontier:>12}  {closed:>10}")
+    print()
+    for name in dict.fromkeys(row["algorithm"] for row in rows):
+        if name in breakdown:
+            print(f"{name}: first timeout at {breakdown[name]}x{breakdown[name]}")
+        else:
+            print(f"{name}: finished every grid size")
+
+
+def _median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nodes, time and memory vs. grid size for each algorithm.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 6, 7, 8, 10])
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS.keys()), choices=list(ALGORITHMS.keys()))
+    parser.add_argument("--piece-set", default="classic", choices=list(PIECE_SETS.keys()))
+    parser.add_argument("--boards", type=int, default=3, help="boards per grid size")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds per search")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (it slows searches down)")
+    parser.add_argument("--csv", help="also write the raw rows to this CSV file")
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.sizes, args.algorithms, PIECE_SETS[args.piece_set], args.boards,
+                         args.timeout, args.seed, not args.no_memory)
+    summarize(rows)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,178 +1,224 @@
-from blind_search import DFS, BFS, UniformCostSearch, IterativeDeepeningSearch
-from informed_search import AStarSearch, GreedySearch, WeightedAStarSearch
-import random
+from algorithms import PIECE_SETS
+from corpus import CORPUS_VERSION, load_corpus, select_boards
+from profiling import measured_solve
+from progress import ProgressView
+from solver import ALGORITHMS
+import json
+import os
 import numpy as np
 import matplotlib.pyplot as plt
 import time
 import pandas as pd
 import copy
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-
-def generate_board(grid_size=5, max_blocks=8, max_diamonds=5):
-        """
-        Genera un tablero (board) y un arreglo de diamantes (diamonds) para el juego,
-        favoreciendo la creación de pequeñas formaciones (clusters) juntas.
-        
-        Parámetros:
-        grid_size: tamaño del tablero (por defecto 5)
-        max_blocks: número máximo de celdas con bloques (por defecto 5)
-        max_diamonds: número máximo de diamantes (por defecto 3)
-        
-        Devuelve:
-        board, diamonds: dos listas de listas (grid_size x grid_size) con valores 0 o 1.
-        """
-        board = [[0] * grid_size for _ in range(grid_size)]
-        diamonds = [[0] * grid_size for _ in range(grid_size)]
-
-        cluster_patterns = [
-            [(0, 0)],                               
-            [(0, 0), (0, 1), (1, 0), (1, 1)],         
-            [(0, 0), (0, 1)],                       
-            [(0, 0), (1, 0)],                        
-            [(0, 0), (0, 1), (0, 2)],                  
-            [(0, 0), (1, 0), (2, 0)]                  
-        ]
-        
-        blocks_placed = 0
-        attempts = 0
-        while blocks_placed < max_blocks and attempts < 20:
-            attempts += 1
-            pattern = random.choice(cluster_patterns)
-            if len(pattern) > max_blocks - blocks_placed:
-                continue
-            max_x = grid_size - max(p[0] for p in pattern)
-            max_y = grid_size - max(p[1] for p in pattern)
-            if max_x <= 0 or max_y <= 0:
+from multiprocessing import Pool
+
+
+num_iterations = 3
+
+# Every run benchmarks the same boards of the versioned corpus, so the numbers can be
+# compared across commits. Restrict 'tiers' (e.g. ["easy", "medium"]) for a quicker run.
+tiers = None
+algorithms = list(ALGORITHMS.keys())
+# Peak traced memory costs a second, traced run of every game.
+measure_memory = True
+workers = os.cpu_count() or 1
+# Progress is also written to this self-refreshing page (None to disable).
+progress_html = "simulation_progress.html"
+
+METRICS = ["moves", "time", "nodes", "peak_memory", "rss_start", "rss_peak", "peak_frontier", "peak_closed"]
+
+
+def results_base(corpus):
+    return f"simulation_results_corpus_v{corpus['version']}"
+
+
+def simulation_task(task):
+    """Play one game in a worker process and measure it."""
+    name, board_id, iteration, board, diamonds, blocks = task
+    options = {"w": 2.0} if name == "A* weighted" else {}
+    result = measured_solve(name, copy.deepcopy(board), copy.deepcopy(diamonds), blocks=blocks,
+                            measure_memory=measure_memory, **options)
+    return name, board_id, iteration, result
+
+
+def load_records(path, corpus_version):
+    """
+    The games already recorded in the JSON Lines file of an earlier run. A line cut short
+    by a crash is skipped, so its game is simply played again.
+    """
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
                 continue
-            x = random.randint(0, max_x - 1)
-            y = random.randint(0, max_y - 1)
-            can_place = True
-            for dx, dy in pattern:
-                if board[x + dx][y + dy] == 1:
-                    can_place = False
-                    break
-            if can_place:
-                
-                for dx, dy in pattern:
-                    board[x + dx][y + dy] = 1
-                    blocks_placed += 1
-                    if blocks_placed >= max_blocks:
-                        break
-
-        
-        diamond_count = 0
-        
-        block_positions = [(i, j) for i in range(grid_size) for j in range(grid_size) if board[i][j] == 1]
-        random.shuffle(block_positions)
-        for pos in block_positions:
-            if diamond_count < max_diamonds:
-                
-                if random.random() < 0.5:
-                    i, j = pos
-                    diamonds[i][j] = 1
-                    diamond_count += 1
-            else:
-                break
-
-        return board, diamonds
-  
-def run_game(search_algo, board, diamonds):
+            if record.get("corpus_version") == corpus_version:
+                records.append(record)
+    return records
+
+
+def run_simulation(corpus, boards, blocks):
     """
-    Runs the game by repeatedly invoking the search algorithm until a goal state is reached.
-    Returns the total number of moves executed and the elapsed time.
+    Play every (algorithm, board, iteration) game not recorded yet, appending each result
+    to the JSON Lines file as soon as it completes. Returns every record, resumed ones included.
     """
-    move_count = 0
-    current_board = copy.deepcopy(board)
-    current_diamonds = copy.deepcopy(diamonds)
-    start_time = time.time()
-    
-    while not search_algo.is_goal(current_diamonds):
-        default_block = [[1, 1, 1]]  # used for generating moves
-        possible_moves = search_algo.possible_moves(default_block)
-        best_move = search_algo.get_best_move(possible_moves, current_board, current_diamonds)
-        if best_move is None:
-            print("No solution found. Terminating game.")
-            break
-        block, x, y = best_move
-        current_board, current_diamonds = search_algo.apply_move(current_board, current_diamonds, (x, y), block)
-        move_count += 1
-        
-    elapsed_time = time.time() - start_time
-    return move_count, elapsed_time
-
-num_iterations = 10
-
-algorithms = {
-    "DFS": DFS,
-    "BFS": BFS,
-    "UCS": UniformCostSearch,
-    "It. Deep": IterativeDeepeningSearch,
-    "A*": AStarSearch,
-    "A* weighted": WeightedAStarSearch,
-    "Greedy": GreedySearch,
-}
-
-results = {name: {"moves": [], "time": []} for name in algorithms.keys()}
-
-base_board, base_diamonds = generate_board(grid_size=5, max_blocks=8, max_diamonds=5)
-futures = {}
-with ThreadPoolExecutor(max_workers=len(algorithms)) as executor:
-    for name, algo_class in algorithms.items():
-        for i in range(num_iterations):
-
-            if name == "A* weighted":
-                algo_instance = algo_class("A* weighted", copy.deepcopy(base_board), copy.deepcopy(base_diamonds), w=2.0)
-            else:
-                algo_instance = algo_class(copy.deepcopy(base_board), copy.deepcopy(base_diamonds))
-
-
-            future = executor.submit(run_game, algo_instance, base_board, base_diamonds)
-            futures[future] = name
-
-
-    for future in as_completed(futures):
-        name = futures[future]
-        moves, elapsed = future.result()
-        results[name]["moves"].append(moves)
-        results[name]["time"].append(elapsed)
-        print(f"{name} iteration: moves={moves}, time={elapsed:.2f} seconds")
-
-avg_times = {name: sum(results[name]["time"]) / num_iterations for name in results}
-avg_moves = {name: sum(results[name]["moves"]) / num_iterations for name in results}
-
-informed = {"A*", "Greedy", "A* weighted"}
-blind = {"DFS", "BFS", "UCS", "Iterative Deepening"}
-
-colors = []
-labels = []
-for name in avg_times.keys():
-    if name in informed:
-        colors.append("salmon")  
-        labels.append("Informed Search")
-    else:
-        colors.append("skyblue")  
-        labels.append("Blind Search")
-
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
-
-bars1 = ax1.bar(avg_times.keys(), avg_times.values(), color=colors)
-ax1.set_xlabel('Algorithm')
-ax1.set_ylabel('Average Time (s)')
-ax1.set_title('Average Execution Time')
-
-bars2 = ax2.bar(avg_moves.keys(), avg_moves.values(), color=colors)
-ax2.set_xlabel('Algorithm')
-ax2.set_ylabel('Average Moves')
-ax2.set_title('Average Number of Moves')
-
-from matplotlib.patches import Patch
-legend_elements = [
-    Patch(facecolor='skyblue', label='Blind Search'),
-    Patch(facecolor='salmon', label='Informed Search')
-]
-ax1.legend(handles=legend_elements)
-ax2.legend(handles=legend_elements)
-
-plt.tight_layout()
-plt.show()
+    path = results_base(corpus) + ".jsonl"
+    records = load_records(path, corpus["version"])
+    finished = {(record["algorithm"], record["board_id"], record["iteration"]) for record in records}
+    if finished:
+        print(f"Resuming: {len(finished)} games already in {path}")
+    tasks = [(name, entry["id"], i, entry["board"], entry["diamonds"], blocks)
+             for name in algorithms for entry in boards for i in range(num_iterations)
+             if (name, entry["id"], i) not in finished]
+
+    totals = {name: len(boards) * num_iterations for name in algorithms}
+    done = {name: sum(1 for key in finished if key[0] == name) for name in algorithms}
+    progress = ProgressView(totals, done, html_path=progress_html,
+                            title=f"Simulation on corpus v{corpus['version']}")
+
+    cut_short = False
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            cut_short = f.read(1) != b"\n"
+
+    with open(path, "a") as out:
+        if cut_short:
+            out.write("\n")  # end the line cut short by the crash; it is skipped on reading
+        # One fresh process per game, so the RSS high-water mark belongs to that game alone.
+        with Pool(workers, maxtasksperchild=1) as pool:
+            for name, board_id, iteration, result in pool.imap_unordered(simulation_task, tasks):
+                record = {"corpus_version": corpus["version"], "algorithm": name, "board_id": board_id,
+                          "iteration": iteration, **{metric: result[metric] for metric in METRICS}}
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                records.append(record)
+                memory = "-" if result["peak_memory"] is None else f"{result['peak_memory'] / 1e6:.1f}MB"
+                rss = "-" if result["rss_peak"] is None else f"{result['rss_peak'] / 1e6:.1f}MB"
+                print(f"{name} on {board_id}: moves={result['moves']}, time={result['time']:.2f} seconds, "
+                      f"peak={memory}, rss={rss}, "
+                      f"frontier={result['peak_frontier']}, closed={result['peak_closed']}")
+                progress.update(name)
+    return records
+
+
+def collect_results(records, boards):
+    """Per-algorithm columns of the recorded games on the selected boards."""
+    board_ids = {entry["id"] for entry in boards}
+    results = {name: {"board_id": [], **{metric: [] for metric in METRICS}} for name in algorithms}
+    for record in records:
+        if record["algorithm"] in results and record["board_id"] in board_ids and record["iteration"] < num_iterations:
+            results[record["algorithm"]]["board_id"].append(record["board_id"])
+            for metric in METRICS:
+                results[record["algorithm"]][metric].append(record[metric])
+    return results
+
+
+def write_results(corpus, boards, results):
+    base = results_base(corpus)
+    with open(base + ".json", "w") as f:
+        json.dump({
+            "corpus_version": corpus["version"],
+            "board_ids": [entry["id"] for entry in boards],
+            "iterations": num_iterations,
+            "results": results,
+        }, f, indent=1)
+    rows = [
+        {"corpus_version": corpus["version"], "algorithm": name, **{key: values[i] for key, values in columns.items()}}
+        for name, columns in results.items() for i in range(len(columns["board_id"]))
+    ]
+    pd.DataFrame(rows).to_csv(base + ".csv", index=False)
+    print(f"Results written to {base}.json and {base}.csv")
+
+
+def average(values):
+    values = [value for value in values if value is not None]
+    return sum(values) / len(values) if values else 0
+
+
+def plot_results(corpus, boards, results):
+    avg_times = {name: average(results[name]["time"]) for name in results}
+    avg_moves = {name: average(results[name]["moves"]) for name in results}
+    avg_peak = {name: average(results[name]["peak_memory"]) / 1e6 for name in results}
+    # RSS growth during the game: the worker's baseline (interpreter and imports) is left out.
+    avg_rss = {name: average([peak - start for start, peak in zip(results[name]["rss_start"], results[name]["rss_peak"])
+                              if start is not None and peak is not None]) / 1e6 for name in results}
+    max_frontier = {name: max(results[name]["peak_frontier"]) for name in results}
+    max_closed = {name: max(results[name]["peak_closed"]) for name in results}
+
+    informed = {"A*", "Greedy", "A* weighted"}
+    blind = {"DFS", "BFS", "UCS", "Iterative Deepening"}
+
+    colors = []
+    labels = []
+    for name in avg_times.keys():
+        if name in informed:
+            colors.append("salmon")
+            labels.append("Informed Search")
+        else:
+            colors.append("skyblue")
+            labels.append("Blind Search")
+
+    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(14, 10))
+
+    bars1 = ax1.bar(avg_times.keys(), avg_times.values(), color=colors)
+    ax1.set_xlabel('Algorithm')
+    ax1.set_ylabel('Average Time (s)')
+    ax1.set_title('Average Execution Time')
+
+    bars2 = ax2.bar(avg_moves.keys(), avg_moves.values(), color=colors)
+    ax2.set_xlabel('Algorithm')
+    ax2.set_ylabel('Average Moves')
+    ax2.set_title('Average Number of Moves')
+
+    positions = np.arange(len(algorithms))
+    ax3.bar(positions - 0.2, list(avg_peak.values()), width=0.4, color=colors, label='tracemalloc peak')
+    ax3.bar(positions + 0.2, list(avg_rss.values()), width=0.4, color=colors, hatch='//', label='RSS growth')
+    ax3.set_xticks(positions)
+    ax3.set_xticklabels(algorithms)
+    ax3.set_xlabel('Algorithm')
+    ax3.set_ylabel('Average Peak Memory (MB)')
+    ax3.set_title('Peak Memory per Game')
+    ax3.legend()
+
+    ax4.bar(positions - 0.2, list(max_frontier.values()), width=0.4, color=colors, label='frontier')
+    ax4.bar(positions + 0.2, list(max_closed.values()), width=0.4, color=colors, hatch='//', label='closed set')
+    ax4.set_xticks(positions)
+    ax4.set_xticklabels(algorithms)
+    ax4.set_yscale('log')
+    ax4.set_xlabel('Algorithm')
+    ax4.set_ylabel('Largest Size (states)')
+    ax4.set_title('Peak Frontier and Closed-Set Sizes')
+    ax4.legend()
+
+    for ax in (ax1, ax2, ax3, ax4):
+        ax.tick_params(axis='x', labelrotation=45)
+
+    from matplotlib.patches import Patch
+    legend_elements = [
+        Patch(facecolor='skyblue', label='Blind Search'),
+        Patch(facecolor='salmon', label='Informed Search')
+    ]
+    ax1.legend(handles=legend_elements)
+    ax2.legend(handles=legend_elements)
+
+    fig.suptitle(f"Corpus v{corpus['version']}: {len(boards)} boards x {num_iterations} runs")
+    plt.tight_layout()
+    plt.show()
+
+
+def main():
+    corpus = load_corpus(CORPUS_VERSION)
+    boards = select_boards(corpus, tiers)
+    blocks = PIECE_SETS[corpus["generator"]["piece_set"]]
+    records = run_simulation(corpus, boards, blocks)
+    results = collect_results(records, boards)
+    write_results(corpus, boards, results)
+    plot_results(corpus, boards, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import copy
+import time
+
+from blind_search import DFS, BFS, UniformCostSearch, IterativeDeepeningSearch
+from informed_search import AStarSearch, GreedySearch, WeightedAStarSearch, AnytimeWeightedAStarSearch, BeamSearch
+from expectimax_search import ExpectimaxSearch
+from mcts_search import MCTSSearch
+from algorithms import DEFAULT_BLOCKS
+from kernel import block_mask, decode, encode, get_kernel
+
+# Algorithm names as shown in the GUI, mapped to their search classes.
+ALGORITHMS = {
+    "BFS": BFS,
+    "DFS": DFS,
+    "UCS": UniformCostSearch,
+    "Iterative Deepening": IterativeDeepeningSearch,
+    "Greedy": GreedySearch,
+    "A*": AStarSearch,
+    "A* weighted": WeightedAStarSearch,
+    "Expectimax": ExpectimaxSearch,
+    "MCTS": MCTSSearch,
+    "ARA*": AnytimeWeightedAStarSearch,
+    "Beam": BeamSearch,
+}
+
+# The informed searchers take the display name as their first argument.
+NAMED_ALGORITHMS = {"Greedy", "A*", "A* weighted", "Expectimax", "MCTS", "ARA*", "Beam"}
+
+
+def make_algorithm(name, board, diamonds, blocks=None, visited=None, model=None, **options):
+    """
+    Build the search algorithm registered under 'name' for the given board.
+    Extra options (e.g. w=2.0 for "A* weighted") are passed to the constructor;
+    'visited' names the explored-set backend (see visited_sets.py) and 'model' is a learned
+    heuristic or the path of its weights (see learned_heuristic.py).
+    """
+    algo_class = ALGORITHMS[name]
+    if name in NAMED_ALGORITHMS:
+        algo = algo_class(name, board, diamonds, blocks=blocks, **options)
+    else:
+        algo = algo_class(board, diamonds, blocks=blocks, **options)
+    if visited is not None:
+        algo.set_visited_backend(visited)
+    if model is not None:
+        algo.set_model(model)
+    return algo
+
+
+def can_place_any(search_algo, board, blocks):
+    """True if at least one of 'blocks' fits somewhere on 'board'."""
+    search_algo.board = board
+    return any(search_algo.possible_moves(block) for block in blocks)
+
+
+def first_legal_move(search_algo, board, blocks):
+    """The first (block, x, y) placement of 'blocks' that fits on 'board', or None."""
+    search_algo.board = board
+    for block in blocks:
+        moves = search_algo.possible_moves(block)
+        if moves:
+            return (block, moves[0][0], moves[0][1])
+    return None
+
+
+def run_game(search_algo, board, diamonds, dealer=None, max_moves=None):
+    """
+    Runs the game by repeatedly invoking the search algorithm until a goal state is reached.
+    With a PieceDealer the game is played in dealt-piece mode: a hand of pieces is dealt,
+    the searcher may only place pieces from it and a new hand is dealt once it is empty.
+    If the searcher finds no plan with the current hand, any piece that fits is placed,
+    as the game forces the player to keep placing pieces until none fits.
+    Returns the total number of moves executed and the elapsed time.
+    """
+    move_count = 0
+    current_board = copy.deepcopy(board)
+    current_diamonds = copy.deepcopy(diamonds)
+    hand = []
+    start_time = time.time()
+
+    while not search_algo.is_goal(current_diamonds):
+        if max_moves is not None and move_count >= max_moves:
+            print("Move limit reached. Terminating game.")
+            break
+        if dealer is not None:
+            if not hand:
+                hand = dealer.deal()
+            search_algo.set_hand(hand)
+            if not can_place_any(search_algo, current_board, hand):
+                print("No piece of the hand fits. Game over.")
+                break
+        search_algo.board = current_board
+        possible_moves = search_algo.possible_moves(search_algo.blocks[0])
+        best_move = search_algo.get_best_move(possible_moves, current_board, current_diamonds)
+        if best_move is None and dealer is not None:
+            best_move = first_legal_move(search_algo, current_board, hand)
+        if best_move is None:
+            print("No solution found. Terminating game.")
+            break
+        block, x, y = best_move
+        current_board, current_diamonds = search_algo.apply_move(current_board, current_diamonds, (x, y), block)
+        if dealer is not None:
+            hand.remove(block)
+        move_count += 1
+
+    if dealer is not None:
+        search_algo.set_hand(None)
+
+    elapsed_time = time.time() - start_time
+    return move_count, elapsed_time
+
+
+def solve_board(name, board, diamonds, blocks=None, max_moves=100, **options):
+    """
+    Solve a board by replaying the moves chosen by algorithm 'name' until no diamonds remain.
+    Returns a dict with the plan as [block, x, y] moves, whether it was solved, the number
+    of nodes expanded over all searches, the largest frontier and closed set of any search,
+    the memory of the largest explored set and its bytes per state, whether the board was
+    recognized as unsolvable up front (no search is run then) and the elapsed time.
+    """
+    board = board.tolist() if hasattr(board, "tolist") else copy.deepcopy(board)
+    diamonds = diamonds.tolist() if hasattr(diamonds, "tolist") else copy.deepcopy(diamonds)
+    search_algo = make_algorithm(name, board, diamonds, blocks=blocks, **options)
+    plan = []
+    nodes = peak_frontier = peak_closed = 0
+    visited_bytes, visited_states = 0, 0
+    start_time = time.perf_counter()
+    unsolvable = search_algo.is_unsolvable(board, diamonds)
+    while not unsolvable and not search_algo.is_goal(diamonds) and len(plan) < max_moves:
+        best_move = search_algo.get_best_move(None, board, diamonds)
+        nodes += search_algo.nodes_expanded
+        peak_frontier = max(peak_frontier, search_algo.peak_frontier)
+        peak_closed = max(peak_closed, search_algo.peak_closed)
+        visited_bytes, visited_states = max((visited_bytes, visited_states), search_algo.visited_memory())
+        if best_move is None:
+            break
+        block, x, y = best_move
+        board, diamonds = search_algo.apply_move(board, diamonds, (x, y), block)
+        plan.append([block, x, y])
+    return {
+        "solved": search_algo.is_goal(diamonds),
+        "moves": len(plan),
+        "plan": plan,
+        "nodes": nodes,
+        "peak_frontier": peak_frontier,
+        "peak_closed": peak_closed,
+        "visited_bytes": visited_bytes,
+        "bytes_per_state": visited_bytes / visited_states if visited_states else None,
+        "unsolvable": unsolvable,
+        "time": time.perf_counter() - start_time,
+    }
+
+
+def rank_moves(board, diamonds, blocks=None, hand=None, max_depth=None, max_nodes=None):
+    """
+    Distance to the goal of every legal first move, from one breadth-first search shared by
+    all of them: each state is stored once with the bitmask of the root moves whose paths
+    reach it, and is expanded again only for root moves reaching it for the first time, so
+    the closed set (and the work) is shared instead of running one search per move.
+    A root move stops being propagated as soon as its distance is known.
+
+    'distance' is the length of the shortest plan starting with that move (1 if the move
+    itself clears the last diamond), or None if no plan was found within 'max_depth' moves
+    or 'max_nodes' expanded states. Returns a dict with the 'ranking' as (distance,
+    (block, x, y)) pairs, shortest first (ties and unknown distances in placement order),
+    the 'nodes' expanded, the 'depth' searched and whether the search was 'complete'.
+    """
+    board = board.tolist() if hasattr(board, "tolist") else board
+    diamonds = diamonds.tolist() if hasattr(diamonds, "tolist") else diamonds
+    blocks = blocks if blocks is not None else DEFAULT_BLOCKS
+    if hand is not None:
+        blocks = [block for index, block in enumerate(hand) if block not in hand[:index]]
+    kernel = get_kernel(len(board), blocks)
+    root = (encode(board), encode(diamonds))
+
+    roots = kernel.children(*root)
+    distances = [None] * len(roots)
+    layer = {}
+    for index, (_, child_board, child_diamonds, _) in enumerate(roots):
+        if kernel.is_goal(child_diamonds):
+            distances[index] = 1
+        elif not kernel.is_dead(child_board, child_diamonds):
+            child = (child_board, child_diamonds)
+            layer[child] = layer.get(child, 0) | (1 << index)
+    unresolved = sum(1 << index for index, distance in enumerate(distances) if distance is None)
+    # Root moves that have already reached each state; a path back to the root is never shorter.
+    reached = {root: (1 << len(roots)) - 1}
+    depth = 1
+    nodes = 0
+    complete = True
+    while layer and unresolved:
+        if max_depth is not None and depth >= max_depth:
+            complete = False
+            break
+        depth += 1
+        next_layer = {}
+        solved = 0
+        for state, moves in layer.items():
+            if max_nodes is not None and nodes >= max_nodes:
+                complete = False
+                break
+            seen = reached.get(state, 0)
+            # Moves solved earlier in this layer need no more expansion: this is the shared
+            # version of a single search stopping at its first goal.
+            moves &= unresolved & ~solved & ~seen
+            if not moves:
+                continue
+            reached[state] = seen | moves
+            nodes += 1
+            for _, child_board, child_diamonds, _ in kernel.iter_children(*state):
+                if kernel.is_goal(child_diamonds):
+                    # Every move in 'moves' is now solved at this depth: nothing else to propagate.
+                    solved |= moves
+                    break
+                child = (child_board, child_diamonds)
+                if not kernel.is_dead(*child):
+                    next_layer[child] = next_layer.get(child, 0) | moves
+        for index in range(len(roots)):
+            if solved >> index & 1:
+                distances[index] = depth
+        unresolved &= ~solved
+        if not complete:
+            break
+        layer = next_layer
+
+    ranking = [(distance, (blocks[piece], x, y)) for distance, ((piece, x, y, _), _, _, _) in zip(distances, roots)]
+    ranking.sort(key=lambda entry: (entry[0] is None, entry[0] or 0))
+    return {"ranking": ranking, "nodes": nodes, "depth": depth, "complete": complete}
+
+
+def label_plan(board, diamonds, plan, blocks=None, max_nodes=None):
+    """
+    Move quality along a plan: for every [block, x, y] step, the distance to the goal of
+    the move played and of the best move from the same state (see rank_moves), as
+    {"distance": ..., "best": ...} dicts. A step is optimal when both are equal.
+    """
+    board = board.tolist() if hasattr(board, "tolist") else copy.deepcopy(board)
+    diamonds = diamonds.tolist() if hasattr(diamonds, "tolist") else copy.deepcopy(diamonds)
+    blocks = blocks if blocks is not None else DEFAULT_BLOCKS
+    kernel = get_kernel(len(board), blocks)
+    labels = []
+    for block, x, y in plan:
+        ranking = rank_moves(board, diamonds, blocks=blocks, max_nodes=max_nodes)["ranking"]
+        distance = next((d for d, move in ranking if move == (block, x, y)), None)
+        labels.append({"distance": distance, "best": ranking[0][0] if ranking else None})
+        new_board, new_diamonds = kernel.apply(encode(board), encode(diamonds),
+                                               block_mask(block, x, y, len(board)))
+        board, diamonds = decode(new_board, len(board)), decode(new_diamonds, len(board))
+    return labels
@@ -0,0 +1,46 @@
+import pytest
+
+from algorithms import PIECE_SETS
+from corpus import load_corpus, select_boards
+from solver import make_algorithm
+
+# Boards from generate_board(5, rng=random.Random(5)) on which a beam-seeded ARA* once
+# returned a plan one move too long at w = 1, with their optimal number of moves.
+SEEDED_BOARDS = [
+    ([[0, 0, 1, 1, 1], [0, 0, 0, 0, 0], [1, 0, 0, 0, 0], [1, 0, 0, 0, 1], [1, 1, 0, 0, 0]],
+     [[0, 0, 1, 1, 0], [0, 0, 0, 0, 0], [1, 0, 0, 0, 0], [0, 0, 0, 0, 1], [0, 1, 0, 0, 0]], 4),
+    ([[0, 0, 1, 1, 0], [0, 0, 1, 1, 0], [0, 0, 0, 1, 0], [1, 1, 1, 0, 0], [0, 0, 0, 0, 0]],
+     [[0, 0, 0, 1, 0], [0, 0, 1, 0, 0], [0, 0, 0, 1, 0], [1, 0, 1, 0, 0], [0, 0, 0, 0, 0]], 3),
+]
+
+
+@pytest.mark.parametrize("beam_width", [10, 1])
+@pytest.mark.parametrize("board, diamonds, optimum", SEEDED_BOARDS)
+def test_beam_seed_does_not_hide_shorter_plans(beam_width, board, diamonds, optimum):
+    algo = make_algorithm("ARA*", board, diamonds, w=1.0, time_limit=60.0, beam_width=beam_width)
+    algo.get_best_move(None, board, diamonds)
+    assert len(algo.solution_path) == optimum
+    assert algo.suboptimality_bound == 1.0
+
+
+# The corpus records the optimal number of moves of every board.
+KNOWN_BOARDS = select_boards(load_corpus(), ["easy", "medium"])
+BLOCKS = PIECE_SETS[load_corpus()["generator"]["piece_set"]]
+
+
+@pytest.mark.parametrize("entry", KNOWN_BOARDS, ids=[entry["id"] for entry in KNOWN_BOARDS])
+def test_ara_star_at_w_1_is_optimal(entry):
+    algo = make_algorithm("ARA*", entry["board"], entry["diamonds"], blocks=BLOCKS, w=1.0, time_limit=60.0)
+    algo.get_best_move(None, entry["board"], entry["diamonds"])
+    assert len(algo.solution_path) == entry["optimal_moves"]
+    assert algo.suboptimality_bound == 1.0
+
+
+@pytest.mark.parametrize("name, options", [("ARA*", {}), ("ARA*", {"time_limit": 0.0}), ("Beam", {}),
+                                           ("Beam", {"width": 2})], ids=["ARA*", "ARA*-no-time", "Beam", "Beam-2"])
+@pytest.mark.parametrize("entry", KNOWN_BOARDS, ids=[entry["id"] for entry in KNOWN_BOARDS])
+def test_suboptimality_bound_holds(name, options, entry):
+    algo = make_algorithm(name, entry["board"], entry["diamonds"], blocks=BLOCKS, **options)
+    algo.get_best_move(None, entry["board"], entry["diamonds"])
+    assert algo.solution_path
+    assert algo.suboptimality_bound >= len(algo.solution_path) / entry["optimal_moves"]
@@ -0,0 +1,65 @@
+import pytest
+
+from algorithms import PIECE_SETS, PieceDealer
+from corpus import load_corpus, select_boards
+from expectimax_search import ExpectimaxSearch
+from mcts_search import MCTSSearch
+
+BLOCKS = PIECE_SETS[load_corpus()["generator"]["piece_set"]]
+BOARDS = select_boards(load_corpus(), ["easy", "medium", "hard"])
+
+
+def assert_legal(algo, move, board, hand):
+    assert move is not None
+    block, x, y = move
+    assert block in hand
+    algo.board = board
+    assert (x, y) in algo.possible_moves(block)
+
+
+def test_expectimax_evaluates_moves_before_any_search():
+    entry = BOARDS[0]
+    algo = ExpectimaxSearch("Expectimax", entry["board"], entry["diamonds"], blocks=BLOCKS)
+    algo.board = entry["board"]
+    block = BLOCKS[0]
+    x, y = algo.possible_moves(block)[0]
+    assert isinstance(algo.evaluate_move(entry["board"], entry["diamonds"], block, (x, y)), int)
+
+
+def test_mcts_with_an_expectimax_rollout_policy_returns_a_legal_move():
+    entry = BOARDS[0]
+    board, diamonds = entry["board"], entry["diamonds"]
+    policy = ExpectimaxSearch("Expectimax", board, diamonds, blocks=BLOCKS)
+    algo = MCTSSearch("MCTS", board, diamonds, blocks=BLOCKS, max_iterations=20, time_limit=10.0,
+                      rollout_policy=policy)
+    hand = PieceDealer(BLOCKS, seed=0).deal()
+    algo.set_hand(hand)
+    assert_legal(algo, algo.get_best_move(None, board, diamonds), board, hand)
+
+
+@pytest.mark.parametrize("entry", BOARDS, ids=[entry["id"] for entry in BOARDS])
+def test_expectimax_plays_a_legal_move_from_a_dealt_hand(entry):
+    board, diamonds = entry["board"], entry["diamonds"]
+    dealer = PieceDealer(BLOCKS, seed=1)
+    algo = ExpectimaxSearch("Expectimax", board, diamonds, blocks=BLOCKS, dealer=dealer)
+    for _ in range(3):
+        hand = dealer.deal()
+        algo.set_hand(hand)
+        algo.board = board
+        if any(algo.possible_moves(block) for block in hand):
+            assert_legal(algo, algo.get_best_move(None, board, diamonds), board, hand)
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+@pytest.mark.parametrize("entry", BOARDS, ids=[entry["id"] for entry in BOARDS])
+def test_mcts_plays_a_legal_move_from_a_dealt_hand(entry, vectorized):
+    board, diamonds = entry["board"], entry["diamonds"]
+    dealer = PieceDealer(BLOCKS, seed=2)
+    algo = MCTSSearch("MCTS", board, diamonds, blocks=BLOCKS, max_iterations=30, time_limit=10.0,
+                      vectorized=vectorized)
+    for _ in range(3):
+        hand = dealer.deal()
+        algo.set_hand(hand)
+        algo.board = board
+        if any(algo.possible_moves(block) for block in hand):
+            assert_legal(algo, algo.get_best_move(None, board, diamonds), board, hand)
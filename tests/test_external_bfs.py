@@ -0,0 +1,86 @@
+import json
+import os
+
+import pytest
+
+from algorithms import PIECE_SETS
+from corpus import load_corpus, select_boards
+from external_bfs import ExternalBFS
+from solver import solve_board
+
+BLOCKS = PIECE_SETS[load_corpus()["generator"]["piece_set"]]
+BOARDS = select_boards(load_corpus(), ["easy", "medium", "hard"])
+
+
+def replay(entry, plan):
+    """Diamonds left after playing 'plan' on the entry's board; every move must fit."""
+    algo = ExternalBFS(entry["board"], entry["diamonds"], blocks=BLOCKS)
+    board, diamonds = entry["board"], entry["diamonds"]
+    for block, x, y in plan:
+        algo.board = board
+        assert (x, y) in algo.possible_moves(block)
+        board, diamonds = algo.apply_move(board, diamonds, (x, y), block)
+    return diamonds
+
+
+@pytest.mark.parametrize("memory_mb", [256, 0])
+@pytest.mark.parametrize("entry", BOARDS, ids=[entry["id"] for entry in BOARDS])
+def test_plan_is_as_short_as_bfs(entry, memory_mb, tmp_path):
+    # memory_mb=0 spills every buffered child to its own run, so the merge is exercised.
+    algo = ExternalBFS(entry["board"], entry["diamonds"], blocks=BLOCKS, work_dir=str(tmp_path),
+                       memory_mb=memory_mb)
+    move = algo.get_best_move(None, entry["board"], entry["diamonds"])
+    assert move == algo.solution_path[0]
+    assert len(algo.solution_path) == solve_board("BFS", entry["board"], entry["diamonds"], blocks=BLOCKS)["moves"]
+    assert len(algo.solution_path) == entry["optimal_moves"]
+    assert not algo.is_goal(entry["diamonds"]) and algo.is_goal(replay(entry, algo.solution_path))
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.mark.parametrize("entry", BOARDS[-3:], ids=[entry["id"] for entry in BOARDS[-3:]])
+def test_search_resumes_from_its_checkpoint(entry, tmp_path, monkeypatch):
+    board, diamonds = entry["board"], entry["diamonds"]
+    first = ExternalBFS(board, diamonds, blocks=BLOCKS, work_dir=str(tmp_path))
+    merge_layer = ExternalBFS.merge_layer
+    merged = []
+
+    def interrupted_merge(*args):
+        if merged:
+            raise Interrupted
+        merged.append(True)
+        return merge_layer(*args)
+
+    monkeypatch.setattr(ExternalBFS, "merge_layer", staticmethod(interrupted_merge))
+    with pytest.raises(Interrupted):
+        first.get_best_move(None, board, diamonds)
+    monkeypatch.undo()
+    with open(tmp_path / "checkpoint.json") as f:
+        checkpoint = json.load(f)
+    assert checkpoint["depth"] == 1 and not checkpoint["done"]
+
+    expanded = []
+    expand_layer = ExternalBFS.expand_layer
+
+    def recorded_expand(self, kernel, path, *args):
+        expanded.append(os.path.basename(path))
+        return expand_layer(self, kernel, path, *args)
+
+    monkeypatch.setattr(ExternalBFS, "expand_layer", recorded_expand)
+    resumed = ExternalBFS(board, diamonds, blocks=BLOCKS, work_dir=str(tmp_path))
+    resumed.get_best_move(None, board, diamonds)
+    assert expanded[0] == "layer_1.bin"
+    assert len(resumed.solution_path) == entry["optimal_moves"]
+    assert resumed.is_goal(replay(entry, resumed.solution_path))
+    assert resumed.nodes_expanded > checkpoint["nodes"] > 0
+
+
+def test_checkpoint_of_another_search_is_refused(tmp_path):
+    first, second = BOARDS[0], BOARDS[1]
+    ExternalBFS(first["board"], first["diamonds"], blocks=BLOCKS, work_dir=str(tmp_path)).get_best_move(
+        None, first["board"], first["diamonds"])
+    with pytest.raises(ValueError):
+        ExternalBFS(second["board"], second["diamonds"], blocks=BLOCKS, work_dir=str(tmp_path)).get_best_move(
+            None, second["board"], second["diamonds"])
@@ -0,0 +1,106 @@
+import copy
+import random
+
+import pytest
+
+from algorithms import PIECE_SETS
+from kernel import Kernel, decode, encode, numba
+
+
+def reference_apply(board, diamonds, move, block):
+    """The list-based move of the original SearchAlgorithm.apply_move: full rows, then the columns still full."""
+    size = len(board)
+    board, diamonds = copy.deepcopy(board), copy.deepcopy(diamonds)
+    x0, y0 = move
+    for i, row in enumerate(block):
+        for j, cell in enumerate(row):
+            if cell == 1:
+                board[x0 + i][y0 + j] = 1
+    for i in range(size):
+        if all(board[i][j] == 1 for j in range(size)):
+            board[i] = [0] * size
+            diamonds[i] = [0] * size
+    for j in range(size):
+        if all(board[i][j] == 1 for i in range(size)):
+            for i in range(size):
+                board[i][j] = 0
+                diamonds[i][j] = 0
+    return board, diamonds
+
+
+def reference_moves(board, block):
+    """Every (x, y) where the filled cells of 'block' land on empty cells."""
+    size = len(board)
+    return [(x, y) for x in range(size - len(block) + 1) for y in range(size - len(block[0]) + 1)
+            if all(not (cell and board[x + i][y + j]) for i, row in enumerate(block) for j, cell in enumerate(row))]
+
+
+def random_state(rng, size, density):
+    board = [[int(rng.random() < density) for _ in range(size)] for _ in range(size)]
+    # Some boards start with a full row or column, which any move then clears.
+    if rng.random() < 0.3:
+        row = rng.randrange(size)
+        board[row] = [1] * size
+    if rng.random() < 0.2:
+        col = rng.randrange(size)
+        for i in range(size):
+            board[i][col] = 1
+    diamonds = [[int(cell and rng.random() < 0.4) for cell in row] for row in board]
+    return board, diamonds
+
+
+KERNELS = [False] + ([True] if numba is not None else [])
+
+
+@pytest.mark.parametrize("use_numba", KERNELS)
+@pytest.mark.parametrize("size, piece_set", [(4, "classic"), (5, "classic"), (6, "woodblock"), (8, "woodblock")])
+def test_children_match_the_list_based_rules(use_numba, size, piece_set):
+    blocks = PIECE_SETS[piece_set]
+    kernel = Kernel(size, blocks, use_numba=use_numba)
+    rng = random.Random(size)
+    for _ in range(60):
+        board, diamonds = random_state(rng, size, rng.choice([0.2, 0.5, 0.8]))
+        expected = []
+        for piece, block in enumerate(blocks):
+            for x, y in reference_moves(board, block):
+                expected.append(((piece, x, y), reference_apply(board, diamonds, (x, y), block)))
+        children = kernel.children(encode(board), encode(diamonds))
+        assert [((piece, x, y), (decode(b, size), decode(d, size))) for (piece, x, y, _), b, d, _ in children] == expected
+        for (_, _, _, mask), b, d, removed in children:
+            assert kernel.play(encode(board), encode(diamonds), mask) == (b, d, removed)
+            assert removed == bin(encode(diamonds)).count("1") - bin(d).count("1")
+
+
+def solvable(kernel, board, diamonds, limit=200000):
+    """Exhaustive search with play() alone (no dead-state pruning); None if 'limit' states were not enough."""
+    seen = {(board, diamonds)}
+    layer = [(board, diamonds)]
+    while layer:
+        next_layer = []
+        for state in layer:
+            for _, child_board, child_diamonds, _ in kernel.children(*state):
+                if kernel.is_goal(child_diamonds):
+                    return True
+                if (child_board, child_diamonds) not in seen:
+                    seen.add((child_board, child_diamonds))
+                    next_layer.append((child_board, child_diamonds))
+        if len(seen) > limit:
+            return None
+        layer = next_layer
+    return False
+
+
+@pytest.mark.parametrize("size, piece_set", [(4, "classic"), (5, "classic")])
+def test_dead_states_are_unsolvable(size, piece_set):
+    kernel = Kernel(size, PIECE_SETS[piece_set], use_numba=False)
+    rng = random.Random(1)
+    dead = 0
+    for _ in range(150):
+        board, diamonds = random_state(rng, size, rng.choice([0.3, 0.5, 0.7]))
+        state = (encode(board), encode(diamonds))
+        if kernel.is_goal(state[1]):
+            continue
+        if kernel.is_dead(*state):
+            dead += 1
+            assert solvable(kernel, *state) is not True
+    assert dead > 0
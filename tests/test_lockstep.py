@@ -0,0 +1,77 @@
+import random
+
+import numpy as np
+import pytest
+
+from algorithms import PIECE_SETS, generate_board
+from kernel import encode, get_kernel
+from lockstep import LockstepGames, greedy_policy, random_policy
+
+
+def random_grids(rng, size, count):
+    """Random boards, some with a full row or column, and diamonds on their filled cells."""
+    boards, diamonds = [], []
+    for _ in range(count):
+        board = [[int(rng.random() < rng.choice([0.3, 0.6, 0.8])) for _ in range(size)] for _ in range(size)]
+        if rng.random() < 0.3:
+            board[rng.randrange(size)] = [1] * size
+        if rng.random() < 0.3:
+            col = rng.randrange(size)
+            for row in board:
+                row[col] = 1
+        boards.append(board)
+        diamonds.append([[int(cell and rng.random() < 0.4) for cell in row] for row in board])
+    return boards, diamonds
+
+
+@pytest.mark.parametrize("size, piece_set", [(5, "classic"), (6, "woodblock"), (8, "woodblock")])
+def test_line_clearing_matches_the_kernel(size, piece_set):
+    blocks = PIECE_SETS[piece_set]
+    kernel = get_kernel(size, blocks)
+    boards, diamonds = random_grids(random.Random(size), size, 200)
+    games = LockstepGames(boards, diamonds, blocks=blocks)
+    # Every placement on every board at once, legal or not: clear() must follow Kernel.play on all.
+    placed = games.board[:, None] | games.masks
+    cleared, lines = games.clear(placed)
+    for g, (board, grid_diamonds) in enumerate(zip(boards, diamonds)):
+        board, grid_diamonds = encode(board), encode(grid_diamonds)
+        for p, (_, _, _, mask) in enumerate(kernel.placements):
+            new_board, new_diamonds, _ = kernel.play(board, grid_diamonds, mask)
+            assert int(placed[g, p] & ~cleared[g, p]) == new_board
+            assert int(games.diamonds[g] & ~cleared[g, p]) == new_diamonds
+            full_rows = sum((board | mask) & line == line for line in kernel.row_masks)
+            full_cols = sum((board | mask) & line == line for line in kernel.col_masks)
+            assert lines[g, p] == (full_rows or full_cols)
+
+
+@pytest.mark.parametrize("hand_size", [None, 3])
+@pytest.mark.parametrize("policy", [greedy_policy, random_policy])
+def test_games_replay_with_kernel_play(policy, hand_size):
+    blocks = PIECE_SETS["classic"]
+    kernel = get_kernel(5, blocks)
+    rng = random.Random(7)
+    boards, diamonds = zip(*(generate_board(grid_size=5, rng=rng) for _ in range(300)))
+    played = []
+
+    def recorded(games, index, legal):
+        choice = policy(games, index, legal)
+        assert legal[np.arange(len(index)), choice].all()
+        if games.hand_size:
+            hands = games.hands[index]
+            assert (hands == games.pieces[choice][:, None]).any(axis=1).all()
+        played.extend(zip(index.tolist(), choice.tolist()))
+        return choice
+
+    games = LockstepGames(boards, diamonds, blocks=blocks, hand_size=hand_size, seed=3)
+    stats = games.play(recorded)
+    states = [(encode(board), encode(grid_diamonds)) for board, grid_diamonds in zip(boards, diamonds)]
+    moves = [0] * len(states)
+    for game, choice in played:
+        states[game] = kernel.play(*states[game], kernel.placements[choice][3])[:2]
+        moves[game] += 1
+    assert [board for board, _ in states] == games.board.tolist()
+    assert [grid_diamonds for _, grid_diamonds in states] == games.diamonds.tolist()
+    assert moves == stats["moves"].tolist()
+    assert stats["won"].tolist() == [kernel.is_goal(grid_diamonds) for _, grid_diamonds in states]
+    # A game ends only when won, stuck or out of moves.
+    assert (stats["won"] | stats["stuck"] | (stats["moves"] == games.max_moves)).all()
@@ -0,0 +1,50 @@
+import pytest
+
+from algorithms import PIECE_SETS
+from corpus import load_corpus, select_boards
+from kernel import block_mask, decode, encode, get_kernel
+from solver import label_plan, rank_moves, solve_board
+
+BLOCKS = PIECE_SETS[load_corpus()["generator"]["piece_set"]]
+KNOWN_BOARDS = select_boards(load_corpus(), ["easy", "medium"])
+
+
+def bfs_distance(board, diamonds):
+    """Moves of the plan BFS finds (its plans are optimal), or None if it finds none."""
+    kernel = get_kernel(len(board), BLOCKS)
+    if kernel.is_goal(encode(diamonds)):
+        return 0
+    result = solve_board("BFS", board, diamonds, blocks=BLOCKS)
+    return result["moves"] if result["solved"] else None
+
+
+@pytest.mark.parametrize("entry", KNOWN_BOARDS, ids=[entry["id"] for entry in KNOWN_BOARDS])
+def test_rank_moves_distances_match_bfs(entry):
+    board, diamonds = entry["board"], entry["diamonds"]
+    size = len(board)
+    kernel = get_kernel(size, BLOCKS)
+    result = rank_moves(board, diamonds, blocks=BLOCKS)
+    assert result["complete"]
+    assert result["ranking"][0][0] == entry["optimal_moves"]
+    for distance, (block, x, y) in result["ranking"]:
+        child_board, child_diamonds = kernel.apply(encode(board), encode(diamonds), block_mask(block, x, y, size))
+        left = bfs_distance(decode(child_board, size), decode(child_diamonds, size))
+        assert distance == (None if left is None else left + 1)
+
+
+@pytest.mark.parametrize("entry", KNOWN_BOARDS, ids=[entry["id"] for entry in KNOWN_BOARDS])
+def test_label_plan_of_a_bfs_plan_is_optimal_at_every_step(entry):
+    board, diamonds = entry["board"], entry["diamonds"]
+    plan = solve_board("BFS", board, diamonds, blocks=BLOCKS)["plan"]
+    labels = label_plan(board, diamonds, plan, blocks=BLOCKS)
+    optimum = entry["optimal_moves"]
+    assert labels == [{"distance": optimum - step, "best": optimum - step} for step in range(len(plan))]
+
+
+def test_label_plan_scores_a_detour_against_the_best_move():
+    entry = KNOWN_BOARDS[0]
+    board, diamonds = entry["board"], entry["diamonds"]
+    ranking = rank_moves(board, diamonds, blocks=BLOCKS)["ranking"]
+    distance, move = ranking[-1]
+    labels = label_plan(board, diamonds, [list(move)], blocks=BLOCKS)
+    assert labels == [{"distance": distance, "best": ranking[0][0]}]
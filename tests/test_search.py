@@ -0,0 +1,49 @@
+import pytest
+
+from algorithms import PIECE_SETS
+from blind_search import BFS, DFS, IterativeDeepeningSearch
+from corpus import load_corpus, select_boards
+from informed_search import AStarSearch
+from solver import solve_board
+
+SQUARE = [[1, 1], [1, 1]]
+
+
+def full_row_board():
+    """A board whose row 2 is already full: any move clears it and its diamond."""
+    board = [[0, 0, 0, 0], [0, 0, 0, 1], [1, 1, 1, 1], [0, 0, 0, 0]]
+    diamonds = [[0] * 4 for _ in range(4)]
+    diamonds[2][0] = 1
+    return board, diamonds
+
+
+@pytest.mark.parametrize("searcher", [BFS, DFS, IterativeDeepeningSearch])
+def test_board_with_a_full_line_is_solved_in_one_move(searcher):
+    board, diamonds = full_row_board()
+    algo = searcher(board, diamonds, blocks=[SQUARE])
+    move = algo.get_best_move(None, board, diamonds)
+    assert move is not None
+    block, x, y = move
+    assert algo.is_goal(algo.apply_move(board, diamonds, (x, y), block)[1])
+
+
+# The corpus records the optimal number of moves of every board.
+KNOWN_BOARDS = select_boards(load_corpus(), ["easy", "medium"])
+
+
+@pytest.mark.parametrize("name", ["BFS", "DFS", "A*"])
+@pytest.mark.parametrize("entry", KNOWN_BOARDS, ids=[entry["id"] for entry in KNOWN_BOARDS])
+def test_plans_solve_boards_with_known_solutions(name, entry):
+    blocks = PIECE_SETS[load_corpus()["generator"]["piece_set"]]
+    result = solve_board(name, entry["board"], entry["diamonds"], blocks=blocks)
+    assert result["solved"]
+    # Replay the plan: every move must fit, and the last one must clear the last diamond.
+    algo = AStarSearch("A*", entry["board"], entry["diamonds"], blocks=blocks)
+    board, diamonds = entry["board"], entry["diamonds"]
+    for block, x, y in result["plan"]:
+        algo.board = board
+        assert (x, y) in algo.possible_moves(block)
+        board, diamonds = algo.apply_move(board, diamonds, (x, y), block)
+    assert algo.is_goal(diamonds)
+    if name == "BFS":
+        assert result["moves"] == entry["optimal_moves"]
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from algorithms import PIECE_SETS
+from corpus import load_corpus, select_boards
+from solver import solve_board
+from visited_sets import make_visited_set
+
+BLOCKS = PIECE_SETS[load_corpus()["generator"]["piece_set"]]
+BOARDS = select_boards(load_corpus(), ["easy", "medium", "hard"])
+
+
+@pytest.mark.parametrize("size", [4, 5, 6, 8])
+def test_packed_set_matches_a_python_set(size):
+    rng = random.Random(size)
+    cells = size * size
+    exact = make_visited_set("set", size)
+    packed = make_visited_set("packed", size)
+    # Few distinct boards, so states also share their board and differ in the diamonds only.
+    boards = [rng.getrandbits(cells) for _ in range(50)]
+    added = []
+    for _ in range(3000):
+        state = (rng.choice(boards), rng.getrandbits(cells))
+        if rng.random() < 0.3 and added:
+            state = rng.choice(added)
+        assert (state in packed) == (state in exact)
+        added.append(state)
+        exact.add(state)
+        packed.add(state)
+        assert len(packed) == len(exact)
+    for _ in range(1000):
+        state = (rng.choice(boards), rng.getrandbits(cells))
+        assert (state in packed) == (state in exact)
+    assert all(state in packed for state in exact)
+    assert packed.capacity > 64  # the table grew and rehashed its keys
+
+
+@pytest.mark.parametrize("name", ["BFS", "DFS", "A*", "A* weighted", "Beam"])
+@pytest.mark.parametrize("entry", BOARDS, ids=[entry["id"] for entry in BOARDS])
+def test_searchers_give_the_same_results_with_the_packed_backend(name, entry):
+    results = [solve_board(name, entry["board"], entry["diamonds"], blocks=BLOCKS, visited=visited)
+               for visited in ("set", "packed")]
+    for key in ("solved", "plan", "nodes", "peak_closed"):
+        assert results[0][key] == results[1][key]
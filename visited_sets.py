@@ -0,0 +1,181 @@
+"""
+Visited-set backends for the explored / closed sets of the searchers. All of them take the
+kernel's (board, diamonds) states and support 'in', add() and len(); nbytes() estimates
+the memory they use.
+
+- "set": a Python set of the state tuples (exact; the default). Simple and fast, but each
+  state costs well over a hundred bytes.
+- "packed": open addressing over a NumPy array of packed keys, board bits then diamond
+  bits in as many uint64 words as the grid needs (one up to 5x5, two up to 8x8). Exact,
+  at around 15-35 bytes per state.
+- "bloom": a Bloom filter sized for 'expected' states and a false-positive rate
+  'error_rate'. A couple of bytes per state, but a false positive makes the search treat
+  an unseen state as visited and skip it, so a plan can be missed or come out longer.
+  For memory-critical runs only.
+
+    make_visited_set("packed", grid_size=8)
+"""
+import math
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # only the "packed" backend needs NumPy
+    np = None
+
+MASK64 = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+
+
+def _mix(key):
+    """64-bit hash of an integer key of any width (a SplitMix64 finalizer over its words)."""
+    h = 0
+    while True:
+        h = ((h ^ (key & MASK64)) * GOLDEN) & MASK64
+        h ^= h >> 31
+        key >>= 64
+        if not key:
+            break
+    h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & MASK64
+    return h ^ (h >> 31)
+
+
+class PythonVisitedSet(set):
+    """A plain set (its add and 'in' stay C calls) that can estimate its memory."""
+    def __init__(self, grid_size):
+        super().__init__()
+
+    def nbytes(self):
+        """The set itself plus one state tuple and its two ints per entry (estimated from one entry)."""
+        size = sys.getsizeof(self)
+        for state in self:
+            size += len(self) * (sys.getsizeof(state) + sum(sys.getsizeof(part) for part in state))
+            break
+        return size
+
+
+class PackedVisitedSet:
+    """Open addressing with linear probing; the table doubles past 'max_load'."""
+    def __init__(self, grid_size, capacity=1 << 6, max_load=0.6):
+        if np is None:
+            raise ImportError("The packed visited set needs NumPy")
+        self.cells = grid_size * grid_size
+        self.words = -(-2 * self.cells // 64)
+        self.max_load = max_load
+        self.count = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.keys = np.zeros((capacity, self.words), dtype=np.uint64)
+        self.used = np.zeros(capacity, dtype=np.bool_)
+
+    def key_of(self, state):
+        board, diamonds = state
+        return (board << self.cells) | diamonds
+
+    def words_of(self, key):
+        return tuple((key >> (64 * (self.words - 1 - i))) & MASK64 for i in range(self.words))
+
+    def find(self, key):
+        """(slot, found): the slot holding 'key', or the empty slot where it would go."""
+        slot = _mix(key) & self.mask
+        keys, used = self.keys, self.used
+        if self.words == 1:
+            while used.item(slot):
+                if keys.item(slot, 0) == key:
+                    return slot, True
+                slot = (slot + 1) & self.mask
+            return slot, False
+        words = self.words_of(key)
+        while used.item(slot):
+            if tuple(keys[slot].tolist()) == words:
+                return slot, True
+            slot = (slot + 1) & self.mask
+        return slot, False
+
+    def add(self, state):
+        key = self.key_of(state)
+        slot, found = self.find(key)
+        if found:
+            return
+        self.keys[slot] = self.words_of(key)
+        self.used[slot] = True
+        self.count += 1
+        if self.count > self.max_load * self.capacity:
+            self.grow()
+
+    def grow(self):
+        old_keys = self.keys[self.used].tolist()
+        self.allocate(self.capacity * 2)
+        for row in old_keys:
+            key = 0
+            for word in row:
+                key = (key << 64) | word
+            slot, _ = self.find(key)
+            self.keys[slot] = row
+            self.used[slot] = True
+
+    def __contains__(self, state):
+        return self.find(self.key_of(state))[1]
+
+    def __len__(self):
+        return self.count
+
+    def nbytes(self):
+        return self.keys.nbytes + self.used.nbytes
+
+
+class BloomVisitedSet:
+    """Bloom filter with double hashing; len() counts the adds of states not reported as present."""
+    def __init__(self, grid_size, expected=1 << 18, error_rate=1e-6):
+        self.cells = grid_size * grid_size
+        bits = max(64, int(-expected * math.log(error_rate) / math.log(2) ** 2))
+        self.bits = bits
+        self.hashes = max(1, round(bits / expected * math.log(2)))
+        self.array = bytearray(-(-bits // 8))
+        self.count = 0
+
+    def positions(self, state):
+        board, diamonds = state
+        key = (board << self.cells) | diamonds
+        h1 = _mix(key)
+        h2 = _mix(key ^ GOLDEN) | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, state):
+        array = self.array
+        new = False
+        for position in self.positions(state):
+            byte, bit = position >> 3, 1 << (position & 7)
+            if not array[byte] & bit:
+                array[byte] |= bit
+                new = True
+        if new:
+            self.count += 1
+
+    def __contains__(self, state):
+        array = self.array
+        return all(array[position >> 3] & (1 << (position & 7)) for position in self.positions(state))
+
+    def __len__(self):
+        return self.count
+
+    def nbytes(self):
+        return len(self.array)
+
+
+VISITED_SETS = {
+    "set": PythonVisitedSet,
+    "packed": PackedVisitedSet,
+    "bloom": BloomVisitedSet,
+}
+
+
+def make_visited_set(kind, grid_size, **options):
+    """A visited set of the backend registered under 'kind' for grid_size x grid_size states."""
+    if kind not in VISITED_SETS:
+        raise ValueError(f"Unknown visited-set backend {kind!r}; expected one of {', '.join(VISITED_SETS)}")
+    return VISITED_SETS[kind](grid_size, **options)